@@ -0,0 +1,156 @@
+"""
+Time each stage of the build on a synthetic vault and save the results as JSON.
+
+Run from the src folder:
+    python -m benchmarks.bench_pipeline --files 500 --output results.json
+    python -m benchmarks.bench_pipeline --files 500 --compare results.json
+
+With --compare, the run is compared to a previous result file and the exit code is 1 if
+any stage got slower than the threshold.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+from benchmarks.synthetic_vault import (
+    VaultConfig,
+    add_vault_arguments,
+    generate_vault,
+    get_vault_config,
+)
+
+import main as ankigen
+from deck_builder import deck_builder
+from models.models import Flashcard
+from note_processor import builder
+from vault.note_loader import NoteLoader
+
+STAGES = ["frontmatter", "parse", "mask", "build", "package"]
+
+
+def run_once(folder: str, output_file: str) -> Dict:
+    """Run the build once, timing every stage separately."""
+    timings = dict.fromkeys(STAGES, 0.0)
+    cards: List[Flashcard] = []
+    files = 0
+    loader = NoteLoader()
+    for md_file in ankigen.get_markdown_files(folder):
+        files += 1
+        start = time.perf_counter()
+        note = loader.load(md_file)
+        timings["frontmatter"] += time.perf_counter() - start
+        if note is None:
+            continue
+        _, note_metadata, content = note
+
+        start = time.perf_counter()
+        tables = note_metadata.parser.parse(content)
+        timings["parse"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        unmasked_tables, masked_tables = note_metadata.masker.mask(
+            tables, note_metadata.mask_row_header, note_metadata.mask_col_header
+        )
+        timings["mask"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        cards.extend(builder.build(unmasked_tables, masked_tables, note_metadata))
+        timings["build"] += time.perf_counter() - start
+
+    # A package with the same content would not be written again, see PackageWriter.
+    if os.path.exists(output_file):
+        os.remove(output_file)
+    start = time.perf_counter()
+    deck_builder.build_anki_package(cards, "benchmark", output_file)
+    timings["package"] += time.perf_counter() - start
+
+    return {
+        "files": files,
+        "cards": len(cards),
+        "apkg_bytes": os.path.getsize(output_file),
+        "timings": timings,
+    }
+
+
+def run(config: VaultConfig, repeat: int) -> Dict:
+    """Generate a vault and return the best time of every stage over the repeats."""
+    with tempfile.TemporaryDirectory() as folder:
+        vault = os.path.join(folder, "vault")
+        generate_vault(vault, config)
+        output_file = os.path.join(folder, "benchmark.apkg")
+        runs = [run_once(vault, output_file) for _ in range(repeat)]
+
+    stages = {}
+    for stage in STAGES:
+        seconds = min(r["timings"][stage] for r in runs)
+        stages[stage] = {
+            "seconds": seconds,
+            "per_file_ms": seconds / max(runs[0]["files"], 1) * 1000,
+        }
+    return {
+        "config": config.to_dict(),
+        "python": sys.version.split()[0],
+        "files": runs[0]["files"],
+        "cards": runs[0]["cards"],
+        "apkg_bytes": runs[0]["apkg_bytes"],
+        "total_seconds": sum(stage["seconds"] for stage in stages.values()),
+        "stages": stages,
+    }
+
+
+def compare(result: Dict, baseline: Dict, threshold: float) -> bool:
+    """Print the change of every stage. Returns False if a stage regressed by more than the threshold."""
+    ok = True
+    print(f"{'stage':<12} {'baseline [s]':>12} {'current [s]':>12} {'change':>8}")
+    for stage in STAGES + ["total"]:
+        if stage == "total":
+            old, new = baseline["total_seconds"], result["total_seconds"]
+        else:
+            old = baseline["stages"][stage]["seconds"]
+            new = result["stages"][stage]["seconds"]
+        change = (new - old) / old if old else 0.0
+        regressed = change > threshold
+        ok = ok and not regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{stage:<12} {old:>12.4f} {new:>12.4f} {change:>+8.1%}{flag}")
+    if baseline["config"] != result["config"]:
+        print(
+            "Warning: the baseline was measured with a different vault configuration."
+        )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_vault_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="Compare to the results in this JSON file.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown of a stage reported as a regression.",
+    )
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    result = run(get_vault_config(args), args.repeat)
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        if not compare(result, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
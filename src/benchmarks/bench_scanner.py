@@ -0,0 +1,73 @@
+"""
+Compare listing the markdown files of a vault with os.walk and with the vault scanner, on a
+synthetic Obsidian-like tree whose hidden and attachment folders hold most of the entries.
+
+Run from the src folder:
+    python -m benchmarks.bench_scanner
+    python -m benchmarks.bench_scanner --notes 2000 --junk 50000
+"""
+
+import argparse
+import os
+import tempfile
+import timeit
+from typing import Iterator
+from vault.scanner import IgnoreRules, scan_markdown_files
+
+# Folders which never hold flashcards, and the share of the junk entries they get.
+JUNK_FOLDERS = {".git/objects": 0.5, ".obsidian/plugins": 0.1, ".trash": 0.1}
+ATTACHMENTS_FOLDER = "attachments"
+
+
+def walk_markdown_files(root_folder: str) -> Iterator[str]:
+    """The previous implementation of get_markdown_files."""
+    for root, _, files in os.walk(root_folder):
+        for file in files:
+            if file.endswith(".md"):
+                yield os.path.join(root, file)
+
+
+def make_tree(folder: str, notes: int, junk: int) -> None:
+    """Create empty notes in nested folders and junk files, 100 per folder."""
+    for i in range(notes):
+        path = os.path.join(folder, f"topic{i % 20}", f"sub{i % 7}", f"note{i}.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "w").close()
+    shares = {**JUNK_FOLDERS, ATTACHMENTS_FOLDER: 1 - sum(JUNK_FOLDERS.values())}
+    for junk_folder, share in shares.items():
+        for i in range(int(junk * share)):
+            path = os.path.join(folder, junk_folder, f"{i // 100:02x}", f"{i}.bin")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "w").close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--junk", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        make_tree(folder, args.notes, args.junk)
+        rules = IgnoreRules([f"{ATTACHMENTS_FOLDER}/"])
+        walked = list(walk_markdown_files(folder))
+        scanned = list(scan_markdown_files(folder, rules))
+        assert walked == scanned, "the scanner must list the same notes as os.walk"
+
+        runs = {
+            "os.walk": lambda: list(walk_markdown_files(folder)),
+            "scanner": lambda: list(scan_markdown_files(folder)),
+            "scanner + ignore": lambda: list(scan_markdown_files(folder, rules)),
+        }
+        print(f"{len(walked)} notes, {args.junk} junk files")
+        print(f"{'':>16} {'time [ms]':>10} {'speedup':>8}")
+        baseline = None
+        for name, run in runs.items():
+            seconds = min(timeit.repeat(run, number=1, repeat=args.repeat))
+            baseline = baseline or seconds
+            print(f"{name:>16} {seconds * 1000:>10.1f} {baseline / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
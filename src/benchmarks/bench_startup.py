@@ -0,0 +1,86 @@
+"""
+Measure how long it takes to start the CLI, and which heavy modules are imported at startup.
+
+Run from the src folder:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --max-seconds 0.2
+
+With --max-seconds, the exit code is 1 if importing main takes longer than that, or if a
+heavy module is imported at startup.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+# Modules which must only be imported by the stage that needs them.
+HEAVY_MODULES = ["markdown", "bs4", "genanki", "yaml", "frontmatter", "dotenv"]
+
+SRC_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "python": [sys.executable, "-c", "pass"],
+    "import main": [sys.executable, "-c", "import main"],
+    "main.py --help": [sys.executable, "main.py", "--help"],
+}
+
+
+def get_startup_modules() -> List[str]:
+    """Return the heavy modules imported by `import main`."""
+    code = f"import sys, main; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=SRC_FOLDER,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return output.split()
+
+
+def time_command(command: List[str], repeat: int) -> float:
+    """Return the best wall time of a command over the repeats."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=SRC_FOLDER, capture_output=True, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(repeat: int) -> Dict:
+    seconds = {
+        name: time_command(command, repeat) for name, command in COMMANDS.items()
+    }
+    return {
+        "python": sys.version.split()[0],
+        "seconds": seconds,
+        "heavy_modules": get_startup_modules(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        help="Fail if importing main takes longer than this.",
+    )
+    args = parser.parse_args()
+
+    result = run(args.repeat)
+    print(json.dumps(result, indent=2))
+    ok = not result["heavy_modules"]
+    if args.max_seconds is not None:
+        ok = ok and result["seconds"]["import main"] <= args.max_seconds
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
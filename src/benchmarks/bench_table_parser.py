@@ -0,0 +1,47 @@
+"""
+Compare the speed of TableParser and TableParserFast.
+
+Run from the src folder:
+    python -m benchmarks.bench_table_parser
+"""
+
+import timeit
+from note_processor.table_parser import TableParser
+from note_processor.table_parser_fast import TableParserFast
+
+SIZES = [(5, 3), (20, 6), (60, 10)]
+
+
+def make_table(num_rows: int, num_cols: int) -> str:
+    """Return a markdown note with a single table of the given size."""
+    lines = ["# Benchmark", ""]
+    lines.append("| " + " | ".join(f"Header {c}" for c in range(num_cols)) + " |")
+    lines.append("|" + "|".join("---" for _ in range(num_cols)) + "|")
+    for r in range(num_rows):
+        cells = [f"Row {r}"] + [f"cell `{r}|{c}` text" for c in range(1, num_cols)]
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = TableParser()
+    fast_parser = TableParserFast()
+    print(f"{'size':>10} {'table [ms]':>12} {'table_fast [ms]':>16} {'speedup':>8}")
+    for num_rows, num_cols in SIZES:
+        content = make_table(num_rows, num_cols)
+        assert fast_parser.parse(content) == parser.parse(content)
+        number = max(1, 2000 // num_rows)
+        slow = min(
+            timeit.repeat(lambda: parser.parse(content), number=number, repeat=3)
+        )
+        fast = min(
+            timeit.repeat(lambda: fast_parser.parse(content), number=number, repeat=3)
+        )
+        print(
+            f"{num_rows:>4}x{num_cols:<5} {slow / number * 1000:>12.3f} "
+            f"{fast / number * 1000:>16.3f} {slow / fast:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
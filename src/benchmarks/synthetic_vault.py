@@ -0,0 +1,110 @@
+"""
+Generate a synthetic vault of table notes for benchmarks.
+
+Run from the src folder:
+    python -m benchmarks.synthetic_vault OUTPUT_FOLDER --files 500 --rows 10 --cols 5
+"""
+
+import argparse
+import os
+import random
+import string
+from dataclasses import asdict, dataclass
+
+
+@dataclass(slots=True, kw_only=True)
+class VaultConfig:
+    files: int = 100
+    rows: int = 10
+    cols: int = 5
+    cell_length: int = 12
+    # Fraction of the notes with shuffle_rows / shuffle_cols / mask headers enabled.
+    shuffle_ratio: float = 0.5
+    mask_ratio: float = 0.5
+    decks: int = 4
+    parser: str = "table"
+    layout: str = "inline"
+    html: str = "pretty"
+    # Body rows and columns per table window, not set if 0.
+    page_rows: int = 0
+    page_cols: int = 0
+    hint_length: int = 40
+    seed: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def make_cell(rng: random.Random, length: int) -> str:
+    words = []
+    while sum(len(word) + 1 for word in words) < length:
+        words.append("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 8))))
+    return " ".join(words)[:length].strip()
+
+
+def make_note(rng: random.Random, config: VaultConfig, idx: int) -> str:
+    lines = [
+        "---",
+        f"id: synthetic-{idx}",
+        f"deck: Deck {idx % config.decks}",
+        f"parser: {config.parser}",
+        "masker: vectors",
+        f"mask_row_headers: {str(rng.random() < config.mask_ratio).lower()}",
+        f"mask_col_headers: {str(rng.random() < config.mask_ratio).lower()}",
+        f"shuffle_rows: {str(rng.random() < config.shuffle_ratio).lower()}",
+        f"shuffle_cols: {str(rng.random() < config.shuffle_ratio).lower()}",
+        "hints:",
+        f"  - {make_cell(rng, config.hint_length)}",
+        f"layout: {config.layout}",
+        f"html: {config.html}",
+        "---",
+        f"# Note {idx}",
+        "",
+    ]
+    for key, size in (("page_rows", config.page_rows), ("page_cols", config.page_cols)):
+        if size:
+            lines.insert(lines.index("---", 1), f"{key}: {size}")
+    header = [""] + [make_cell(rng, config.cell_length) for _ in range(config.cols - 1)]
+    lines.append("| " + " | ".join(header) + " |")
+    lines.append("|" + "|".join("---" for _ in range(config.cols)) + "|")
+    for _ in range(config.rows - 1):
+        row = [make_cell(rng, config.cell_length) for _ in range(config.cols)]
+        lines.append("| " + " | ".join(row) + " |")
+    return "\n".join(lines) + "\n"
+
+
+def generate_vault(folder: str, config: VaultConfig) -> None:
+    """Write config.files notes into folder, spread over one subfolder per deck."""
+    rng = random.Random(config.seed)
+    for idx in range(config.files):
+        subfolder = os.path.join(folder, f"deck_{idx % config.decks}")
+        os.makedirs(subfolder, exist_ok=True)
+        with open(os.path.join(subfolder, f"note_{idx}.md"), "w") as f:
+            f.write(make_note(rng, config, idx))
+
+
+def add_vault_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add an argument for every field of VaultConfig."""
+    defaults = VaultConfig()
+    for name, default in defaults.to_dict().items():
+        parser.add_argument(
+            "--" + name.replace("_", "-"), type=type(default), default=default
+        )
+
+
+def get_vault_config(args: argparse.Namespace) -> VaultConfig:
+    return VaultConfig(
+        **{name: getattr(args, name) for name in VaultConfig().to_dict()}
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("folder")
+    add_vault_arguments(parser)
+    args = parser.parse_args()
+    generate_vault(args.folder, get_vault_config(args))
+
+
+if __name__ == "__main__":
+    main()
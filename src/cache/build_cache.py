@@ -0,0 +1,147 @@
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from models.models import Flashcard, NoteMetadata
+from note_processor.abstracts import Masker, Parser
+
+src_dir = Path(__file__).parent.parent
+
+# Packages whose source determines the produced flashcards.
+CODE_PACKAGES = ["cache", "deck_builder", "models", "note_processor"]
+
+INDEX_FILE = "index.json"
+ENTRIES_DIR = "entries"
+
+
+@lru_cache(maxsize=None)
+def get_code_version() -> str:
+    """
+    Return a stamp of the source code that produces flashcards.
+    Any change to a module, stylesheet or script invalidates all cached entries.
+    """
+    digest = hashlib.sha256()
+    for package in CODE_PACKAGES:
+        for path in sorted((src_dir / package).iterdir()):
+            if path.suffix not in (".py", ".css", ".js"):
+                continue
+            digest.update(path.name.encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _option_value(value):
+    """Return a JSON serializable value describing a note option."""
+    if isinstance(value, (Parser, Masker)):
+        return [type(value).__qualname__, sorted(vars(value).items())]
+    return value
+
+
+def get_note_options(note_metadata: NoteMetadata) -> Dict:
+    """Return the effective options of a note, as used for the cache key."""
+    return {
+        f.name: _option_value(getattr(note_metadata, f.name))
+        for f in dataclasses.fields(note_metadata)
+    }
+
+
+class BuildCache:
+    """
+    On-disk cache of the flashcards produced by each markdown file.
+
+    Entries are keyed by the file content, the effective note options and the code version.
+    Every build records the entries it used, entries which are not recorded (deleted files,
+    changed content or options, old code versions) are evicted when the cache is saved.
+
+    An entry also holds the warnings logged while its flashcards were made. They are logged
+    again when it is loaded, so a cached note reports the same problems as a processed one.
+    """
+
+    def __init__(self, cache_folder: str):
+        self.cache_folder = Path(cache_folder)
+        self.entries_folder = self.cache_folder / ENTRIES_DIR
+        self.entries_folder.mkdir(parents=True, exist_ok=True)
+        self.used: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def get_key(self, raw: str, note_metadata: NoteMetadata) -> str:
+        """Return the cache key of a note from its raw file content and options."""
+        digest = hashlib.sha256()
+        digest.update(get_code_version().encode("utf-8"))
+        digest.update(
+            json.dumps(get_note_options(note_metadata), sort_keys=True).encode("utf-8")
+        )
+        digest.update(raw.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.entries_folder / f"{key}.pickle"
+
+    def load(self, key: str) -> Optional[List[Flashcard]]:
+        """
+        Return the cached flashcards for the key, or None on a cache miss.
+        The warnings stored with them are logged again.
+        """
+        try:
+            with open(self._entry_path(key), "rb") as f:
+                cards, records = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logging.warning(f"Discarding unreadable cache entry '{key}': {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        for record in records:
+            logging.getLogger(record.name).handle(record)
+        return cards
+
+    def store(
+        self,
+        key: str,
+        cards: List[Flashcard],
+        records: Sequence[logging.LogRecord] = (),
+    ) -> None:
+        """
+        Store the flashcards under the key, with the warnings and errors among the log records
+        emitted while making them. The records must be picklable, see processor.collect_warnings.
+        The entry is replaced atomically.
+        """
+        warnings = [record for record in records if record.levelno >= logging.WARNING]
+        fd, tmp_path = tempfile.mkstemp(dir=self.entries_folder, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((cards, warnings), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._entry_path(key))
+
+    def record(self, md_file: str, key: str) -> None:
+        """Mark the entry of a markdown file as used by the current build."""
+        self.used[os.path.abspath(md_file)] = key
+
+    def forget(self, md_file: str) -> None:
+        """Stop using the entry of a markdown file, e.g. because the file was deleted."""
+        self.used.pop(os.path.abspath(md_file), None)
+
+    def save(self) -> None:
+        """Evict all entries not used by the current build and write the index."""
+        used_keys = set(self.used.values())
+        for path in self.entries_folder.iterdir():
+            if path.stem not in used_keys:
+                path.unlink(missing_ok=True)
+                if path.suffix == ".pickle":
+                    self.evicted += 1
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_folder, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"code_version": get_code_version(), "entries": self.used}, f)
+        os.replace(tmp_path, self.cache_folder / INDEX_FILE)
+
+    def __str__(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses, {self.evicted} evicted"
@@ -0,0 +1,144 @@
+import hashlib
+import os
+import re
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+current_dir = Path(__file__).parent
+
+# Source of the script shared by the templates, see my_ankigen.js.
+BUNDLE_SOURCE = "my_ankigen.js"
+# Media files starting with an underscore are kept by Anki even if no note references them.
+BUNDLE_PREFIX = "_my_ankigen."
+BUNDLE_SUFFIX = ".js"
+# Folder the bundle is written to if no folder is given, see get_media_files.
+DEFAULT_FOLDER = Path(tempfile.gettempdir()) / "my_ankigen_assets"
+
+# Strings are kept as they are, comments and runs of whitespace are collapsed.
+_CSS_TOKEN = re.compile(
+    r"""(?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(?P<space>(?:\s|/\*.*?\*/)+)|[^"'\s/{};,>:]+|.""",
+    re.S,
+)
+_JS_TOKEN = re.compile(
+    r"""(?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|`(?:\\.|[^`\\])*`)"""
+    r"""|(?P<space>(?:\s|/\*.*?\*/|//[^\n]*)+)|[^"'`\s/]+|.""",
+    re.S,
+)
+# No space is needed next to these characters.
+_CSS_SEPARATORS = "{};,>"
+_JS_SEPARATORS = "{}()[];,:=<>!&|?*%"
+# No line break is needed after (or before) these characters, as a statement cannot end there.
+_JS_CONTINUED_AFTER = "{([;,:=&|?"
+_JS_CONTINUED_BEFORE = ")]};,.:?"
+
+
+@lru_cache(maxsize=None)
+def load_asset(name: str) -> str:
+    """
+    Return the content of a CSS or JavaScript file of this package.
+    Each file is read on first use and only once per process.
+    """
+    with open(current_dir / name, "r") as f:
+        return f.read()
+
+
+def minify_css(css: str) -> str:
+    """Remove the comments and the whitespace which is not needed from a stylesheet."""
+    out = []
+    for match in _CSS_TOKEN.finditer(css):
+        token = match.group()
+        if match.lastgroup == "space":
+            out.append(" ")
+            continue
+        if out and out[-1] == " ":
+            if len(out) == 1 or out[-2][-1] in _CSS_SEPARATORS + ":":
+                out.pop()
+            elif token[0] in _CSS_SEPARATORS:
+                out.pop()
+        if token == "}" and out and out[-1] == ";":
+            out.pop()
+        out.append(token)
+    if out and out[-1] == " ":
+        out.pop()
+    return "".join(out)
+
+
+def minify_js(js: str) -> str:
+    """
+    Remove the comments and the whitespace which is not needed from a script.
+
+    Line breaks are kept where a statement may end, so automatic semicolon insertion works as
+    before. Regular expression literals are not supported.
+    """
+    out = []
+    space = ""
+    for match in _JS_TOKEN.finditer(js):
+        token = match.group()
+        if match.lastgroup == "space":
+            space = "\n" if "\n" in token or space == "\n" else " "
+            continue
+        if space and out:
+            prev, first = out[-1][-1], token[0]
+            if (
+                space == "\n"
+                and prev not in _JS_CONTINUED_AFTER
+                and first not in _JS_CONTINUED_BEFORE
+            ):
+                out.append("\n")
+            elif prev not in _JS_SEPARATORS and first not in _JS_SEPARATORS:
+                out.append(" ")
+        space = ""
+        out.append(token)
+    return "".join(out)
+
+
+@lru_cache(maxsize=None)
+def get_bundle() -> Tuple[str, str]:
+    """
+    Return the media file name and the content of the minified script shared by the templates.
+    The name holds a hash of the content: Anki does not replace a media file it already has
+    with a new one of the same name, so a changed script gets a new name.
+    """
+    content = minify_js(load_asset(BUNDLE_SOURCE))
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+    return f"{BUNDLE_PREFIX}{digest}{BUNDLE_SUFFIX}", content
+
+
+def get_script(call: str) -> str:
+    """
+    Return the HTML of a template loading the shared script and running call once it is loaded.
+    call is a JavaScript expression using the functions of the script as m, e.g.
+    'm.showVariant("question")'.
+    """
+    name, _ = get_bundle()
+    queued = minify_js(
+        "(window.myAnkigenQueue = window.myAnkigenQueue || [])"
+        f".push(function (m) {{ {call}; }});"
+    )
+    return f'<script src="{name}"></script><script>{queued}</script>'
+
+
+def get_media_files(folder: Optional[str] = None) -> Dict[str, str]:
+    """
+    Return the name and path of the shared script, to add to the media files of a package.
+    The script is written to the folder, e.g. in the build cache folder, or to DEFAULT_FOLDER.
+
+    The script is only written if the folder does not hold a file of that name yet, so its
+    modification time, which the package fingerprint depends on, does not change between
+    builds. Scripts of previous versions are removed.
+    """
+    folder_path = DEFAULT_FOLDER if folder is None else Path(folder)
+    name, content = get_bundle()
+    path = folder_path / name
+    if not path.exists():
+        folder_path.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder_path, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        for old in folder_path.glob(f"{BUNDLE_PREFIX}*{BUNDLE_SUFFIX}"):
+            if old.name != name:
+                old.unlink(missing_ok=True)
+    return {name: str(path)}
@@ -1,62 +1,67 @@
-import genanki
-import hashlib
-from typing import List, Dict
+from collections import ChainMap
+from typing import TYPE_CHECKING, Dict, Iterable, Mapping, Optional
 from models.models import Flashcard
+from profiling import profiler
 
-
-def generate_deck_id(name: str) -> int:
-    """
-    Generate a unique integer ID based on the provided name.
-    """
-    return int(hashlib.md5(name.encode("utf-8")).hexdigest()[:8], 16)
-
-
-def group_flashcards_by_deck(flashcards: List[Flashcard]) -> Dict[str, List[Flashcard]]:
-    """
-    Group flashcards by their 'deck' property.
-    Returns a dictionary mapping deck names to lists of flashcards.
-    """
-    groups = {}
-    for card in flashcards:
-        groups.setdefault(card.metadata.deck, []).append(card)
-    return groups
+if TYPE_CHECKING:
+    from deck_builder.package_writer import PackageReport
 
 
 def build_anki_package(
-    flashcards: List[Flashcard], parent_deck_name: str, output_filename: str
-) -> None:
+    flashcards: Iterable[Flashcard],
+    parent_deck_name: str,
+    output_filename: str,
+    update: bool = False,
+    media_files: Optional[Mapping[str, str]] = None,
+    compress_level: Optional[int] = None,
+    timestamp: Optional[float] = None,
+    assets_folder: Optional[str] = None,
+) -> "PackageReport":
     """
     Build an APKG file containing multiple subdecks using the 'ParentDeck::Subdeck' naming convention.
     The note type for each flashcard is determined on a per-card basis using its `note_type` metadata.
 
-    This function groups flashcards by their deck, then for each flashcard, it looks up its note type
-    (e.g. "ts_basic") from the NOTE_TYPE_MAP, instantiates the corresponding note type class, and uses it
-    to create the genanki.Note.
-    """
-    groups = group_flashcards_by_deck(flashcards)
-    decks = []
+    The flashcards are consumed one by one: each flashcard is turned into a genanki.Note using the
+    model of its note type and written to its subdeck right away, so the flashcards can be streamed
+    from a generator and no card is kept in memory after it has been written.
 
-    for subdeck_name, cards in groups.items():
-        full_deck_name = f"{parent_deck_name}::{subdeck_name}"
-        deck_id = generate_deck_id(full_deck_name)
-        deck = genanki.Deck(deck_id, full_deck_name)
+    With update=True, the existing output file is updated in place: only the notes whose GUID is new,
+    whose content changed or which are no longer produced are written. Returns the report of the changes.
 
-        for card in cards:
-            # Instantiate the note type class for this card.
-            model = card.metadata.note_type.create_model()
+    media_files maps the names of the media files used by the flashcards to their paths. The mapping is
+    read when the package is written, after the last flashcard, so it can be filled while the flashcards
+    are generated. The script shared by the note types is added if the flashcards use it, from
+    assets_folder, see deck_builder.assets.
 
-            note = genanki.Note(
-                guid=card.metadata.id, model=model, fields=[card.front, card.back]
-            )
-            deck.add_note(note)
-        decks.append(deck)
-
-    if not decks:
-        raise ValueError("No decks to build from the provided flashcards.")
+    The package is stored, or deflated with compress_level (0-9). Its content is deterministic
+    for a given timestamp (the current time by default). If the existing output file already has
+    the same content, it is not written again and the report is marked as unchanged.
+    """
+    # Imported here: genanki is only needed once there are flashcards to write.
+    import genanki
+    from deck_builder import assets
+    from deck_builder.package_writer import PackageWriter
 
-    # Merge notes from all subdecks into a single package.
-    package = genanki.Package(decks[0])
-    for deck in decks[1:]:
-        package.notes.extend(deck.notes)
+    shared_files: Dict[str, str] = {}
+    with PackageWriter(
+        output_filename,
+        timestamp=timestamp,
+        update=update,
+        media_files=ChainMap(shared_files, media_files or {}),
+        compress_level=compress_level,
+    ) as writer:
+        for card in flashcards:
+            with profiler.stage("write_notes"):
+                note_type = card.metadata.note_type
+                if note_type.shared_script and not shared_files:
+                    shared_files.update(assets.get_media_files(assets_folder))
+                note = genanki.Note(
+                    guid=card.metadata.id,
+                    model=note_type.create_model(),
+                    fields=note_type.fields_for(card),
+                )
+                writer.add_note(f"{parent_deck_name}::{card.metadata.deck}", note)
 
-    package.write_to_file(output_filename)
+        if not writer.num_notes:
+            raise ValueError("No decks to build from the provided flashcards.")
+    return writer.report
@@ -0,0 +1,114 @@
+// Scripts shared by the templates of the note types, bundled as a media file by deck_builder.assets.
+// A template queues a call with (window.myAnkigenQueue = window.myAnkigenQueue || []).push(fn),
+// fn is called with the functions below once this file is loaded, or right away if it already is.
+(function () {
+  // Simple linear congruential generator (LCG) for seeded randomness.
+  function seededRandom(seed) {
+    var m = 0x80000000; // 2^31
+    var a = 1103515245;
+    var c = 12345;
+    seed = (a * seed + c) % m;
+    return { value: seed / m, seed: seed };
+  }
+
+  // Deterministically shuffle an array using the seed.
+  function shuffleArray(array, seed) {
+    var newArray = array.slice();
+    for (var i = newArray.length - 1; i > 0; i--) {
+      var rnd = seededRandom(seed);
+      seed = rnd.seed;
+      var j = Math.floor(rnd.value * (i + 1));
+      var temp = newArray[i];
+      newArray[i] = newArray[j];
+      newArray[j] = temp;
+    }
+    return newArray;
+  }
+
+  // The indices from 1 to count - 1: the body rows or columns, after the header.
+  function bodyIndices(count) {
+    var indices = [];
+    for (var i = 1; i < count; i++) {
+      indices.push(i);
+    }
+    return indices;
+  }
+
+  // Show the body rows and body columns of the table in the given orders. The header row and
+  // column stay first, and the cells are moved, so they keep their classes.
+  function applyOrder(table, rowOrder, colOrder) {
+    var rows = Array.from(table.rows);
+    if (colOrder.length) {
+      rows.forEach(function (row) {
+        var cells = Array.from(row.cells);
+        row.replaceChildren.apply(
+          row,
+          [cells[0]].concat(colOrder.map(function (c) { return cells[c]; }))
+        );
+      });
+    }
+    if (rowOrder.length) {
+      var body = rows[0].parentNode;
+      body.replaceChildren.apply(
+        body,
+        [rows[0]].concat(rowOrder.map(function (r) { return rows[r]; }))
+      );
+    }
+  }
+
+  // Shuffle the rows and/or the columns of the table. The question generates and stores a
+  // random seed, the answer loads it to show the same order.
+  function shuffleTable(side, shuffleRows, shuffleCols) {
+    var storageKey = "randomSeed";
+    var storedSeed;
+    if (side === "question") {
+      storedSeed = Date.now();
+      localStorage.setItem(storageKey, storedSeed);
+    } else {
+      storedSeed = parseInt(localStorage.getItem(storageKey), 10);
+    }
+
+    // Find the table by its tag
+    var table = document.querySelector("table");
+    if (!table || !table.rows.length) return;
+    var rowCount = table.rows.length;
+    var colCount = table.rows[0].cells.length;
+    applyOrder(
+      table,
+      shuffleRows ? shuffleArray(bodyIndices(rowCount), storedSeed) : [],
+      shuffleCols ? shuffleArray(bodyIndices(colCount), storedSeed) : []
+    );
+  }
+
+  // Show one of the orders computed when the package was built. The question picks one and
+  // stores it, the answer shows the same one.
+  function showVariant(side) {
+    var variants = JSON.parse(document.getElementById("shuffle").textContent || "[]");
+    if (!variants.length) return;
+    var variant;
+    if (side === "question") {
+      variant = Math.floor(Math.random() * variants.length);
+      localStorage.setItem("shuffleVariant", variant);
+    } else {
+      variant = parseInt(localStorage.getItem("shuffleVariant"), 10);
+      if (!(variant >= 0 && variant < variants.length)) variant = 0;
+    }
+
+    var table = document.querySelector("table");
+    if (!table) return;
+    // Each variant lists the body rows and body columns in the order to show them in.
+    applyOrder(table, variants[variant][0], variants[variant][1]);
+  }
+
+  var api = { shuffleTable: shuffleTable, showVariant: showVariant };
+  // Calls queued before this file was loaded. On later cards, the queue may already be replaced.
+  var queue = Array.isArray(window.myAnkigenQueue) ? window.myAnkigenQueue : [];
+  window.myAnkigenQueue = {
+    push: function (fn) {
+      fn(api);
+    },
+  };
+  queue.forEach(function (fn) {
+    fn(api);
+  });
+})();
@@ -1,18 +1,23 @@
-import genanki
-from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Type
+from deck_builder.assets import load_asset, minify_css
+from note_processor import styler
 
-current_dir = Path(__file__).parent
-
-# Global CSS shared by all note types.
-with open(current_dir / "note_type_base.css", "r") as f:
-    BASE_CSS = f.read()
+if TYPE_CHECKING:
+    import genanki
+    from models.models import Flashcard
 
 
 class BaseNoteType:
     """
     Base class for Anki note types.
+    Note types are shared: use get_instance instead of creating new instances.
     """
 
+    # Whether a note holds a whole table and makes one card per vector, see note_type_vectors.
+    one_note_per_table = False
+    # Whether the templates load the script shared by the note types, see deck_builder.assets.
+    shared_script = False
+
     def __init__(
         self, model_id: int, name: str, fields: list, templates: list, css: str = ""
     ):
@@ -20,13 +25,49 @@ class BaseNoteType:
         self.name = name
         self.fields = fields
         self.templates = templates
-        self.css = BASE_CSS + "\n" + css
-
-    def create_model(self) -> genanki.Model:
-        return genanki.Model(
-            self.model_id,
-            self.name,
-            fields=self.fields,
-            templates=self.templates,
-            css=self.css,
-        )
+        # Global CSS shared by all note types.
+        self.css = minify_css(load_asset("note_type_base.css") + "\n" + css)
+        self._model: Optional["genanki.Model"] = None
+
+    def create_model(self) -> "genanki.Model":
+        """Return the genanki model of this note type. The model is created once."""
+        if self._model is None:
+            import genanki
+
+            self._model = genanki.Model(
+                self.model_id,
+                self.name,
+                fields=self.fields,
+                templates=self.templates,
+                css=self.css,
+            )
+        return self._model
+
+    def fields_for(self, card: "Flashcard") -> List[str]:
+        """
+        Return the note fields of a flashcard: the front and the back, each with the header
+        and the hints of the card.
+        """
+        return [
+            styler.add_hints(card.hints, styler.add_card_header(card.header, content))
+            for content in (card.front, card.back)
+        ]
+
+    def __reduce__(self):
+        # Unpickled note types (from the build cache or worker processes) resolve to the shared instance.
+        return (get_instance, (type(self),))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r})"
+
+
+_instances: Dict[Type[BaseNoteType], BaseNoteType] = {}
+
+
+def get_instance(note_type_class: Type[BaseNoteType]) -> BaseNoteType:
+    """Return the shared instance of a note type class, creating it on first use."""
+    note_type = _instances.get(note_type_class)
+    if note_type is None:
+        note_type = note_type_class()
+        _instances[note_type_class] = note_type
+    return note_type
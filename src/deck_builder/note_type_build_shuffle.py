@@ -0,0 +1,76 @@
+from typing import TYPE_CHECKING, List
+from deck_builder.assets import get_script
+from deck_builder.note_type_base import BaseNoteType
+from deck_builder.note_type_split import TableNoteTypeSplit
+from deck_builder.note_type_table import TableNoteType
+from deck_builder.note_type_vectors import TableNoteTypeVectors
+
+if TYPE_CHECKING:
+    from models.models import Flashcard
+
+# The orders of the card, read by the shuffle_variants scripts.
+SHUFFLE_TEMPLATE = '<script type="application/json" id="shuffle">{{Shuffle}}</script>'
+
+
+def shuffle_template(template: str, side: str) -> str:
+    """Add the orders of the card and the script showing one of them to a template."""
+    return template.replace(
+        '<div class="card">',
+        "\n".join(
+            [
+                SHUFFLE_TEMPLATE,
+                get_script(f'm.showVariant("{side}")'),
+                '<div class="card">',
+            ]
+        ),
+        1,
+    )
+
+
+class BuildShuffleNoteType(BaseNoteType):
+    """
+    Mixin for note types which show the table in one of a few orders computed at build time.
+
+    The Shuffle field holds the orders as JSON, see builder.get_shuffle_variants. The shared
+    script picks one on the question and shows the same one on the answer, and both move each row
+    (and the cells of each row) once: no random numbers are generated and the table is not
+    rebuilt. The same note type serves shuffled rows, columns or both, since the orders only
+    list the shuffled vectors.
+    """
+
+    build_shuffle_model_id: int
+    build_shuffle_name: str
+    shared_script = True
+
+    def __init__(self):
+        super().__init__()
+        self.model_id = self.build_shuffle_model_id
+        self.name = self.build_shuffle_name
+        self.fields = self.fields + [{"name": "Shuffle"}]
+        self.templates = [
+            {
+                **template,
+                "qfmt": shuffle_template(template["qfmt"], "question"),
+                "afmt": shuffle_template(template["afmt"], "answer"),
+            }
+            for template in self.templates
+        ]
+
+    def fields_for(self, card: "Flashcard") -> List[str]:
+        return super().fields_for(card) + [card.shuffle]
+
+
+class TableNoteTypeBuildShuffled(BuildShuffleNoteType, TableNoteType):
+    # Ensure the model IDs are unique.
+    build_shuffle_model_id = 1760781609
+    build_shuffle_name = "ts_table_build_shuffled"
+
+
+class TableNoteTypeBuildShuffledSplit(BuildShuffleNoteType, TableNoteTypeSplit):
+    build_shuffle_model_id = 1760781610
+    build_shuffle_name = "ts_table_build_shuffled_split"
+
+
+class TableNoteTypeBuildShuffledVectors(BuildShuffleNoteType, TableNoteTypeVectors):
+    build_shuffle_model_id = 1760781611
+    build_shuffle_name = "ts_table_build_shuffled_vectors"
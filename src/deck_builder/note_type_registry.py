@@ -0,0 +1,76 @@
+from typing import Dict, Tuple, Type
+from deck_builder.note_type_base import BaseNoteType, get_instance
+from deck_builder.note_type_build_shuffle import (
+    TableNoteTypeBuildShuffled,
+    TableNoteTypeBuildShuffledSplit,
+    TableNoteTypeBuildShuffledVectors,
+)
+from deck_builder.note_type_table import TableNoteType
+from deck_builder.note_type_table_shuffled_cols import TableNoteTypeShuffledCols
+from deck_builder.note_type_table_shuffled_rows import TableNoteTypeShuffledRows
+from deck_builder.note_type_table_shuffled_vectors import TableNoteTypeShuffledVectors
+from deck_builder.note_type_split import (
+    TableNoteTypeShuffledColsSplit,
+    TableNoteTypeShuffledRowsSplit,
+    TableNoteTypeShuffledVectorsSplit,
+    TableNoteTypeSplit,
+)
+from deck_builder.note_type_vectors import (
+    TableNoteTypeShuffledColsVectors,
+    TableNoteTypeShuffledRowsVectors,
+    TableNoteTypeShuffledVectorsVectors,
+    TableNoteTypeVectors,
+)
+
+# Note type classes by layout and (shuffle_rows, shuffle_cols).
+# - inline: the header and hints are part of the front and back fields.
+# - split: the header and hints are stored in their own fields.
+# - note_per_table: a note stores a table once, with one card per masked row or column.
+NOTE_TYPES: Dict[str, Dict[Tuple[bool, bool], Type[BaseNoteType]]] = {
+    "inline": {
+        (False, False): TableNoteType,
+        (True, False): TableNoteTypeShuffledRows,
+        (False, True): TableNoteTypeShuffledCols,
+        (True, True): TableNoteTypeShuffledVectors,
+    },
+    "split": {
+        (False, False): TableNoteTypeSplit,
+        (True, False): TableNoteTypeShuffledRowsSplit,
+        (False, True): TableNoteTypeShuffledColsSplit,
+        (True, True): TableNoteTypeShuffledVectorsSplit,
+    },
+    "note_per_table": {
+        (False, False): TableNoteTypeVectors,
+        (True, False): TableNoteTypeShuffledRowsVectors,
+        (False, True): TableNoteTypeShuffledColsVectors,
+        (True, True): TableNoteTypeShuffledVectorsVectors,
+    },
+}
+
+LAYOUTS = list(NOTE_TYPES)
+
+# Note type classes by layout for the notes whose rows or columns are shuffled at build time.
+# - review: a script shuffles the table every time a card is shown.
+# - build: a few orders are computed at build time, and a card is shown in one of them.
+BUILD_SHUFFLED_NOTE_TYPES: Dict[str, Type[BaseNoteType]] = {
+    "inline": TableNoteTypeBuildShuffled,
+    "split": TableNoteTypeBuildShuffledSplit,
+    "note_per_table": TableNoteTypeBuildShuffledVectors,
+}
+
+SHUFFLE_MODES = ["review", "build"]
+
+
+def get_note_type(
+    shuffle_rows: bool,
+    shuffle_cols: bool,
+    layout: str = "inline",
+    shuffle_mode: str = "review",
+) -> BaseNoteType:
+    """
+    Return the shared note type for the given shuffle options, layout and shuffle mode.
+    The note type and its genanki model are created once per run.
+    """
+    if shuffle_mode == "build" and (shuffle_rows or shuffle_cols):
+        return get_instance(BUILD_SHUFFLED_NOTE_TYPES[layout])
+    return get_instance(NOTE_TYPES[layout][(bool(shuffle_rows), bool(shuffle_cols))])
@@ -0,0 +1,74 @@
+from typing import TYPE_CHECKING, List
+from deck_builder.note_type_base import BaseNoteType
+from deck_builder.note_type_table import TableNoteType
+from deck_builder.note_type_table_shuffled_cols import TableNoteTypeShuffledCols
+from deck_builder.note_type_table_shuffled_rows import TableNoteTypeShuffledRows
+from deck_builder.note_type_table_shuffled_vectors import TableNoteTypeShuffledVectors
+
+if TYPE_CHECKING:
+    from models.models import Flashcard
+
+# Renders the same HTML as styler.add_card_header and styler.add_hints.
+HEADER_TEMPLATE = '<span class="card_header">{{Header}}</span>'
+HINTS_TEMPLATE = '<div class="hints">\n{{Hints}}\n</div>'
+
+
+def split_template(template: str, field: str) -> str:
+    """Render the header and hints fields around a content field of a template."""
+    return template.replace(
+        "{{" + field + "}}",
+        "\n".join([HEADER_TEMPLATE, "{{" + field + "}}", HINTS_TEMPLATE]),
+    )
+
+
+class SplitFieldsNoteType(BaseNoteType):
+    """
+    Mixin for note types which store the header and the hints of a card in their own fields.
+
+    The front and back fields only hold the table, and the templates render the header and
+    hints around them, so each note stores them once instead of in both its front and back.
+    The cards look the same as with the base note type.
+    """
+
+    split_model_id: int
+    split_name: str
+
+    def __init__(self):
+        super().__init__()
+        self.model_id = self.split_model_id
+        self.name = self.split_name
+        self.fields = self.fields + [{"name": "Header"}, {"name": "Hints"}]
+        self.templates = [
+            {
+                **template,
+                "qfmt": split_template(template["qfmt"], "Front"),
+                "afmt": split_template(template["afmt"], "Back"),
+            }
+            for template in self.templates
+        ]
+
+    def fields_for(self, card: "Flashcard") -> List[str]:
+        return [card.front, card.back, card.header, "\n".join(card.hints)]
+
+
+class TableNoteTypeSplit(SplitFieldsNoteType, TableNoteType):
+    # Ensure the model IDs are unique.
+    split_model_id = 1760781601
+    split_name = "ts_table_split"
+
+
+class TableNoteTypeShuffledRowsSplit(SplitFieldsNoteType, TableNoteTypeShuffledRows):
+    split_model_id = 1760781602
+    split_name = "ts_table_shuffled_rows_split"
+
+
+class TableNoteTypeShuffledColsSplit(SplitFieldsNoteType, TableNoteTypeShuffledCols):
+    split_model_id = 1760781603
+    split_name = "ts_table_shuffled_cols_split"
+
+
+class TableNoteTypeShuffledVectorsSplit(
+    SplitFieldsNoteType, TableNoteTypeShuffledVectors
+):
+    split_model_id = 1760781604
+    split_name = "ts_table_shuffled_vectors_split"
@@ -1,12 +1,4 @@
-from pathlib import Path
-from deck_builder.note_type_base import BaseNoteType
-
-current_dir = Path(__file__).parent
-
-# Additional CSS specific to this note type.
-ADDITIONAL_CSS = ""
-with open(current_dir / "note_type_table.css", "r") as f:
-    ADDITIONAL_CSS = f.read()
+from deck_builder.note_type_base import BaseNoteType, load_asset
 
 
 class TableNoteType(BaseNoteType):
@@ -52,5 +44,5 @@ class TableNoteType(BaseNoteType):
             name="ts_table",
             fields=fields,
             templates=templates,
-            css=ADDITIONAL_CSS,
+            css=load_asset("note_type_table.css"),
         )
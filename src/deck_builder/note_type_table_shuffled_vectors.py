@@ -1,23 +1,5 @@
-from pathlib import Path
-from deck_builder.note_type_base import BaseNoteType
-
-
-current_dir = Path(__file__).parent
-
-# Additional CSS specific to this note type.
-ADDITIONAL_CSS = ""
-with open(current_dir / "note_type_table.css", "r") as f:
-    ADDITIONAL_CSS = f.read()
-
-# JavaScript to shuffle the rows and columns in the question
-SHUFFLE_JS_QUESTION = ""
-with open(current_dir / "shuffle_vectors_question.js", "r") as f:
-    SHUFFLE_JS_QUESTION = f.read()
-
-# JavaScript to shuffle the rows and columns in the answer
-SHUFFLE_JS_ANSWER = ""
-with open(current_dir / "shuffle_vectors_answer.js", "r") as f:
-    SHUFFLE_JS_ANSWER = f.read()
+from deck_builder.assets import get_script
+from deck_builder.note_type_base import BaseNoteType, load_asset
 
 
 class TableNoteTypeShuffledVectors(BaseNoteType):
@@ -28,6 +10,8 @@ class TableNoteTypeShuffledVectors(BaseNoteType):
     - Back: rendered as HTML.
     """
 
+    shared_script = True
+
     def __init__(self):
         fields = [{"name": "Front"}, {"name": "Back"}]
         templates = [
@@ -35,9 +19,7 @@ class TableNoteTypeShuffledVectors(BaseNoteType):
                 "name": "ts_table",
                 "qfmt": "\n".join(
                     [
-                        "<script>",
-                        SHUFFLE_JS_QUESTION,
-                        "</script>",
+                        get_script('m.shuffleTable("question", true, true)'),
                         '<div class="card">',
                         '<div class="card-content">',
                         "",
@@ -49,9 +31,7 @@ class TableNoteTypeShuffledVectors(BaseNoteType):
                 ),
                 "afmt": "\n".join(
                     [
-                        "<script>",
-                        SHUFFLE_JS_ANSWER,
-                        "</script>",
+                        get_script('m.shuffleTable("answer", true, true)'),
                         '<div class="card">',
                         '<div class="card-content">',
                         "",
@@ -69,5 +49,5 @@ class TableNoteTypeShuffledVectors(BaseNoteType):
             name="ts_table_shuffled_vectors",
             fields=fields,
             templates=templates,
-            css=ADDITIONAL_CSS,
+            css=load_asset("note_type_table.css"),
         )
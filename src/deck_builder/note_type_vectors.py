@@ -0,0 +1,111 @@
+from typing import TYPE_CHECKING, List
+from deck_builder.note_type_base import BaseNoteType
+from deck_builder.note_type_split import HEADER_TEMPLATE, HINTS_TEMPLATE
+from deck_builder.note_type_table import TableNoteType
+from deck_builder.note_type_table_shuffled_cols import TableNoteTypeShuffledCols
+from deck_builder.note_type_table_shuffled_rows import TableNoteTypeShuffledRows
+from deck_builder.note_type_table_shuffled_vectors import TableNoteTypeShuffledVectors
+
+if TYPE_CHECKING:
+    import genanki
+    from models.models import Flashcard
+
+# Number of card templates, and so of vectors a note can mask. Larger tables take several notes.
+MAX_VECTORS = 64
+
+# The cells of the vector named by the field of the card, rendered by styler.render_vector_table,
+# look like styler.get_masked on the question and styler.get_unmasked on the answer.
+QUESTION_STYLE = (
+    "<style>td.{{%s}} > .cell "
+    '{ font-family: "Inconsolata", monospace; visibility: hidden; }</style>'
+)
+ANSWER_STYLE = (
+    '<style>td.{{%s}} > .cell { font-family: "Inconsolata", monospace; }</style>'
+)
+
+
+def get_vector_field(idx: int) -> str:
+    return f"V{idx + 1}"
+
+
+class VectorCardsNoteType(BaseNoteType):
+    """
+    Mixin for note types which store a table once per note and make one card per masked vector.
+
+    The Table field holds the table rendered by styler.render_vector_table. The card template i
+    only makes a card if the field V<i> is not empty: it names the row or column to mask, which
+    the template hides with CSS. The header and hints have their own fields, as with the split
+    layout. The cards look the same as with the base note type.
+    """
+
+    vectors_model_id: int
+    vectors_name: str
+    one_note_per_table = True
+
+    def __init__(self):
+        super().__init__()
+        self.model_id = self.vectors_model_id
+        self.name = self.vectors_name
+        vector_fields = [get_vector_field(idx) for idx in range(MAX_VECTORS)]
+        self.fields = [{"name": "Table"}, {"name": "Header"}, {"name": "Hints"}] + [
+            {"name": field} for field in vector_fields
+        ]
+        content = "\n".join([HEADER_TEMPLATE, "{{Table}}", HINTS_TEMPLATE])
+        (template,) = self.templates
+        self.templates = [
+            {
+                **template,
+                "name": f"{template['name']}_{field}",
+                "qfmt": "\n".join(
+                    [
+                        "{{#%s}}" % field,
+                        QUESTION_STYLE % field,
+                        template["qfmt"].replace("{{Front}}", content),
+                        "{{/%s}}" % field,
+                    ]
+                ),
+                "afmt": "\n".join(
+                    [
+                        ANSWER_STYLE % field,
+                        template["afmt"].replace("{{Back}}", content),
+                    ]
+                ),
+            }
+            for field in vector_fields
+        ]
+
+    def create_model(self) -> "genanki.Model":
+        model = self._model
+        if model is None:
+            model = super().create_model()
+            # Each card only requires its vector field. Set here, as genanki would render every
+            # template once per field to find it out.
+            model._req = [[idx, "all", [3 + idx]] for idx in range(MAX_VECTORS)]
+        return model
+
+    def fields_for(self, card: "Flashcard") -> List[str]:
+        vectors = card.vectors + [""] * (MAX_VECTORS - len(card.vectors))
+        return [card.front, card.header, "\n".join(card.hints), *vectors]
+
+
+class TableNoteTypeVectors(VectorCardsNoteType, TableNoteType):
+    # Ensure the model IDs are unique.
+    vectors_model_id = 1760781605
+    vectors_name = "ts_table_vectors"
+
+
+class TableNoteTypeShuffledRowsVectors(VectorCardsNoteType, TableNoteTypeShuffledRows):
+    vectors_model_id = 1760781606
+    vectors_name = "ts_table_shuffled_rows_vectors"
+
+
+class TableNoteTypeShuffledColsVectors(VectorCardsNoteType, TableNoteTypeShuffledCols):
+    vectors_model_id = 1760781607
+    vectors_name = "ts_table_shuffled_cols_vectors"
+
+
+class TableNoteTypeShuffledVectorsVectors(
+    VectorCardsNoteType, TableNoteTypeShuffledVectors
+):
+    vectors_model_id = 1760781608
+    vectors_name = "ts_table_shuffled_vectors_vectors"
@@ -0,0 +1,338 @@
+import genanki
+import hashlib
+import itertools
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import zipfile
+from dataclasses import dataclass, field
+from genanki.apkg_col import APKG_COL
+from genanki.apkg_schema import APKG_SCHEMA
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+from profiling import profiler
+
+DEFAULT_DECK_ID = "1"
+# The zip comment of a package holds this prefix and the fingerprint of its content.
+FINGERPRINT_PREFIX = b"my_ankigen:"
+# Bumped when the way packages are written changes, so existing packages are written again.
+FORMAT_VERSION = 2
+# Date of every zip entry, the earliest a zip file can hold, so the bytes only depend on the content.
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+@dataclass(slots=True, kw_only=True)
+class PackageReport:
+    """The GUIDs of the notes added, changed and removed by an update of a package."""
+
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    # True if the package had the same content already and was not written.
+    unchanged: bool = False
+
+    def __str__(self) -> str:
+        return f"{len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed"
+
+
+@dataclass(slots=True)
+class _ExistingNote:
+    note_id: int
+    model_id: int
+    deck_id: int
+    digest: bytes
+    # Ordinals of the cards of the note, i.e. of the templates it has a card for.
+    ords: Set[int]
+    seen: bool = False
+
+
+def _digest(fields: str) -> bytes:
+    return hashlib.sha1(fields.encode("utf-8")).digest()
+
+
+def read_fingerprint(filename: str) -> Optional[bytes]:
+    """Return the zip comment of an existing package, or None if it cannot be read."""
+    try:
+        with zipfile.ZipFile(filename) as inzip:
+            return inzip.comment
+    except (OSError, zipfile.BadZipFile):
+        return None
+
+
+class PackageWriter:
+    """
+    Write an APKG file note by note.
+
+    Notes are inserted into the collection database as soon as they are added, so
+    their fields do not have to stay in memory. Only the decks and models (a few
+    bytes each) are kept until the package is closed, when they are written to the
+    collection and the database is zipped into the output file.
+
+    With update=True, the collection of the existing output file is reused: notes are matched
+    by GUID and only the notes that were added, changed or removed are written. The changes
+    are listed in the report.
+
+    Media files are given by name and path. They are streamed into the package when it is
+    closed, so the mapping can still be filled while notes are added.
+
+    The zip entries have a fixed date and order, and are stored, or deflated with the given
+    compress_level. For a given timestamp, the output only depends on the notes. A fingerprint of
+    the notes, models and media is kept in the zip comment: if the existing output file has the
+    same fingerprint, it is left untouched. The timestamp defaults to the current time, since Anki
+    only updates notes whose modification time is newer than its own copy.
+
+    Use as a context manager: if an exception is raised, no output file is written.
+    """
+
+    def __init__(
+        self,
+        output_filename: str,
+        timestamp: Optional[float] = None,
+        update: bool = False,
+        media_files: Optional[Mapping[str, str]] = None,
+        compress_level: Optional[int] = None,
+    ):
+        if compress_level is not None and not 0 <= compress_level <= 9:
+            raise ValueError(
+                f"Invalid compression level {compress_level}, expected 0-9."
+            )
+        self.output_filename = output_filename
+        self.media_files = {} if media_files is None else media_files
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.compress_level = compress_level
+        self.fingerprint = hashlib.sha256(f"{FORMAT_VERSION}:{compress_level}".encode())
+        self.decks: Dict[str, genanki.Deck] = {}
+        # Models by ID, with the ID of the last deck that used them.
+        self.models: Dict[int, Tuple[genanki.Model, int]] = {}
+        self.num_notes = 0
+        self.report = PackageReport()
+        self.existing_notes: Dict[str, _ExistingNote] = {}
+
+        fd, self.db_filename = tempfile.mkstemp(suffix=".anki2")
+        os.close(fd)
+        if update and self._extract_collection():
+            self.conn = sqlite3.connect(self.db_filename)
+            self.cursor = self.conn.cursor()
+            self._load_existing_notes()
+        else:
+            self.conn = sqlite3.connect(self.db_filename)
+            self.cursor = self.conn.cursor()
+            self.cursor.executescript(APKG_SCHEMA)
+            self.cursor.executescript(APKG_COL)
+
+        (max_id,) = self.cursor.execute(
+            "SELECT MAX(id) FROM (SELECT id FROM notes UNION ALL SELECT id FROM cards)"
+        ).fetchone()
+        self.id_gen = itertools.count(
+            max(int(self.timestamp * 1000), (max_id or 0) + 1)
+        )
+
+    def _extract_collection(self) -> bool:
+        """Copy the collection of the existing output file. Returns False if there is none."""
+        try:
+            with zipfile.ZipFile(self.output_filename) as inzip:
+                with inzip.open("collection.anki2") as src, open(
+                    self.db_filename, "wb"
+                ) as dst:
+                    shutil.copyfileobj(src, dst)
+        except FileNotFoundError:
+            return False
+        except (OSError, KeyError, zipfile.BadZipFile) as e:
+            logging.warning(
+                f"Cannot update '{self.output_filename}' ({e}). Building a new package."
+            )
+            return False
+        return True
+
+    def _load_existing_notes(self) -> None:
+        rows = self.cursor.execute(
+            "SELECT notes.id, guid, mid, MIN(cards.did), GROUP_CONCAT(cards.ord), flds "
+            "FROM notes LEFT JOIN cards ON cards.nid = notes.id GROUP BY notes.id"
+        )
+        for note_id, guid, model_id, deck_id, ords, fields in rows:
+            self.existing_notes[guid] = _ExistingNote(
+                note_id,
+                model_id,
+                deck_id,
+                _digest(fields),
+                {int(ord) for ord in ords.split(",")} if ords else set(),
+            )
+
+    def get_deck(self, deck_name: str) -> genanki.Deck:
+        """Return the deck with the given name, creating it on first use."""
+        deck = self.decks.get(deck_name)
+        if deck is None:
+            deck = genanki.Deck(generate_deck_id(deck_name), deck_name)
+            self.decks[deck_name] = deck
+        return deck
+
+    def add_note(self, deck_name: str, note: genanki.Note) -> None:
+        """Write a note to the deck with the given name."""
+        deck = self.get_deck(deck_name)
+        self.models[note.model.model_id] = (note.model, deck.deck_id)
+        self.num_notes += 1
+        fields = "\x1f".join(note.fields)
+        self.fingerprint.update(
+            f"{deck_name}\x1e{note.guid}\x1e{note.model.model_id}\x1e{fields}\x1e".encode()
+        )
+
+        existing = self.existing_notes.get(note.guid)
+        if existing is None:
+            note.write_to_db(self.cursor, self.timestamp, deck.deck_id, self.id_gen)
+            self.report.added.append(note.guid)
+            return
+
+        existing.seen = True
+        if (
+            existing.model_id == note.model.model_id
+            and existing.deck_id == deck.deck_id
+            and existing.digest == _digest(fields)
+        ):
+            return
+
+        self.report.changed.append(note.guid)
+        if existing.model_id != note.model.model_id:
+            # The cards depend on the templates of the model, so the note is written again.
+            self._delete_note(existing.note_id)
+            note.write_to_db(self.cursor, self.timestamp, deck.deck_id, self.id_gen)
+            return
+        self.cursor.execute(
+            "UPDATE notes SET mod = ?, usn = -1, flds = ?, sfld = ? WHERE id = ?",
+            (int(self.timestamp), fields, note.sort_field, existing.note_id),
+        )
+        self.cursor.execute(
+            "UPDATE cards SET did = ?, mod = ?, usn = -1 WHERE nid = ?",
+            (deck.deck_id, int(self.timestamp), existing.note_id),
+        )
+        # The fields decide which templates have a card, e.g. one per vector of a table.
+        cards = {card.ord: card for card in note.cards}
+        for ord in existing.ords - cards.keys():
+            self.cursor.execute(
+                "DELETE FROM cards WHERE nid = ? AND ord = ?", (existing.note_id, ord)
+            )
+        for ord in sorted(cards.keys() - existing.ords):
+            cards[ord].write_to_db(
+                self.cursor,
+                self.timestamp,
+                deck.deck_id,
+                existing.note_id,
+                self.id_gen,
+                note.due,
+            )
+
+    def _delete_note(self, note_id: int) -> None:
+        self.cursor.execute("DELETE FROM cards WHERE nid = ?", (note_id,))
+        self.cursor.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+
+    def _remove_unseen_notes(self) -> None:
+        """Delete the notes of the previous package which were not added again."""
+        for guid, existing in self.existing_notes.items():
+            if not existing.seen:
+                self._delete_note(existing.note_id)
+                self.report.removed.append(guid)
+
+    def _write_decks_and_models(self) -> None:
+        # Decks and models of a previous package are replaced, only the default deck is kept.
+        (decks_json,) = self.cursor.execute("SELECT decks FROM col").fetchone()
+        default_deck = json.loads(decks_json).get(DEFAULT_DECK_ID)
+        decks = {DEFAULT_DECK_ID: default_deck} if default_deck else {}
+        for deck in self.decks.values():
+            decks[str(deck.deck_id)] = deck.to_json()
+        self.cursor.execute("UPDATE col SET decks = ?", (json.dumps(decks),))
+
+        models = {}
+        for model_id, (model, deck_id) in self.models.items():
+            models[str(model_id)] = model.to_json(self.timestamp, deck_id)
+            # The templates and styling can change without a new model ID.
+            self.fingerprint.update(
+                json.dumps({**models[str(model_id)], "mod": 0}).encode()
+            )
+        self.cursor.execute("UPDATE col SET models = ?", (json.dumps(models),))
+
+    def close(self) -> None:
+        """Finish the collection and write the output file."""
+        with profiler.stage("write_package"):
+            self._close()
+
+    def _write_file(self, outzip: zipfile.ZipFile, path: str, name: str) -> None:
+        # Opened by name, the entry gets the date of ZipInfo (ZIP_DATE_TIME) and the compression
+        # of the zip file. The size is unknown to zipfile, so it is told whether ZIP64 is needed.
+        size = os.path.getsize(path)
+        with open(path, "rb") as src, outzip.open(
+            name, "w", force_zip64=size * 1.05 > zipfile.ZIP64_LIMIT
+        ) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+
+    def _close(self) -> None:
+        self._remove_unseen_notes()
+        self._write_decks_and_models()
+        self.conn.commit()
+        self.conn.close()
+
+        media_names = sorted(self.media_files)
+        for name in media_names:
+            stat = os.stat(self.media_files[name])
+            self.fingerprint.update(
+                f"{name}\x1e{stat.st_size}\x1e{stat.st_mtime_ns}\x1e".encode()
+            )
+        fingerprint = FINGERPRINT_PREFIX + self.fingerprint.hexdigest().encode()
+        if read_fingerprint(self.output_filename) == fingerprint:
+            self.report.unchanged = True
+            os.remove(self.db_filename)
+            return
+
+        # Write next to the output and rename, so a failed build keeps the previous package.
+        output_dir = os.path.dirname(os.path.abspath(self.output_filename))
+        fd, tmp_filename = tempfile.mkstemp(dir=output_dir, suffix=".apkg.tmp")
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(
+                tmp_filename,
+                "w",
+                compression=(
+                    zipfile.ZIP_STORED
+                    if self.compress_level is None
+                    else zipfile.ZIP_DEFLATED
+                ),
+                compresslevel=self.compress_level,
+            ) as outzip:
+                outzip.comment = fingerprint
+                self._write_file(outzip, self.db_filename, "collection.anki2")
+                # Media entries are named by index, the media file maps them to file names.
+                media = {}
+                for idx, name in enumerate(media_names):
+                    self._write_file(outzip, self.media_files[name], str(idx))
+                    media[str(idx)] = name
+                data = json.dumps(media).encode("utf-8")
+                info = zipfile.ZipInfo("media", ZIP_DATE_TIME)
+                info.compress_type = outzip.compression
+                outzip.writestr(info, data, compresslevel=self.compress_level)
+            os.replace(tmp_filename, self.output_filename)
+        finally:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+            os.remove(self.db_filename)
+
+    def discard(self) -> None:
+        """Drop the collection without writing the output file."""
+        self.conn.close()
+        os.remove(self.db_filename)
+
+    def __enter__(self) -> "PackageWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def generate_deck_id(name: str) -> int:
+    """
+    Generate a unique integer ID based on the provided name.
+    """
+    return int(hashlib.md5(name.encode("utf-8")).hexdigest()[:8], 16)
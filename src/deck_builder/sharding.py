@@ -0,0 +1,265 @@
+import hashlib
+import itertools
+import json
+import logging
+import os
+import pickle
+import re
+import tempfile
+from dataclasses import asdict, dataclass, field
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Union,
+)
+from deck_builder.deck_builder import build_anki_package
+from models.models import Flashcard
+
+# Shard by top-level deck, or by a number of notes.
+ShardBy = Union[str, int]
+
+MANIFEST_VERSION = 1
+
+
+@dataclass(slots=True, kw_only=True)
+class ShardInfo:
+    """A package of a sharded build, as listed in the manifest."""
+
+    file: str
+    decks: List[str]
+    notes: int
+    media: int
+    # Digest of the flashcards of the shard: a shard is changed if its fingerprint is.
+    fingerprint: str
+    changed: bool = True
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+
+
+@dataclass(slots=True)
+class _Spool:
+    """The flashcards of a shard, pickled one after the other to a temporary file."""
+
+    path: str
+    file: IO[bytes]
+    decks: Set[str] = field(default_factory=set)
+    media: Set[str] = field(default_factory=set)
+    notes: int = 0
+    digest: Any = field(default_factory=hashlib.sha256)
+
+    def add(self, card: Flashcard) -> None:
+        data = pickle.dumps(card, protocol=pickle.HIGHEST_PROTOCOL)
+        self.file.write(data)
+        self.digest.update(data)
+        self.decks.add(card.metadata.deck)
+        self.media.update(card.media)
+        self.notes += 1
+
+
+def get_top_level_deck(deck: str) -> str:
+    return deck.split("::", 1)[0]
+
+
+def get_manifest_filename(output_filename: str) -> str:
+    return os.path.splitext(output_filename)[0] + ".manifest.json"
+
+
+def get_shard_filename(output_filename: str, shard: str, taken: Set[str]) -> str:
+    """Return the file of a shard next to the output file, e.g. my_ankigen.Networking.apkg."""
+    stem = os.path.splitext(output_filename)[0]
+    slug = re.sub(r"[^\w.-]+", "_", shard).strip("._") or "deck"
+    filename = f"{stem}.{slug}.apkg"
+    if filename in taken:
+        # Different decks with the same slug get the hash of their name.
+        digest = hashlib.md5(shard.encode("utf-8")).hexdigest()[:8]
+        filename = f"{stem}.{slug}-{digest}.apkg"
+    taken.add(filename)
+    return filename
+
+
+def read_spool(path: str) -> Iterator[Flashcard]:
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def write_shard(
+    spool_path: str,
+    parent_deck_name: str,
+    output_filename: str,
+    update: bool,
+    media_files: Dict[str, str],
+    compress_level: Optional[int] = None,
+    timestamp: Optional[float] = None,
+    assets_folder: Optional[str] = None,
+) -> Dict[str, int]:
+    """Write the package of a shard from its spooled flashcards. Runs in a worker process."""
+    report = build_anki_package(
+        read_spool(spool_path),
+        parent_deck_name,
+        output_filename,
+        update=update,
+        media_files=media_files,
+        compress_level=compress_level,
+        timestamp=timestamp,
+        assets_folder=assets_folder,
+    )
+    return {
+        "added": len(report.added),
+        "updated": len(report.changed),
+        "removed": len(report.removed),
+    }
+
+
+def load_manifest(manifest_filename: str) -> Dict[str, dict]:
+    """Return the shards of a previous build by file, or nothing if there is no manifest."""
+    try:
+        with open(manifest_filename, "r") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable manifest '{manifest_filename}': {e}")
+        return {}
+    return {shard["file"]: shard for shard in manifest.get("shards", [])}
+
+
+def build_sharded_packages(
+    flashcards: Iterable[Flashcard],
+    parent_deck_name: str,
+    output_filename: str,
+    shard_by: ShardBy = "deck",
+    workers: int = 1,
+    update: bool = False,
+    media_files: Optional[Mapping[str, str]] = None,
+    compress_level: Optional[int] = None,
+    timestamp: Optional[float] = None,
+    assets_folder: Optional[str] = None,
+) -> List[ShardInfo]:
+    """
+    Build one APKG file per top-level deck (shard_by="deck") or per shard_by notes, next to the
+    output file, and a manifest listing them.
+
+    The flashcards are streamed to a temporary spool file per shard, so they are not kept in
+    memory. Shards of a number of notes are written as soon as they are full, shards of a deck
+    once all flashcards have been seen. With more than one worker, the packages are written in
+    parallel worker processes.
+
+    A shard is marked as changed in the manifest if its flashcards differ from the previous build,
+    so only the changed packages have to be imported again. Packages of shards which no longer
+    exist are deleted. The packages are written like build_anki_package does with
+    compress_level, timestamp and assets_folder.
+    """
+    if shard_by != "deck" and (not isinstance(shard_by, int) or shard_by < 1):
+        raise ValueError(f"Invalid shard option '{shard_by}'.")
+    media_files = {} if media_files is None else media_files
+    manifest_filename = get_manifest_filename(output_filename)
+    previous = load_manifest(manifest_filename)
+
+    executor = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    shards: List[ShardInfo] = []
+    results = []
+    taken: Set[str] = set()
+    with tempfile.TemporaryDirectory(prefix="my_ankigen_shards_") as spool_dir:
+        spools: Dict[str, _Spool] = {}
+        spool_ids = itertools.count()
+
+        def submit(name: str) -> None:
+            spool = spools.pop(name)
+            spool.file.close()
+            shard = ShardInfo(
+                file=get_shard_filename(output_filename, name, taken),
+                decks=sorted(spool.decks),
+                notes=spool.notes,
+                media=len(spool.media),
+                fingerprint=spool.digest.hexdigest(),
+            )
+            old = previous.get(os.path.basename(shard.file))
+            shard.changed = old is None or old.get("fingerprint") != shard.fingerprint
+            args = (
+                spool.path,
+                parent_deck_name,
+                shard.file,
+                update,
+                {media_name: media_files[media_name] for media_name in spool.media},
+                compress_level,
+                timestamp,
+                assets_folder,
+            )
+            shards.append(shard)
+            if executor is None:
+                results.append(write_shard(*args))
+            else:
+                results.append(executor.submit(write_shard, *args))
+
+        try:
+            num_notes = 0
+            for card in flashcards:
+                if shard_by == "deck":
+                    name = get_top_level_deck(card.metadata.deck)
+                else:
+                    name = f"{num_notes // shard_by:03d}"
+                spool = spools.get(name)
+                if spool is None:
+                    path = os.path.join(spool_dir, f"{next(spool_ids)}.pickle")
+                    spool = _Spool(path, open(path, "wb"))
+                    spools[name] = spool
+                spool.add(card)
+                num_notes += 1
+                if shard_by != "deck" and spool.notes == shard_by:
+                    submit(name)
+            for name in sorted(spools):
+                submit(name)
+            if not shards:
+                raise ValueError("No decks to build from the provided flashcards.")
+
+            for shard, result in zip(shards, results):
+                if executor is not None:
+                    result = result.result()
+                shard.added = result["added"]
+                shard.updated = result["updated"]
+                shard.removed = result["removed"]
+        finally:
+            for spool in spools.values():
+                spool.file.close()
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    output_dir = os.path.dirname(os.path.abspath(output_filename))
+    written = {os.path.basename(shard.file) for shard in shards}
+    for file in previous:
+        if file not in written:
+            path = os.path.join(output_dir, file)
+            if os.path.exists(path):
+                os.remove(path)
+                logging.info(f"Removed package of a deleted shard: {path}")
+
+    for shard in shards:
+        shard.file = os.path.basename(shard.file)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "parent_deck": parent_deck_name,
+        "shard_by": shard_by,
+        "shards": [asdict(shard) for shard in shards],
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_filename)
+    return shards
@@ -1,139 +1,544 @@
 import os
+import argparse
 import logging
-import frontmatter
-from pathlib import Path
-from typing import List
-import dotenv
-from models.models import Flashcard, NoteMetadata
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import (
+    TYPE_CHECKING,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from cache.build_cache import BuildCache
+from models.models import Flashcard
 from note_processor import processor
-from deck_builder import deck_builder
-from note_processor.abstracts_factory import get_masker, get_parser
+from deck_builder import deck_builder, sharding
+from profiling import profiler
+from vault.index import VaultIndex
+from vault.media_library import MediaLibrary
+from vault.note_loader import NoteLoader
+from vault.scanner import IgnoreRules, scan_markdown_files
+from vault.watcher import VaultWatcher
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
 
 logging.basicConfig(level=logging.DEBUG)
 
+# File of the build cache folder in which the digests of the media files are kept.
+MEDIA_DIGEST_FILE = "media.json"
+# File of the build cache folder in which the vault index is kept.
+VAULT_INDEX_FILE = "vault.sqlite"
+# Folder of the cache holding the script shared by the note types, named by its content hash.
+ASSETS_DIR = "assets"
+
 
-def get_markdown_files(root_folder: str) -> List[str]:
-    """Recursively yield paths to markdown files in the given folder."""
-    md_files: List[str] = []
-    for root, _, files in os.walk(root_folder):
-        for file in files:
-            if file.endswith(".md"):
-                md_files.append(os.path.join(root, file))
-    if not md_files:
+def get_markdown_files(
+    root_folder: str, rules: Optional[IgnoreRules] = None
+) -> Iterator[str]:
+    """
+    Recursively yield paths to markdown files in the given folder, skipping hidden folders and
+    the paths ignored by the rules.
+    """
+    found = False
+    for md_file in scan_markdown_files(root_folder, rules):
+        found = True
+        yield md_file
+    if not found:
         logging.warning(f"No markdown files found in folder: {root_folder}")
-    return md_files
 
 
-def generate_flashcards(flashcards_folder: str) -> List[Flashcard]:
-    """Process markdown files in the specified flashcards folder and generate flashcards from their metadata and content."""
-    flashcards: List[Flashcard] = []
-    for md_file in get_markdown_files(flashcards_folder):
-        with open(md_file, "r") as f:
-            fmatter = frontmatter.load(f)
+# A pending note: its file, its cache key and its flashcards or the future computing them.
+PendingNote = Tuple[str, Optional[str], Union[List[Flashcard], Future]]
 
-        note_metadata = fmatter.metadata
-        content: str = fmatter.content
 
-        name = Path(md_file).stem
+def collect_flashcards(
+    pending_note: PendingNote, cache: Optional[BuildCache]
+) -> Tuple[str, List[Flashcard]]:
+    """Wait for the flashcards of a pending note and record them in the build cache."""
+    md_file, key, cards = pending_note
+    if isinstance(cards, Future):
+        cards, records, timings = cards.result()
+        for record in records:
+            logging.getLogger(record.name).handle(record)
+        profiler.get_profiler().merge(timings, md_file)
+        if cache is not None:
+            with profiler.file(md_file), profiler.stage("cache"):
+                cache.store(key, cards, records)
+    if cache is not None and key is not None:
+        cache.record(md_file, key)
+    return md_file, cards
 
-        id = note_metadata.get("id")
-        if not isinstance(id, str):
-            logging.warning(
-                f"File '{md_file}' must have a 'id' field of type str. Skipping file."
-            )
-            continue
 
-        deck = note_metadata.get("deck")
-        if not isinstance(deck, str):
-            logging.warning(
-                f"File '{md_file}' must have a 'deck' field of type str. Skipping file."
-            )
-            continue
+def create_executor(workers: int) -> Optional["ProcessPoolExecutor"]:
+    """Return a pool of worker processes for processing notes, or None for a single worker."""
+    if workers <= 1:
+        return None
+    from concurrent.futures import ProcessPoolExecutor
 
-        parser_type = note_metadata.get("parser")
-        parser = get_parser(parser_type)
-        if not parser:
-            logging.warning(
-                f"Parser '{parser_type}' in file '{md_file}' does not exist. Skipping file."
-            )
-            continue
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=processor.init_worker,
+        initargs=(logging.getLogger().level, profiler.get_profiler().enabled),
+    )
 
-        masker_type = note_metadata.get("masker")
-        masker = get_masker(masker_type)
-        if not masker:
-            logging.warning(
-                f"Masker '{masker_type}' in file '{md_file}' does not exist. Skipping file."
-            )
-            continue
 
-        mask_row_headers = note_metadata.get("mask_row_headers")
-        if (not isinstance(mask_row_headers, bool)) and mask_row_headers == None:
-            logging.warning(
-                f"'mask_rows' is specified in file '{md_file}' but '{mask_row_headers}' is not a bool. Skipping file."
-            )
-            continue
+def submit_note(
+    md_file: str,
+    loader: NoteLoader,
+    cache: Optional[BuildCache] = None,
+    executor: Optional["ProcessPoolExecutor"] = None,
+    index: Optional[VaultIndex] = None,
+) -> PendingNote:
+    """
+    Load a markdown file and start processing it, unless its flashcards are in the build cache.
+    Without an executor, the file is processed right away. Files which cannot be read are skipped.
+    If a vault index is given, the note is skipped if another file has the same id.
+    """
+    with profiler.stage("frontmatter"):
+        try:
+            note = loader.load(md_file)
+        except OSError as e:
+            # E.g. deleted since it was listed: skipped until the next build or poll.
+            logging.warning(f"Cannot read file '{md_file}': {e}. Skipping file.")
+            note = None
+    if note is None:
+        if index is not None:
+            index.forget(md_file)
+        return md_file, None, []
+    raw, note_metadata, content = note
+    if index is not None:
+        with profiler.stage("index"):
+            if not index.add_note(md_file, raw, note_metadata):
+                return md_file, None, []
 
-        mask_col_headers = note_metadata.get("mask_col_headers")
-        if (not isinstance(mask_col_headers, bool)) and mask_col_headers == None:
-            logging.warning(
-                f"'mask_cols' is specified in file '{md_file}' but '{mask_col_headers}' is not a bool. Skipping file."
-            )
-            continue
+    key = None
+    cards = None
+    if cache is not None:
+        with profiler.stage("cache"):
+            key = cache.get_key(raw, note_metadata)
+            cards = cache.load(key)
+    if cards is None:
+        if executor is None:
+            with processor.collect_warnings() as records:
+                cards = processor.process(content, note_metadata)
+            if cache is not None:
+                with profiler.stage("cache"):
+                    cache.store(key, cards, records)
+        else:
+            cards = executor.submit(processor.process_in_worker, content, note_metadata)
+    return md_file, key, cards
 
-        shuffle_rows = note_metadata.get("shuffle_rows")
-        if (not isinstance(shuffle_rows, bool)) and shuffle_rows == None:
-            logging.warning(
-                f"'shuffle_rows' is specified in file '{md_file}' but '{shuffle_rows}' is not a bool. Skipping file."
-            )
-            continue
 
-        shuffle_cols = note_metadata.get("shuffle_cols")
-        if (not isinstance(shuffle_cols, bool)) and shuffle_cols == None:
-            logging.warning(
-                f"'shuffle_cols' is specified in file '{md_file}' but '{shuffle_cols}' is not a bool. Skipping file."
-            )
-            continue
+def process_markdown_files(
+    md_files: Iterable[str],
+    cache: Optional[BuildCache] = None,
+    executor: Optional["ProcessPoolExecutor"] = None,
+    max_pending: int = 0,
+    loader: Optional[NoteLoader] = None,
+    index: Optional[VaultIndex] = None,
+) -> Iterator[Tuple[str, List[Flashcard]]]:
+    """
+    Process markdown files and yield each file with its flashcards, in the order of the files.
+    Files which are not valid flashcard notes are yielded without flashcards.
+    If a build cache is given, files whose content and options did not change are not processed again.
+    If an executor is given, notes are processed in its worker processes, with at most max_pending
+    notes in flight, so memory does not grow with the vault.
+    If a vault index is given, the notes and the GUIDs of their flashcards are recorded in it.
+    """
+    if loader is None:
+        loader = NoteLoader()
+    pending: Deque[PendingNote] = deque()
+
+    def collect() -> Tuple[str, List[Flashcard]]:
+        md_file, cards = collect_flashcards(pending.popleft(), cache)
+        if index is not None:
+            with profiler.file(md_file), profiler.stage("index"):
+                index.add_cards(md_file, cards)
+        return md_file, cards
+
+    for md_file in md_files:
+        with profiler.file(md_file):
+            pending.append(submit_note(md_file, loader, cache, executor, index))
+        while len(pending) > max_pending:
+            yield collect()
+
+    while pending:
+        yield collect()
+
+
+def attach_media(
+    md_file: str, cards: List[Flashcard], media: Optional[MediaLibrary]
+) -> List[Flashcard]:
+    """Resolve the media of the flashcards of a markdown file, if a media library is given."""
+    if media is None:
+        return cards
+    with profiler.file(md_file), profiler.stage("media_files"):
+        return list(media.attach(md_file, cards))
+
+
+def generate_flashcards(
+    flashcards_folder: str,
+    cache: Optional[BuildCache] = None,
+    workers: int = 1,
+    media: Optional[MediaLibrary] = None,
+    loader: Optional[NoteLoader] = None,
+    index: Optional[VaultIndex] = None,
+    rules: Optional[IgnoreRules] = None,
+) -> Iterator[Flashcard]:
+    """
+    Process markdown files in the specified flashcards folder and yield flashcards from their metadata and content.
+    If a build cache is given, files whose content and options did not change are not processed again.
+    With more than one worker, notes are processed in a pool of worker processes.
+    The flashcards are yielded in the same order as with a single worker.
+    If a media library is given, the media embedded in the flashcards are added to it.
+    If a vault index is given, notes whose id is already used by another file are skipped.
+    Paths ignored by the rules are not scanned.
+    """
+    executor = create_executor(workers)
+    try:
+        md_files = get_markdown_files(flashcards_folder, rules)
+        results = process_markdown_files(
+            md_files, cache, executor, 4 * workers, loader, index
+        )
+        for md_file, cards in results:
+            yield from attach_media(md_file, cards, media)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def log_flashcards(flashcards: Iterable[Flashcard]) -> Iterator[Flashcard]:
+    """Log every flashcard as it passes through."""
+    for card in flashcards:
+        logging.debug("\n" + str(card))
+        yield card
+
 
-        hints = note_metadata.get("hints")
-        if not isinstance(hints, list):
-            if isinstance(hints, str):
-                hints = [hints]
+def watch(
+    flashcards_folder: str,
+    parent_deck_name: str,
+    output_file: str,
+    cache: Optional[BuildCache] = None,
+    workers: int = 1,
+    interval: float = 1.0,
+    debounce: float = 0.5,
+    media: Optional[MediaLibrary] = None,
+    loader: Optional[NoteLoader] = None,
+    index: Optional[VaultIndex] = None,
+    rules: Optional[IgnoreRules] = None,
+    compress_level: Optional[int] = None,
+    assets_folder: Optional[str] = None,
+) -> None:
+    """
+    Keep the flashcards of every file in memory and rebuild the package whenever files change.
+    Only changed files are processed again, and the package is updated in place.
+    Runs until interrupted.
+    """
+    watcher = VaultWatcher(
+        lambda: get_markdown_files(flashcards_folder, rules), interval, debounce
+    )
+    if loader is None:
+        loader = NoteLoader()
+    flashcards: Dict[str, List[Flashcard]] = {}
+    changed, removed = watcher.poll()
+
+    executor = create_executor(workers)
+    try:
+        while True:
+            start = time.perf_counter()
+            for md_file in removed:
+                flashcards.pop(md_file, None)
+                if cache is not None:
+                    cache.forget(md_file)
+                if index is not None:
+                    index.forget(md_file)
+            md_files = changed
+            while True:
+                if index is not None:
+                    # Files skipped for the id of a removed or changed file are loaded again.
+                    md_files = md_files + [
+                        md_file
+                        for md_file in index.take_requeued()
+                        if md_file not in md_files
+                    ]
+                if not md_files:
+                    break
+                results = process_markdown_files(
+                    md_files, cache, executor, 4 * workers, loader, index
+                )
+                for md_file, cards in results:
+                    flashcards[md_file] = cards
+                md_files = []
+
+            if media is not None:
+                media.reset()
+            cards = (
+                card
+                for md_file in watcher.files
+                for card in attach_media(md_file, flashcards.get(md_file, []), media)
+            )
+            try:
+                report = deck_builder.build_anki_package(
+                    log_flashcards(cards),
+                    parent_deck_name,
+                    output_file,
+                    update=True,
+                    media_files=media.files if media is not None else None,
+                    compress_level=compress_level,
+                    assets_folder=assets_folder,
+                )
+            except ValueError as e:
+                logging.warning(f"Package not written: {e}")
             else:
-                hints = []
-
-        note_metadata = NoteMetadata(
-            id=id,
-            name=name,
-            deck=deck,
-            parser=parser,
-            masker=masker,
-            hints=hints,
-            mask_col_header=mask_col_headers,
-            mask_row_header=mask_row_headers,
-            shuffle_cols=shuffle_cols,
-            shuffle_rows=shuffle_rows,
+                state = "unchanged" if report.unchanged else "rebuilt"
+                logging.info(
+                    f"Package {state}: {output_file} in {time.perf_counter() - start:.2f} s "
+                    f"({len(changed)} changed and {len(removed)} removed files, notes: {report})"
+                )
+            if cache is not None:
+                cache.save()
+            if media is not None:
+                media.save()
+            if index is not None:
+                index.save()
+
+            changed, removed = watcher.wait_for_changes()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def shard_option(value: str) -> sharding.ShardBy:
+    """Parse the --shard option: 'deck' or a number of notes."""
+    if value == "deck":
+        return value
+    try:
+        size = int(value)
+    except ValueError:
+        size = 0
+    if size < 1:
+        raise argparse.ArgumentTypeError(
+            f"expected 'deck' or a positive number of notes, got '{value}'"
         )
-        flashcards.extend(processor.process(content, note_metadata))
+    return size
 
-    return flashcards
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generate an Anki package from the markdown notes in FLASHCARDS_FOLDER."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Process every note again instead of reusing the build cache.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes used to process notes (0 uses all cores). "
+        "Defaults to FLASHCARDS_WORKERS or 1.",
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Update the notes of the existing package instead of building it from scratch.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and update the package whenever notes change.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Seconds between two polls of the vault in watch mode.",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.5,
+        help="Seconds without changes to wait for before rebuilding in watch mode.",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="REPORT",
+        help="Write the time spent in every build stage, in total and per file, to this JSON file.",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="STATS",
+        help="Run the build under cProfile and dump the statistics to this file (readable with pstats).",
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        choices=range(10),
+        metavar="0-9",
+        help="Deflate the package with this compression level instead of storing its files "
+        "uncompressed (the fastest to write).",
+    )
+    parser.add_argument(
+        "--shard",
+        type=shard_option,
+        metavar="deck|N",
+        help="Write one package per top-level deck, or per N notes, in parallel with --workers, "
+        "and a manifest listing the packages.",
+    )
+    args = parser.parse_args()
+    if args.shard is not None and args.watch:
+        parser.error("--shard cannot be used with --watch")
+    return args
 
 
 def main():
+    args = parse_args()
+    import dotenv
+
     dotenv.load_dotenv()
     FLASHCARDS_FOLDER = os.getenv("FLASHCARDS_FOLDER")
     if not FLASHCARDS_FOLDER:
         raise ValueError(
             "FLASHCARDS_FOLDER environment variable not set. Please refer to the README on how to create your .env file"
         )
-    cards = generate_flashcards(FLASHCARDS_FOLDER)
-
-    for card in cards:
-        logging.debug("\n" + str(card))
+    CACHE_FOLDER = os.getenv("FLASHCARDS_CACHE_FOLDER", ".my_ankigen_cache")
+    workers = args.workers
+    if workers is None:
+        workers = int(os.getenv("FLASHCARDS_WORKERS", "1"))
+    if workers == 0:
+        workers = os.cpu_count() or 1
 
+    cache = None if args.no_cache else BuildCache(CACHE_FOLDER)
+    loader = NoteLoader(
+        layout=os.getenv("FLASHCARDS_LAYOUT", "inline"),
+        shuffle_mode=os.getenv("FLASHCARDS_SHUFFLE_MODE", "review"),
+        html=os.getenv("FLASHCARDS_HTML", "pretty"),
+        # Body rows and columns per window of the large tables, unless set by the notes.
+        page_rows=int(os.getenv("FLASHCARDS_PAGE_ROWS", "0")) or None,
+        page_cols=int(os.getenv("FLASHCARDS_PAGE_COLS", "0")) or None,
+    )
+    media = MediaLibrary(
+        FLASHCARDS_FOLDER,
+        None if args.no_cache else os.path.join(CACHE_FOLDER, MEDIA_DIGEST_FILE),
+    )
+    # Passed to the builds rather than set globally, so worker processes get it too.
+    assets_folder = None if args.no_cache else os.path.join(CACHE_FOLDER, ASSETS_DIR)
+    # Without the build cache, the index only lives for the build, to detect duplicate ids.
+    index = VaultIndex(
+        ":memory:" if args.no_cache else os.path.join(CACHE_FOLDER, VAULT_INDEX_FILE)
+    )
+    # Patterns of the .ankigenignore file of the vault and of FLASHCARDS_IGNORE (comma separated).
+    rules = IgnoreRules.load(
+        FLASHCARDS_FOLDER, os.getenv("FLASHCARDS_IGNORE", "").split(",")
+    )
     parent_deck_name = "my_ankigen"
     output_file = "my_ankigen.apkg"
-    deck_builder.build_anki_package(cards, parent_deck_name, output_file)
-    logging.info(f"APKG file generated: {output_file}")
+    # A fixed time for the notes makes the package byte for byte reproducible, as in
+    # https://reproducible-builds.org/specs/source-date-epoch/
+    source_date_epoch = os.getenv("SOURCE_DATE_EPOCH")
+    timestamp = float(source_date_epoch) if source_date_epoch else None
+
+    if args.watch:
+        logging.info(f"Watching {FLASHCARDS_FOLDER} for changes. Press Ctrl+C to stop.")
+        try:
+            watch(
+                FLASHCARDS_FOLDER,
+                parent_deck_name,
+                output_file,
+                cache,
+                workers,
+                args.interval,
+                args.debounce,
+                media,
+                loader,
+                index,
+                rules,
+                args.compress_level,
+                assets_folder,
+            )
+        except KeyboardInterrupt:
+            logging.info("Stopped watching.")
+        return
+
+    if args.profile:
+        profiler.enable()
+    cprofile = None
+    if args.cprofile:
+        import cProfile
+
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+
+    cards = generate_flashcards(
+        FLASHCARDS_FOLDER, cache, workers, media, loader, index, rules
+    )
+    if args.shard is None:
+        report = deck_builder.build_anki_package(
+            log_flashcards(cards),
+            parent_deck_name,
+            output_file,
+            update=args.update,
+            media_files=media.files,
+            compress_level=args.compress_level,
+            timestamp=timestamp,
+            assets_folder=assets_folder,
+        )
+    else:
+        shards = sharding.build_sharded_packages(
+            log_flashcards(cards),
+            parent_deck_name,
+            output_file,
+            shard_by=args.shard,
+            workers=workers,
+            update=args.update,
+            media_files=media.files,
+            compress_level=args.compress_level,
+            timestamp=timestamp,
+            assets_folder=assets_folder,
+        )
+
+    if cprofile is not None:
+        cprofile.disable()
+        cprofile.dump_stats(args.cprofile)
+        logging.info(f"cProfile statistics written to: {args.cprofile}")
+    if args.profile:
+        profiler.get_profiler().write(args.profile)
+        logging.info(f"Build stages: {profiler.get_profiler()}")
+        logging.info(f"Profile report written to: {args.profile}")
+
+    if args.shard is not None:
+        for shard in shards:
+            state = "changed" if shard.changed else "unchanged"
+            logging.info(
+                f"APKG file generated: {shard.file} ({shard.notes} notes, {state})"
+            )
+        logging.info(
+            f"Manifest written to: {sharding.get_manifest_filename(output_file)} ({media})"
+        )
+    elif report.unchanged:
+        logging.info(f"APKG file unchanged, not written: {output_file} ({media})")
+    else:
+        logging.info(f"APKG file generated: {output_file} ({media})")
+    if args.update and args.shard is None:
+        logging.info(f"Updated notes: {report}")
+        for kind in ("added", "changed", "removed"):
+            for guid in getattr(report, kind):
+                logging.debug(f"{kind.capitalize()}: {guid}")
+
+    media.save()
+    index.save()
+    logging.info(f"Vault index: {index}")
+    if cache is not None:
+        cache.save()
+        logging.info(f"Build cache: {cache}")
 
 
 if __name__ == "__main__":
@@ -1,8 +1,10 @@
 from dataclasses import dataclass, field
-from typing import List
-from deck_builder.note_type_base import BaseNoteType
+from typing import TYPE_CHECKING, List, Optional
 from note_processor.abstracts import Masker, Parser
 
+if TYPE_CHECKING:
+    from deck_builder.note_type_base import BaseNoteType
+
 
 @dataclass(slots=True, kw_only=True)
 class NoteMetadata:
@@ -16,6 +18,16 @@ class NoteMetadata:
     shuffle_rows: bool
     shuffle_cols: bool
     hints: List[str] = field(default_factory=list)
+    # How the header and hints are stored in the notes, see note_type_registry.LAYOUTS.
+    layout: str = "inline"
+    # When the rows and columns are shuffled, see note_type_registry.SHUFFLE_MODES.
+    shuffle_mode: str = "review"
+    # How the HTML of the tables is written, see styler.HTML_MODES.
+    html: str = "pretty"
+    # Tables with more body rows or columns are split into windows of at most that many, see
+    # note_processor.paginator.
+    page_rows: Optional[int] = None
+    page_cols: Optional[int] = None
 
 
 @dataclass(slots=True, kw_only=True)
@@ -24,7 +36,7 @@ class FlashcardMetadata:
     deck: str
     shuffle_rows: bool
     shuffle_cols: bool
-    note_type: BaseNoteType
+    note_type: "BaseNoteType"
 
 
 @dataclass(slots=True, kw_only=True)
@@ -32,6 +44,17 @@ class Flashcard:
     front: str
     back: str
     metadata: FlashcardMetadata
+    # The card header and hints, shared by all flashcards of a note.
+    # The note type decides how they are combined with the front and back.
+    header: str = ""
+    hints: List[str] = field(default_factory=list)
+    # The media references embedded in the fields, resolved when the package is built.
+    media: List[str] = field(default_factory=list)
+    # With a note type making one card per vector, the front holds the whole table and these are
+    # the rows ('r<idx>') and columns ('c<idx>') masked by each card.
+    vectors: List[str] = field(default_factory=list)
+    # With a note type shuffling at build time, the orders the card can be shown in, as JSON.
+    shuffle: str = ""
 
     def __repr__(self) -> str:
         """
@@ -0,0 +1,155 @@
+from typing import Callable, Iterator, List, Optional, Sequence, Union
+
+
+class Table:
+    """
+    A rectangular table of cell strings.
+
+    The cells are stored row-major in a single flat tuple. Rows shorter than the
+    longest row are padded with empty cells.
+    """
+
+    __slots__ = ("cells", "num_rows", "num_cols")
+
+    def __init__(self, rows: Sequence[Sequence[str]]):
+        num_cols = max((len(row) for row in rows), default=0)
+        cells: List[str] = []
+        for row in rows:
+            cells.extend(row)
+            cells.extend([""] * (num_cols - len(row)))
+        self.cells = tuple(cells)
+        self.num_rows = len(rows)
+        self.num_cols = num_cols
+
+    @classmethod
+    def coerce(cls, table: "TableLike") -> "Table":
+        """Return the table itself, or a new Table for a list of rows."""
+        if isinstance(table, Table):
+            return table
+        return cls(table)
+
+    def cell(self, row_idx: int, col_idx: int) -> str:
+        return self.cells[row_idx * self.num_cols + col_idx]
+
+    def row(self, row_idx: int) -> List[str]:
+        start = row_idx * self.num_cols
+        return list(self.cells[start : start + self.num_cols])
+
+    def window(self, row_indices: Sequence[int], col_indices: Sequence[int]) -> "Table":
+        """Return a new table made of the given rows and columns, in the given order."""
+        return Table(
+            [
+                [
+                    self.cells[row_idx * self.num_cols + col_idx]
+                    for col_idx in col_indices
+                ]
+                for row_idx in row_indices
+            ]
+        )
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __getitem__(self, row_idx: int) -> List[str]:
+        if not 0 <= row_idx < self.num_rows:
+            raise IndexError("table row index out of range")
+        return self.row(row_idx)
+
+    def __iter__(self) -> Iterator[List[str]]:
+        for row_idx in range(self.num_rows):
+            yield self.row(row_idx)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Table, list)):
+            return list(self) == [list(row) for row in other]
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Table({list(self)!r})"
+
+
+class CellOverlay:
+    """
+    Lazily applies a function to the cells of a table.
+    Each result is computed on first access and shared by all views using the overlay.
+    """
+
+    __slots__ = ("table", "func", "values")
+
+    def __init__(self, table: Table, func: Callable[[str], str]):
+        self.table = table
+        self.func = func
+        self.values: List[Optional[str]] = [None] * len(table.cells)
+
+    def __getitem__(self, idx: int) -> str:
+        value = self.values[idx]
+        if value is None:
+            value = self.func(self.table.cells[idx])
+            self.values[idx] = value
+        return value
+
+
+class MaskedTable:
+    """
+    A view of a table in which the cells of one row or one column are taken from an overlay.
+
+    The header cell of the vector (the first cell of a row, the first cell of a column)
+    is kept as is. The view only references the table, the cells are materialized when
+    the view is iterated.
+    """
+
+    __slots__ = ("table", "overlay", "row_idx", "col_idx")
+
+    def __init__(
+        self,
+        table: Table,
+        overlay: CellOverlay,
+        row_idx: Optional[int] = None,
+        col_idx: Optional[int] = None,
+    ):
+        if (row_idx is None) == (col_idx is None):
+            raise ValueError("Exactly one of row_idx and col_idx must be given.")
+        self.table = table
+        self.overlay = overlay
+        self.row_idx = row_idx
+        self.col_idx = col_idx
+
+    def masked_indices(self) -> range:
+        """Return the flat indices of the cells taken from the overlay."""
+        num_cols = self.table.num_cols
+        if self.row_idx is not None:
+            start = self.row_idx * num_cols
+            return range(start + 1, start + num_cols)
+        return range(num_cols + self.col_idx, len(self.table.cells), num_cols)
+
+    def row(self, row_idx: int) -> List[str]:
+        row = self.table.row(row_idx)
+        if self.row_idx is not None:
+            if row_idx == self.row_idx:
+                start = row_idx * self.table.num_cols
+                for col_idx in range(1, len(row)):
+                    row[col_idx] = self.overlay[start + col_idx]
+        elif row_idx != 0:
+            row[self.col_idx] = self.overlay[
+                row_idx * self.table.num_cols + self.col_idx
+            ]
+        return row
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def __getitem__(self, row_idx: int) -> List[str]:
+        if not 0 <= row_idx < self.table.num_rows:
+            raise IndexError("table row index out of range")
+        return self.row(row_idx)
+
+    def __iter__(self) -> Iterator[List[str]]:
+        for row_idx in range(self.table.num_rows):
+            yield self.row(row_idx)
+
+    def __repr__(self) -> str:
+        return f"MaskedTable({list(self)!r})"
+
+
+# Tables can be passed as Table objects or as lists of rows.
+TableLike = Union[Table, List[List[str]]]
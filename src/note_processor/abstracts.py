@@ -1,21 +1,48 @@
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from typing import Any, Dict, List, Tuple
+from models.table import MaskedTable, TableLike
 
 
 class Masker(ABC):
+    @classmethod
+    def from_metadata(cls, metadata: Dict[str, Any]) -> "Masker":
+        """
+        Return a masker for a note, configured by the options of its frontmatter.
+        Raises ValueError if an option is invalid.
+        """
+        return cls()
+
     @abstractmethod
     def mask(
         self,
-        tables: List[List[List[str]]],
+        tables: List[TableLike],
         mask_row_headers: bool,
         mask_col_headers: bool,
-    ) -> Tuple[List[List[List[str]]], List[List[List[str]]]]:
-        """Returns a unmasked tables and a masked tables."""
+    ) -> Tuple[List[MaskedTable], List[MaskedTable]]:
+        """
+        Returns a unmasked tables and a masked tables.
+        The tables can be Table objects or lists of rows.
+        """
         pass
 
+    def mask_tables(
+        self, tables: List[Tuple[TableLike, bool, bool]]
+    ) -> Tuple[List[MaskedTable], List[MaskedTable]]:
+        """
+        Mask tables given with their own mask_row_headers and mask_col_headers, as the tables of
+        a single note. By default, each table is masked on its own.
+        """
+        unmasked_tables: List[MaskedTable] = []
+        masked_tables: List[MaskedTable] = []
+        for table, mask_row_headers, mask_col_headers in tables:
+            unmasked, masked = self.mask([table], mask_row_headers, mask_col_headers)
+            unmasked_tables.extend(unmasked)
+            masked_tables.extend(masked)
+        return unmasked_tables, masked_tables
+
 
 class Parser(ABC):
     @abstractmethod
-    def parse(self, content: str) -> List[List[List[str]]]:
+    def parse(self, content: str) -> List[TableLike]:
         """Parse markdown content to return a list of tables."""
         pass
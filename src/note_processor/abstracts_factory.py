@@ -1,17 +1,59 @@
+import importlib
+from typing import Dict, Optional, Tuple, Type
 from note_processor.abstracts import Parser, Masker
-from note_processor.table_parser import TableParser
-from note_processor.table_masker_hidden_vectors import TableMaskerHiddenVectors
 
+# Registries of the parsers and maskers by their name in the frontmatter: (module, class name).
+# Parsers and maskers are imported when they are first requested, so only the ones used are loaded.
+MASKERS: Dict[str, Tuple[str, str]] = {
+    "vectors": (
+        "note_processor.table_masker_hidden_vectors",
+        "TableMaskerHiddenVectors",
+    ),
+    "vectors_budget": ("note_processor.table_masker_budget", "TableMaskerBudget"),
+}
+PARSERS: Dict[str, Tuple[str, str]] = {
+    "table": ("note_processor.table_parser", "TableParser"),
+    "table_fast": ("note_processor.table_parser_fast", "TableParserFast"),
+}
 
-def get_masker(masker: str) -> Masker:
-    """Return an instance of the appropriate masker based on the provided string."""
-    if masker == "vectors":
-        return TableMaskerHiddenVectors()
-    return None
+
+def register_masker(name: str, module: str, class_name: str) -> None:
+    """Make a masker class available under a name, without importing it yet."""
+    MASKERS[name] = (module, class_name)
+
+
+def register_parser(name: str, module: str, class_name: str) -> None:
+    """Make a parser class available under a name, without importing it yet."""
+    PARSERS[name] = (module, class_name)
+
+
+def _load_class(registry: Dict[str, Tuple[str, str]], name: str) -> Optional[type]:
+    try:
+        module, class_name = registry[name]
+    except (KeyError, TypeError):
+        return None
+    return getattr(importlib.import_module(module), class_name)
+
+
+def get_masker_class(masker: str) -> Optional[Type[Masker]]:
+    """Return the masker class registered under the name, or None."""
+    return _load_class(MASKERS, masker)
+
+
+def get_masker(masker: str, metadata: Optional[Dict] = None) -> Masker:
+    """
+    Return an instance of the appropriate masker based on the provided string, configured by
+    the frontmatter of a note if given.
+    """
+    masker_class = get_masker_class(masker)
+    if masker_class is None:
+        return None
+    return masker_class.from_metadata(metadata or {})
 
 
 def get_parser(parser: str) -> Parser:
     """Return an instance of the appropriate parser based on the provided string."""
-    if parser == "table":
-        return TableParser()
-    return None
+    parser_class = _load_class(PARSERS, parser)
+    if parser_class is None:
+        return None
+    return parser_class()
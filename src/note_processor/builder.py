@@ -1,35 +1,105 @@
-from typing import List
-from deck_builder.note_type_table_shuffled_vectors import TableNoteTypeShuffledVectors
+import json
+import random
+from typing import Dict, List, Optional, Tuple
 from models.models import Flashcard, NoteMetadata, FlashcardMetadata
+from models.table import MaskedTable, Table
 from note_processor import styler
-from deck_builder.note_type_table import TableNoteType
-from deck_builder.note_type_table_shuffled_cols import TableNoteTypeShuffledCols
-from deck_builder.note_type_table_shuffled_rows import TableNoteTypeShuffledRows
+from deck_builder import note_type_registry
+from deck_builder.note_type_base import BaseNoteType
+from deck_builder.note_type_vectors import MAX_VECTORS
+
+# Number of orders computed for a card of a note shuffled at build time.
+SHUFFLE_VARIANTS = 8
+
+
+def render(
+    view: MaskedTable,
+    compiled_tables: Dict[int, styler.CompiledTable],
+    compact: bool = False,
+) -> str:
+    """
+    Render a masked table view, reusing the compiled HTML of its base table.
+    Tables which are not views are rendered from scratch.
+    """
+    if not isinstance(view, MaskedTable):
+        return styler.render_table(view, compact)
+    compiled_table = compiled_tables.get(id(view.table))
+    if compiled_table is None:
+        compiled_table = styler.CompiledTable(view.table, compact)
+        compiled_tables[id(view.table)] = compiled_table
+    return compiled_table.render(view)
+
+
+def get_shuffle_variants(
+    table: Table, shuffle_rows: bool, shuffle_cols: bool, seed: str
+) -> str:
+    """
+    Return SHUFFLE_VARIANTS orders of a table as JSON: the indices of its body rows and of its body
+    columns in the order to show them in, or an empty list if they are not shuffled. The header row
+    and column are not shuffled. The orders only depend on the seed.
+    """
+    rng = random.Random(seed)
+    variants = []
+    for _ in range(SHUFFLE_VARIANTS):
+        rows = list(range(1, table.num_rows)) if shuffle_rows else []
+        cols = list(range(1, table.num_cols)) if shuffle_cols else []
+        rng.shuffle(rows)
+        rng.shuffle(cols)
+        variants.append([rows, cols])
+    return json.dumps(variants, separators=(",", ":"))
+
+
+class ShuffleVariants:
+    """The shuffle orders of the tables of a note, computed once per table."""
+
+    def __init__(self, note_metadata: NoteMetadata):
+        self.note_metadata = note_metadata
+        self.enabled = note_metadata.shuffle_mode == "build" and (
+            note_metadata.shuffle_rows or note_metadata.shuffle_cols
+        )
+        self.variants: Dict[int, str] = {}
+
+    def get(self, table) -> str:
+        if not self.enabled:
+            return ""
+        variants = self.variants.get(id(table))
+        if variants is None:
+            variants = get_shuffle_variants(
+                Table.coerce(table),
+                self.note_metadata.shuffle_rows,
+                self.note_metadata.shuffle_cols,
+                f"{self.note_metadata.id}:{len(self.variants)}",
+            )
+            self.variants[id(table)] = variants
+        return variants
 
 
 def build(
-    unmasked_tables: List[List[List[str]]],
-    masked_tables: List[List[List[str]]],
+    unmasked_tables: List[MaskedTable],
+    masked_tables: List[MaskedTable],
     note_metadata: NoteMetadata,
+    media: Optional[List[str]] = None,
 ) -> List[Flashcard]:
     cards: List[Flashcard] = []
+    compiled_tables: Dict[int, styler.CompiledTable] = {}
     counter = 0
+    note_type = note_type_registry.get_note_type(
+        note_metadata.shuffle_rows,
+        note_metadata.shuffle_cols,
+        note_metadata.layout,
+        note_metadata.shuffle_mode,
+    )
+    shuffle_variants = ShuffleVariants(note_metadata)
+    if note_type.one_note_per_table:
+        return build_table_notes(
+            masked_tables, note_metadata, note_type, shuffle_variants, media
+        )
+    compact = note_metadata.html == "compact"
     for masked_table, unmasked_table in zip(masked_tables, unmasked_tables):
-        front = styler.render_table(masked_table)
-        front = styler.add_card_header(note_metadata.name, front)
-        front = styler.add_hints(note_metadata.hints, front)
-
-        back = styler.render_table(unmasked_table)
-        back = styler.add_card_header(note_metadata.name, back)
-        back = styler.add_hints(note_metadata.hints, back)
-
-        note_type = TableNoteType()
-        if note_metadata.shuffle_cols and note_metadata.shuffle_rows:
-            note_type = TableNoteTypeShuffledVectors()
-        elif note_metadata.shuffle_cols:
-            note_type = TableNoteTypeShuffledCols()
-        elif note_metadata.shuffle_rows:
-            note_type = TableNoteTypeShuffledRows()
+        front = render(masked_table, compiled_tables, compact)
+        back = render(unmasked_table, compiled_tables, compact)
+        # Views share the orders of their table, tables which are not views get their own.
+        table = getattr(masked_table, "table", masked_table)
 
         flashcard_metadata = FlashcardMetadata(
             id=note_metadata.id + f"-{counter}",
@@ -38,6 +108,67 @@ def build(
             shuffle_cols=note_metadata.shuffle_cols,
             note_type=note_type,
         )
-        cards.append(Flashcard(front=front, back=back, metadata=flashcard_metadata))
+        cards.append(
+            Flashcard(
+                front=front,
+                back=back,
+                metadata=flashcard_metadata,
+                header=note_metadata.name,
+                hints=note_metadata.hints,
+                media=media or [],
+                shuffle=shuffle_variants.get(table),
+            )
+        )
         counter += 1
     return cards
+
+
+def get_vector(view: MaskedTable) -> str:
+    """Return the name of the vector masked by a view, as in styler.get_vector_classes."""
+    if not isinstance(view, MaskedTable):
+        raise TypeError("One note per table needs a masker which returns table views.")
+    if view.row_idx is not None:
+        return f"r{view.row_idx}"
+    return f"c{view.col_idx}"
+
+
+def build_table_notes(
+    masked_tables: List[MaskedTable],
+    note_metadata: NoteMetadata,
+    note_type: BaseNoteType,
+    shuffle_variants: ShuffleVariants,
+    media: Optional[List[str]] = None,
+) -> List[Flashcard]:
+    """
+    Return one flashcard per table, holding the table once and the vectors masked by the views of
+    the table, for a note type with one card per vector. Tables with more than MAX_VECTORS masked
+    vectors are split into several flashcards.
+    """
+    vectors: Dict[int, Tuple[Table, List[str]]] = {}
+    for view in masked_tables:
+        vectors.setdefault(id(view.table), (view.table, []))[1].append(get_vector(view))
+
+    cards: List[Flashcard] = []
+    for table, table_vectors in vectors.values():
+        front = styler.render_vector_table(table, note_metadata.html == "compact")
+        for start in range(0, len(table_vectors), MAX_VECTORS):
+            flashcard_metadata = FlashcardMetadata(
+                id=note_metadata.id + f"-t{len(cards)}",
+                deck=note_metadata.deck,
+                shuffle_rows=note_metadata.shuffle_rows,
+                shuffle_cols=note_metadata.shuffle_cols,
+                note_type=note_type,
+            )
+            cards.append(
+                Flashcard(
+                    front=front,
+                    back="",
+                    metadata=flashcard_metadata,
+                    header=note_metadata.name,
+                    hints=note_metadata.hints,
+                    media=media or [],
+                    vectors=table_vectors[start : start + MAX_VECTORS],
+                    shuffle=shuffle_variants.get(table),
+                )
+            )
+    return cards
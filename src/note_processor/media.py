@@ -0,0 +1,36 @@
+import html
+import re
+from typing import List, Match
+
+# Obsidian embeds (![[diagram.png]], ![[diagram.png|200]]) and markdown images (![alt](img.png "title")).
+MEDIA_RE = re.compile(
+    r"!\[\[([^\]|#]+)(?:[|#][^\]]*)?\]\]"
+    r'|!\[[^\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+"[^"]*")?\s*\)'
+)
+
+
+def get_media_tag(reference: str) -> str:
+    """Return the HTML of an embedded media file. The reference is replaced when the package is built."""
+    return f'<img src="{html.escape(reference)}">'
+
+
+def embed_media(text: str, media: List[str]) -> str:
+    """
+    Replace the media references of a markdown text with img tags.
+    The references are appended to media, once each.
+    """
+    if "![" not in text:
+        return text
+
+    def replace(match: Match) -> str:
+        reference = (match.group(1) or match.group(2)).strip()
+        if reference not in media:
+            media.append(reference)
+        return get_media_tag(reference)
+
+    return MEDIA_RE.sub(replace, text)
+
+
+def embed_table_media(table: List[List[str]], media: List[str]) -> List[List[str]]:
+    """Replace the media references in the cells of a table, see embed_media."""
+    return [[embed_media(cell, media) for cell in row] for row in table]
@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from models.table import MaskedTable, Table, TableLike
+from note_processor.abstracts import Masker
+
+
+@dataclass(slots=True)
+class TableWindow:
+    """
+    A window of a table: its header row and column, and some of its body rows and columns.
+
+    The header row holds the same cells in every window of a column page, so only the windows of
+    the first row page mask it. Likewise, only the windows of the first column page mask the
+    header column.
+    """
+
+    table: Table
+    first_row_page: bool = True
+    first_col_page: bool = True
+
+
+def split_body(count: int, size: Optional[int]) -> List[List[int]]:
+    """
+    Split the body indices (1 to count - 1) of the rows or columns of a table into pages of at most
+    size indices, as even as possible. There is a single page if size is None or large enough.
+    """
+    body = list(range(1, count))
+    if size is None or len(body) <= size:
+        return [body]
+    num_pages = -(-len(body) // size)
+    return [
+        body[len(body) * page // num_pages : len(body) * (page + 1) // num_pages]
+        for page in range(num_pages)
+    ]
+
+
+def paginate(
+    table: Table, page_rows: Optional[int], page_cols: Optional[int]
+) -> List[TableWindow]:
+    """
+    Split a table with more than page_rows body rows or page_cols body columns into windows of at
+    most that many, each keeping the header row and column. The windows are ordered by row page,
+    then by column page. A table which is small enough is its own single window.
+    """
+    row_pages = split_body(table.num_rows, page_rows)
+    col_pages = split_body(table.num_cols, page_cols)
+    if len(row_pages) == 1 and len(col_pages) == 1:
+        return [TableWindow(table)]
+    return [
+        TableWindow(
+            table.window([0] + rows, [0] + cols),
+            first_row_page=row_page == 0,
+            first_col_page=col_page == 0,
+        )
+        for row_page, rows in enumerate(row_pages)
+        for col_page, cols in enumerate(col_pages)
+    ]
+
+
+def mask_windows(
+    masker: Masker,
+    tables: List[TableLike],
+    mask_row_headers: bool,
+    mask_col_headers: bool,
+    page_rows: Optional[int],
+    page_cols: Optional[int],
+) -> Tuple[List[MaskedTable], List[MaskedTable]]:
+    """
+    Mask the windows of the tables (see paginate) as the tables of the note, so the size of a card
+    and the number of cards only grow with the size of a window, and each window has its own
+    position (and seed, for the maskers which sample vectors). Every vector of a table is masked
+    in one window: the header column (mask_row_headers) in the first column page, the header row
+    (mask_col_headers) in the first row page.
+    """
+    return masker.mask_tables(
+        [
+            (
+                window.table,
+                mask_row_headers and window.first_col_page,
+                mask_col_headers and window.first_row_page,
+            )
+            for table in tables
+            for window in paginate(Table.coerce(table), page_rows, page_cols)
+        ]
+    )
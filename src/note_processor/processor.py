@@ -1,13 +1,106 @@
-from typing import List
+import copy
+import dataclasses
+import logging
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
 from models.models import Flashcard, NoteMetadata
-from note_processor import builder
+from note_processor import builder, paginator
+from note_processor.media import embed_media, embed_table_media
+from profiling import profiler
+from profiling.profiler import StageTimings
+
+
+class _RecordCollector(logging.Handler):
+    """Logging handler that keeps the records instead of emitting them."""
+
+    def __init__(self, level: int = logging.NOTSET, copy_records: bool = False):
+        super().__init__(level)
+        self.copy_records = copy_records
+        self.records: List[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.copy_records:
+            record = copy.copy(record)
+        # Format the message now so the record can be sent to the parent process.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.records.append(record)
+
+
+_collector = _RecordCollector()
+
+
+def init_worker(level: int, profile: bool = False) -> None:
+    """Route the log records of a worker process to the collector and enable profiling if requested."""
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_collector)
+    root.setLevel(level)
+    if profile:
+        # A forked worker starts with a copy of the stages the parent recorded so far.
+        profiler.enable().take()
+
+
+@contextmanager
+def collect_warnings() -> Iterator[List[logging.LogRecord]]:
+    """
+    Keep a copy of the warnings and errors logged in the block, in the returned list.
+    They are still emitted as usual.
+    """
+    collector = _RecordCollector(logging.WARNING, copy_records=True)
+    root = logging.getLogger()
+    root.addHandler(collector)
+    try:
+        yield collector.records
+    finally:
+        root.removeHandler(collector)
 
 
 def process(content: str, note_metadata: NoteMetadata) -> List[Flashcard]:
     """Process content to generate one or more Flashcards"""
-    tables = note_metadata.parser.parse(content)
-    unmasked_tables, masked_tables = note_metadata.masker.mask(
-        tables, note_metadata.mask_row_header, note_metadata.mask_col_header
-    )
-    cards = builder.build(unmasked_tables, masked_tables, note_metadata)
+    with profiler.stage("parse"):
+        tables = note_metadata.parser.parse(content)
+    with profiler.stage("media"):
+        media: List[str] = []
+        if "![" in content:
+            tables = [embed_table_media(table, media) for table in tables]
+        hints = [
+            embed_media(hint, media) if isinstance(hint, str) else hint
+            for hint in note_metadata.hints
+        ]
+        if hints != note_metadata.hints:
+            note_metadata = dataclasses.replace(note_metadata, hints=hints)
+    with profiler.stage("mask"):
+        if note_metadata.page_rows is None and note_metadata.page_cols is None:
+            unmasked_tables, masked_tables = note_metadata.masker.mask(
+                tables, note_metadata.mask_row_header, note_metadata.mask_col_header
+            )
+        else:
+            unmasked_tables, masked_tables = paginator.mask_windows(
+                note_metadata.masker,
+                tables,
+                note_metadata.mask_row_header,
+                note_metadata.mask_col_header,
+                note_metadata.page_rows,
+                note_metadata.page_cols,
+            )
+    with profiler.stage("build"):
+        cards = builder.build(unmasked_tables, masked_tables, note_metadata, media)
     return cards
+
+
+def process_in_worker(
+    content: str, note_metadata: NoteMetadata
+) -> Tuple[List[Flashcard], List[logging.LogRecord], StageTimings]:
+    """
+    Process content in a worker process started with init_worker.
+    Returns the Flashcards, the log records emitted while processing and the timings of the stages,
+    so the parent can handle them.
+    """
+    _collector.records = []
+    cards = process(content, note_metadata)
+    return cards, _collector.records, profiler.get_profiler().take()
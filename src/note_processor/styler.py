@@ -1,5 +1,12 @@
 import re
-from typing import List
+from typing import Callable, Dict, List, Optional
+from models.table import CellOverlay, MaskedTable, Table, TableLike
+
+# How the HTML of the tables is written: indented, or without any whitespace between the tags and
+# with masked cells sized by CSS, see get_masked_compact.
+HTML_MODES = ["pretty", "compact"]
+
+MASK_RE = re.compile(r"[^\t\n]")
 
 
 def get_masked(text: str) -> str:
@@ -10,11 +17,34 @@ def get_masked(text: str) -> str:
     """
     return (
         '<span class="masked" style="white-space: pre;">'
-        + re.sub(r"[^\t\n]", " ", text)
+        + MASK_RE.sub(" ", text)
         + "</span>"
     )
 
 
+def get_masked_compact(text: str) -> str:
+    """
+    Return a blank span taking the room get_masked would: as wide as the longest line of the
+    input string in 'ch' units (the width of a character of the monospace font of the mask),
+    and with as many lines. The lines are empty but the last, which holds a zero-width space:
+    a browser does not render an empty last line. The "masked_compact" class is added, its CSS
+    preserves the newlines like the style of get_masked does.
+    """
+    lines = text.split("\n")
+    width = max(len(line.expandtabs()) for line in lines)
+    return (
+        f'<span class="masked_compact" style="width:{width}ch">'
+        + "\n" * (len(lines) - 1)
+        + "\u200b</span>"
+    )
+
+
+# The cell formatters replaced by the compact HTML mode.
+COMPACT_FORMATTERS: Dict[Callable[[str], str], Callable[[str], str]] = {
+    get_masked: get_masked_compact
+}
+
+
 def get_unmasked(text: str) -> str:
     """
     A span tag with with the "unmasked" class is added.
@@ -38,33 +68,155 @@ def add_hints(hints: List[str], content: str) -> str:
     return "\n".join([content, hints_formatted])
 
 
-def render_table(table: List[List[str]]) -> str:
+def get_cell_class(row_idx: int, col_idx: int) -> str:
     """
-    Format a 2D list of strings as an HTML table.
-    The entire table is enclosed in a <tbody>.
+    Return the class attribute of a table cell.
     The first row cells receive the 'table_header_top' class,
     the first column cells receive the 'table_header_left' class,
     and all cells receive the 'table_body' class.
     """
+    if row_idx == 0 and col_idx == 0:
+        return "table_body table_corner"
+    elif row_idx == 0:
+        return "table_body table_header_top"
+    elif col_idx == 0:
+        return "table_body table_header_left"
+    return "table_body"
+
+
+def get_vector_classes(row_idx: int, col_idx: int) -> str:
+    """
+    Return the classes of the vectors a cell is masked with: 'r<row>' unless the cell is the
+    header of its row, and 'c<col>' unless it is the header of its column.
+    """
+    classes = []
+    if col_idx != 0:
+        classes.append(f"r{row_idx}")
+    if row_idx != 0:
+        classes.append(f"c{col_idx}")
+    return " ".join(classes)
+
+
+def get_indents(compact: bool = False) -> List[str]:
+    """Return the indentation of the tbody, tr and td lines of a table."""
+    if compact:
+        return ["", "", ""]
+    return ["  ", "    ", "      "]
+
+
+def join_lines(lines: List[str], compact: bool = False) -> str:
+    return ("" if compact else "\n").join(lines)
+
+
+def render_vector_table(table: Table, compact: bool = False) -> str:
+    """
+    Format a table like render_table, adding the classes returned by get_vector_classes to every
+    cell and wrapping its content in a span with the 'cell' class, so a card template can mask
+    any row or column with CSS.
+    """
     if not table:
         return ""
 
-    html_lines = ["<table>", "  <tbody>"]
+    tbody, tr, td = get_indents(compact)
+    html_lines = ["<table>", f"{tbody}<tbody>"]
+    for i in range(table.num_rows):
+        html_lines.append(f"{tr}<tr>")
+        for j in range(table.num_cols):
+            class_attr = f"{get_cell_class(i, j)} {get_vector_classes(i, j)}".rstrip()
+            cell = table.cell(i, j)
+            html_lines.append(
+                f'{td}<td class="{class_attr}"><span class="cell">{cell}</span></td>'
+            )
+        html_lines.append(f"{tr}</tr>")
+    html_lines.append(f"{tbody}</tbody>")
+    html_lines.append("</table>")
+    return join_lines(html_lines, compact)
+
+
+def render_table(table: TableLike, compact: bool = False) -> str:
+    """
+    Format a table (a 2D list of strings or a table view) as an HTML table.
+    The entire table is enclosed in a <tbody>.
+    The cells receive the classes returned by get_cell_class.
+    With compact=True, the lines are not indented nor separated.
+    """
+    if not table:
+        return ""
+
+    tbody, tr, td = get_indents(compact)
+    html_lines = ["<table>", f"{tbody}<tbody>"]
 
     for i, row in enumerate(table):
-        html_lines.append("    <tr>")
+        html_lines.append(f"{tr}<tr>")
         for j, cell in enumerate(row):
-            classes = ["table_body"]
-            if i == 0 and j == 0:
-                classes.append("table_corner")
-            elif i == 0:
-                classes.append("table_header_top")
-            elif j == 0:
-                classes.append("table_header_left")
-            class_attr = " ".join(classes)
-            html_lines.append(f'      <td class="{class_attr}">{cell}</td>')
-        html_lines.append("    </tr>")
-
-    html_lines.append("  </tbody>")
+            class_attr = get_cell_class(i, j)
+            html_lines.append(f'{td}<td class="{class_attr}">{cell}</td>')
+        html_lines.append(f"{tr}</tr>")
+
+    html_lines.append(f"{tbody}</tbody>")
     html_lines.append("</table>")
-    return "\n".join(html_lines)
+    return join_lines(html_lines, compact)
+
+
+class CompiledTable:
+    """
+    The HTML lines of a table, rendered once and shared by all its masked views.
+
+    Rendering a view copies the line list and only replaces the lines of the
+    masked cells. The output is identical to render_table.
+
+    With compact=True, the HTML is written like render_table(compact=True) and the cells of the
+    views are formatted with the compact formatters, see COMPACT_FORMATTERS.
+    """
+
+    __slots__ = ("table", "lines", "cell_prefixes", "compact", "overlays")
+
+    def __init__(self, table: Table, compact: bool = False):
+        self.table = table
+        self.compact = compact
+        self.cell_prefixes: List[str] = []
+        self.lines: List[str] = []
+        # The compact overlays, by id of the overlays of the views they replace.
+        self.overlays: Dict[int, CellOverlay] = {}
+        if not table:
+            return
+
+        tbody, tr, td = get_indents(compact)
+        self.lines = ["<table>", f"{tbody}<tbody>"]
+        for i in range(table.num_rows):
+            self.lines.append(f"{tr}<tr>")
+            for j in range(table.num_cols):
+                prefix = f'{td}<td class="{get_cell_class(i, j)}">'
+                self.cell_prefixes.append(prefix)
+                self.lines.append(prefix + table.cell(i, j) + "</td>")
+            self.lines.append(f"{tr}</tr>")
+        self.lines.append(f"{tbody}</tbody>")
+        self.lines.append("</table>")
+
+    def _overlay(self, view: MaskedTable) -> CellOverlay:
+        """Return the overlay of a view, with the compact formatter of its cells if compact."""
+        if not self.compact:
+            return view.overlay
+        overlay = self.overlays.get(id(view.overlay))
+        if overlay is None:
+            func = view.overlay.func
+            overlay = CellOverlay(self.table, COMPACT_FORMATTERS.get(func, func))
+            self.overlays[id(view.overlay)] = overlay
+        return overlay
+
+    def _line_index(self, idx: int) -> int:
+        """Return the index of the line of the cell with the given flat index."""
+        row_idx, col_idx = divmod(idx, self.table.num_cols)
+        return 3 + row_idx * (self.table.num_cols + 2) + col_idx
+
+    def render(self, view: Optional[MaskedTable] = None) -> str:
+        """Render the table, or one of its masked views."""
+        if view is None:
+            return join_lines(self.lines, self.compact)
+        lines = self.lines.copy()
+        overlay = self._overlay(view)
+        for idx in view.masked_indices():
+            lines[self._line_index(idx)] = (
+                self.cell_prefixes[idx] + overlay[idx] + "</td>"
+            )
+        return join_lines(lines, self.compact)
@@ -0,0 +1,68 @@
+import random
+from typing import Any, Dict, List, Optional
+from models.table import MaskedTable, Table
+from note_processor.table_masker_hidden_vectors import (
+    TableMaskerHiddenVectors,
+    Vector,
+)
+
+
+class TableMaskerBudget(TableMaskerHiddenVectors):
+    """
+    Masks rows and columns like TableMaskerHiddenVectors, with at most card_budget cards per table.
+
+    Vectors whose masked cells are all empty are skipped unless skip_empty_vectors is False.
+    If more vectors are left than the budget, a sample of them is chosen, seeded by the note id
+    and the position of the table, so the same note always gives the same cards.
+    """
+
+    def __init__(
+        self,
+        card_budget: Optional[int] = None,
+        skip_empty_vectors: bool = True,
+        seed: str = "",
+    ):
+        self.card_budget = card_budget
+        self.skip_empty_vectors = skip_empty_vectors
+        self.seed = seed
+
+    @classmethod
+    def from_metadata(cls, metadata: Dict[str, Any]) -> "TableMaskerBudget":
+        card_budget = metadata.get("card_budget")
+        if card_budget is not None and (
+            not isinstance(card_budget, int)
+            or isinstance(card_budget, bool)
+            or card_budget < 1
+        ):
+            raise ValueError(
+                f"has an invalid card_budget '{card_budget}', expected a positive integer"
+            )
+        skip_empty_vectors = metadata.get("skip_empty_vectors", True)
+        if not isinstance(skip_empty_vectors, bool):
+            raise ValueError("must have a 'skip_empty_vectors' field of type bool")
+        return cls(card_budget, skip_empty_vectors, str(metadata.get("id", "")))
+
+    def get_vectors(
+        self,
+        table_idx: int,
+        table: Table,
+        mask_row_headers: bool,
+        mask_col_headers: bool,
+    ) -> List[Vector]:
+        vectors = super().get_vectors(
+            table_idx, table, mask_row_headers, mask_col_headers
+        )
+        if self.skip_empty_vectors:
+            vectors = [
+                vector
+                for vector in vectors
+                if any(
+                    table.cells[idx].strip()
+                    for idx in MaskedTable(table, None, *vector).masked_indices()
+                )
+            ]
+        if self.card_budget is not None and len(vectors) > self.card_budget:
+            rng = random.Random(f"{self.seed}:{table_idx}")
+            chosen = sorted(rng.sample(range(len(vectors)), self.card_budget))
+            vectors = [vectors[idx] for idx in chosen]
+        return vectors
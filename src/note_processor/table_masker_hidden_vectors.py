@@ -1,66 +1,63 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+from models.table import CellOverlay, MaskedTable, Table, TableLike
 from note_processor.abstracts import Masker
 from note_processor import styler
 
+# A masked vector of a table: (row_idx, None) for a row, (None, col_idx) for a column.
+Vector = Tuple[Optional[int], Optional[int]]
+
 
 class TableMaskerHiddenVectors(Masker):
+    def get_vectors(
+        self,
+        table_idx: int,
+        table: Table,
+        mask_row_headers: bool,
+        mask_col_headers: bool,
+    ) -> List[Vector]:
+        """Return the vectors of the table_idx-th table of a note to mask, one card each."""
+        # Every row, then every column.
+        vectors: List[Vector] = [
+            (row_idx, None)
+            for row_idx in range(table.num_rows)
+            if row_idx != 0 or mask_col_headers
+        ]
+        vectors.extend(
+            (None, col_idx)
+            for col_idx in range(table.num_cols)
+            if col_idx != 0 or mask_row_headers
+        )
+        return vectors
+
     def mask(
         self,
-        tables: List[List[List[str]]],
+        tables: List[TableLike],
         mask_row_headers: bool,
         mask_col_headers: bool,
-    ) -> Tuple[List[List[List[str]]], List[List[List[str]]]]:
-        unmasked_tables: List[List[List[str]]] = []
-        masked_tables: List[List[List[str]]] = []
-        for table in tables:
-            num_rows = len(table)
-            num_cols = max(len(row) for row in table) if table else 0
+    ) -> Tuple[List[MaskedTable], List[MaskedTable]]:
+        return self.mask_tables(
+            [(table, mask_row_headers, mask_col_headers) for table in tables]
+        )
 
-            # Generate masked table for each row.
-            for masked_row_idx in range(num_rows):
-                if masked_row_idx == 0 and not mask_col_headers:
-                    continue
-                unmasked_table: List[List[str]] = []
-                masked_table: List[List[str]] = []
-                for row_idx in range(num_rows):
-                    unmasked_row_cells: List[str] = []
-                    masked_row_cells: List[str] = []
-                    for col_idx in range(num_cols):
-                        cell_content = table[row_idx][col_idx]
-                        if row_idx == masked_row_idx and col_idx != 0:
-                            unmasked = styler.get_unmasked(cell_content)
-                            masked = styler.get_masked(cell_content)
-                            unmasked_row_cells.append(unmasked)
-                            masked_row_cells.append(masked)
-                        else:
-                            unmasked_row_cells.append(cell_content)
-                            masked_row_cells.append(cell_content)
-                    unmasked_table.append(unmasked_row_cells)
-                    masked_table.append(masked_row_cells)
-                unmasked_tables.append(unmasked_table)
-                masked_tables.append(masked_table)
+    def mask_tables(
+        self, tables: List[Tuple[TableLike, bool, bool]]
+    ) -> Tuple[List[MaskedTable], List[MaskedTable]]:
+        unmasked_tables: List[MaskedTable] = []
+        masked_tables: List[MaskedTable] = []
+        for table_idx, (table, mask_row_headers, mask_col_headers) in enumerate(tables):
+            table = Table.coerce(table)
+            # Every cell is masked at most once, even if it is part of a masked row and column.
+            unmasked_cells = CellOverlay(table, styler.get_unmasked)
+            masked_cells = CellOverlay(table, styler.get_masked)
 
-            # Generate masked table for each column.
-            for masked_col_idx in range(num_cols):
-                if masked_col_idx == 0 and not mask_row_headers:
-                    continue
-                unmasked_table: List[List[str]] = []
-                masked_table: List[List[str]] = []
-                for row_idx in range(num_rows):
-                    unmasked_row_cells: List[str] = []
-                    masked_row_cells: List[str] = []
-                    for col_idx in range(num_cols):
-                        cell_content = table[row_idx][col_idx]
-                        if col_idx == masked_col_idx and row_idx != 0:
-                            unmasked = styler.get_unmasked(cell_content)
-                            masked = styler.get_masked(cell_content)
-                            unmasked_row_cells.append(unmasked)
-                            masked_row_cells.append(masked)
-                        else:
-                            unmasked_row_cells.append(cell_content)
-                            masked_row_cells.append(cell_content)
-                    unmasked_table.append(unmasked_row_cells)
-                    masked_table.append(masked_row_cells)
-                unmasked_tables.append(unmasked_table)
-                masked_tables.append(masked_table)
+            vectors = self.get_vectors(
+                table_idx, table, mask_row_headers, mask_col_headers
+            )
+            for row_idx, col_idx in vectors:
+                unmasked_tables.append(
+                    MaskedTable(table, unmasked_cells, row_idx=row_idx, col_idx=col_idx)
+                )
+                masked_tables.append(
+                    MaskedTable(table, masked_cells, row_idx=row_idx, col_idx=col_idx)
+                )
         return [unmasked_tables, masked_tables]
@@ -1,7 +1,5 @@
 from typing import List
 from note_processor.abstracts import Parser
-import markdown
-from bs4 import BeautifulSoup
 import textwrap
 
 
@@ -14,6 +12,10 @@ class TableParser(Parser):
         This function uses Python-Markdown with the 'tables' extension to convert the
         markdown into HTML, and then BeautifulSoup to extract table rows and cells.
         """
+        # Imported here: Python-Markdown and BeautifulSoup are slow to import and only needed by this parser.
+        import markdown
+        from bs4 import BeautifulSoup
+
         # Remove any leading whitespace so the table isn't interpreted as a code block.
         content = textwrap.dedent(content).strip()
         # Convert the markdown to HTML with table support.
@@ -0,0 +1,231 @@
+import html
+import re
+import unicodedata
+from typing import List, Optional
+from note_processor.abstracts import Parser
+
+# Characters which can be escaped with a backslash in markdown.
+ESCAPABLE = set("\\`*_{}[]()>#+-.!|")
+
+SEPARATOR_CELL_RE = re.compile(r"^:?-+:?$")
+FENCE_RE = re.compile(r"^(`{3,}|~{3,})")
+# What _split_row looks for in a row: pipes, escaped characters and runs of backticks.
+_ROW_TOKEN_RE = re.compile(
+    r"\||`+|\\[" + "".join(re.escape(char) for char in sorted(ESCAPABLE)) + "]"
+)
+_BACKTICKS_RE = re.compile("`+")
+
+# While a cell is parsed, escaped characters are moved to the private use area, so they are not
+# taken for markup, and a code span is replaced by a single character.
+_ESCAPED_OFFSET = 0xE000
+_CODE = "\uf8ff"
+# Where the text of a cell is split: the boundary of an HTML element in the output of Markdown.
+_SPLIT = "\uf8fe"
+# Inline markup which Markdown turns into HTML elements, in the order Markdown looks for it.
+_INLINE_RE = re.compile(
+    r"!\[[^\]]*\]\([^)]*\)"  # image: no text
+    # link: its text, which may hold brackets, e.g. a wikilink
+    r"|\[(?P<link>(?:[^\[\]]|\[(?:[^\[\]]|\[[^\[\]]*\])*\])*)\]\([^)]*\)"
+    r"|<(?P<autolink>(?:[Ff]|[Hh][Tt])[Tt][Pp][Ss]?://[^<>]*)>"
+    r"|<(?:/?[A-Za-z][^<>]*|!--.*?--)>"  # tag or comment: no text
+)
+_EMPHASIS_RE = re.compile(r"\*+|_+")
+# Cells without these characters hold no inline markup.
+_MARKUP_RE = re.compile(r"[<\[*_]")
+_RESTORE_ESCAPED = {ord(char) + _ESCAPED_OFFSET: char for char in ESCAPABLE}
+
+
+def _replace_inline(match: re.Match) -> str:
+    text = match.group("link")
+    if text is None:
+        text = match.group("autolink") or ""
+    return f"{_SPLIT}{text}{_SPLIT}"
+
+
+def _is_punctuation(char: str) -> bool:
+    # Markup replaced by a placeholder (in the private use area) counts too, as in Markdown.
+    category = unicodedata.category(char)
+    return category[0] in "PS" or category == "Co"
+
+
+def _split_emphasis(text: str) -> str:
+    """
+    Replace the emphasis delimiters (runs of * or _) of the text with _SPLIT.
+
+    Runs are paired as in CommonMark: a run can open if it is left-flanking and close if it is
+    right-flanking, and _ does not open or close inside a word. A closing run is paired with
+    the nearest opening run of the same character. Unpaired runs are kept as they are.
+    """
+    chars = list(text)
+    # Opening runs: [character, start, number of delimiters left].
+    openers: List[List] = []
+    for match in _EMPHASIS_RE.finditer(text):
+        start, end = match.span()
+        char = text[start]
+        before = text[start - 1] if start else " "
+        after = text[end] if end < len(text) else " "
+        left = not after.isspace() and (
+            not _is_punctuation(after) or before.isspace() or _is_punctuation(before)
+        )
+        right = not before.isspace() and (
+            not _is_punctuation(before) or after.isspace() or _is_punctuation(after)
+        )
+        if char == "_":
+            left, right = left and not before.isalnum(), right and not after.isalnum()
+
+        count = end - start
+        while right and count:
+            idx = next(
+                (i for i in reversed(range(len(openers))) if openers[i][0] == char),
+                None,
+            )
+            if idx is None:
+                break
+            opener = openers[idx]
+            del openers[idx + 1 :]
+            used = 2 if opener[2] >= 2 and count >= 2 else 1
+            opener[2] -= used
+            chars[opener[1] + opener[2] : opener[1] + opener[2] + used] = [
+                _SPLIT
+            ] * used
+            chars[start : start + used] = [_SPLIT] * used
+            start += used
+            count -= used
+            if not opener[2]:
+                openers.pop()
+        if left and count:
+            openers.append([char, start, count])
+    return "".join(chars)
+
+
+def _cell_text(text: str, codes: List[str]) -> str:
+    """
+    Return the text of a cell as TableParser extracts it from the HTML of Markdown: the text
+    between HTML elements (tags, links, emphasis, code spans) is stripped, and the non-empty
+    parts are joined with newlines. <br> thus starts a new line.
+
+    text holds the cell with escaped characters and code spans replaced, see _split_row, and
+    codes the content of its code spans.
+    """
+    if _MARKUP_RE.search(text):
+        text = _split_emphasis(_INLINE_RE.sub(_replace_inline, text))
+    elif text.isascii():
+        # No escaped character, code span or markup.
+        return html.unescape(text).strip()
+    parts = html.unescape(text.translate(_RESTORE_ESCAPED)).split(_CODE)
+    pieces = parts[0].split(_SPLIT)
+    for code, part in zip(codes, parts[1:]):
+        pieces.append(code)
+        pieces.extend(part.split(_SPLIT))
+    return "\n".join(p for p in map(str.strip, pieces) if p)
+
+
+def _split_row(line: str) -> List[str]:
+    """
+    Split a table row into the text of its cells, see _cell_text.
+
+    Pipes split cells unless they are escaped or inside a code span.
+    Backslash escapes and HTML entities are resolved outside of code spans.
+    """
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+
+    cells: List[str] = []
+    codes: List[str] = []
+    text: List[str] = []
+    i = 0
+    while True:
+        match = _ROW_TOKEN_RE.search(line, i)
+        if match is None:
+            text.append(line[i:])
+            break
+        start, end = match.span()
+        text.append(line[i:start])
+        token = match.group()
+        i = end
+        if token == "|":
+            cells.append(_cell_text("".join(text), codes))
+            codes = []
+            text = []
+        elif token[0] == "\\":
+            text.append(chr(ord(token[1]) + _ESCAPED_OFFSET))
+        else:
+            # A code span ends with a run of exactly the same number of backticks.
+            close = line.find(token, end)
+            while close != -1 and (
+                line[close - 1] == "`"
+                or line[close + len(token) : close + len(token) + 1] == "`"
+            ):
+                close = line.find(token, _BACKTICKS_RE.match(line, close).end())
+            if close == -1:
+                text.append(token)
+                continue
+            text.append(_CODE)
+            codes.append(line[end:close])
+            i = close + len(token)
+    cells.append(_cell_text("".join(text), codes))
+    return cells
+
+
+def _is_separator(cells: List[str]) -> bool:
+    return all(SEPARATOR_CELL_RE.match(cell) for cell in cells)
+
+
+class TableParserFast(Parser):
+    def parse(self, content: str) -> List[List[List[str]]]:
+        """
+        Parse all markdown pipe tables from the given content and return them as lists of rows,
+        where each row is a list of cell strings.
+
+        The content is scanned once, line by line. A table starts at the beginning of a block with
+        a header row followed by an alignment row with the same number of cells, and ends at the
+        next blank line. Rows are padded or truncated to the number of header cells.
+        Tables inside fenced code blocks are ignored.
+        """
+        tables: List[List[List[str]]] = []
+        table: Optional[List[List[str]]] = None
+        header: Optional[List[str]] = None
+        fence: Optional[str] = None
+        block_start = True
+
+        for line in content.splitlines():
+            line = line.strip()
+
+            if fence is not None:
+                if line.startswith(fence):
+                    fence = None
+                    block_start = True
+                continue
+
+            if table is not None:
+                if line:
+                    row = _split_row(line)
+                    num_cols = len(table[0])
+                    row = row[:num_cols] + [""] * (num_cols - len(row))
+                    table.append(row)
+                    continue
+                tables.append(table)
+                table = None
+
+            if header is not None and "-" in line:
+                separator = _split_row(line)
+                if len(separator) == len(header) and _is_separator(separator):
+                    table = [header]
+                    header = None
+                    continue
+            header = None
+
+            fence_match = FENCE_RE.match(line)
+            if fence_match:
+                fence = fence_match.group(1)
+                continue
+
+            if block_start and "|" in line and not line.startswith("#"):
+                header = _split_row(line)
+            block_start = not line or line.startswith("#")
+
+        if table is not None:
+            tables.append(table)
+        return tables
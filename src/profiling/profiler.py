@@ -0,0 +1,139 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Iterator, List, Optional, Tuple
+
+# Timings of a file: seconds by stage.
+FileTimings = Dict[str, float]
+# Recorded stages as (name, seconds, calls).
+StageTimings = List[Tuple[str, float, int]]
+
+_NULL_CONTEXT = nullcontext()
+
+
+class Profiler:
+    """
+    Records the wall time and call count of build stages, in total and per file.
+
+    Stages recorded while a file is set with `file` are also attributed to that file.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.files: Dict[str, FileTimings] = {}
+        self.current_file: Optional[str] = None
+        self.start = time.perf_counter()
+
+    def add(self, name: str, seconds: float, calls: int = 1) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+        if self.current_file is not None:
+            timings = self.files.setdefault(self.current_file, {})
+            timings[name] = timings.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    @contextmanager
+    def file(self, md_file: str) -> Iterator[None]:
+        """Attribute the stages of the enclosed block to a file."""
+        previous = self.current_file
+        self.current_file = md_file
+        try:
+            yield
+        finally:
+            self.current_file = previous
+
+    def take(self) -> StageTimings:
+        """Return the recorded stages as (name, seconds, calls) and reset them."""
+        stages = [
+            (name, seconds, self.calls[name]) for name, seconds in self.seconds.items()
+        ]
+        self.seconds = {}
+        self.calls = {}
+        self.files = {}
+        return stages
+
+    def merge(self, stages: StageTimings, md_file: Optional[str] = None) -> None:
+        """Add stages taken from another profiler, e.g. of a worker process."""
+        with self.file(md_file) if md_file is not None else _NULL_CONTEXT:
+            for name, seconds, calls in stages:
+                self.add(name, seconds, calls)
+
+    def to_dict(self) -> Dict:
+        return {
+            "wall_seconds": time.perf_counter() - self.start,
+            "stages": {
+                name: {"seconds": seconds, "calls": self.calls[name]}
+                for name, seconds in sorted(
+                    self.seconds.items(), key=lambda item: -item[1]
+                )
+            },
+            # The slowest files first.
+            "files": dict(
+                sorted(self.files.items(), key=lambda item: -sum(item[1].values()))
+            ),
+        }
+
+    def write(self, report_file: str) -> None:
+        with open(report_file, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def __str__(self) -> str:
+        return ", ".join(
+            f"{name} {seconds:.3f} s ({self.calls[name]} calls)"
+            for name, seconds in sorted(self.seconds.items(), key=lambda item: -item[1])
+        )
+
+
+class NullProfiler:
+    """Profiler used when profiling is disabled. Its methods do nothing."""
+
+    enabled = False
+
+    def stage(self, name: str) -> ContextManager[None]:
+        return _NULL_CONTEXT
+
+    def file(self, md_file: str) -> ContextManager[None]:
+        return _NULL_CONTEXT
+
+    def take(self) -> StageTimings:
+        return []
+
+    def merge(self, stages: StageTimings, md_file: Optional[str] = None) -> None:
+        pass
+
+
+_profiler = NullProfiler()
+
+
+def get_profiler():
+    """Return the profiler of this process."""
+    return _profiler
+
+
+def enable() -> Profiler:
+    """Start recording stages in this process and return the profiler."""
+    global _profiler
+    if not isinstance(_profiler, Profiler):
+        _profiler = Profiler()
+    return _profiler
+
+
+def file(md_file: str) -> ContextManager[None]:
+    """Attribute the stages of the enclosed block to a file. Does nothing if profiling is disabled."""
+    return _profiler.file(md_file)
+
+
+def stage(name: str) -> ContextManager[None]:
+    """Time the enclosed block as a stage. Does nothing if profiling is disabled."""
+    return _profiler.stage(name)
@@ -0,0 +1,54 @@
+import os
+from typing import List
+from models.models import Flashcard, NoteMetadata
+from note_processor import processor
+from note_processor.table_masker_hidden_vectors import TableMaskerHiddenVectors
+from note_processor.table_parser_fast import TableParserFast
+
+TABLE = "| | A | B |\n|---|---|---|\n| x | 1 | 2 |\n| y | 3 | 4 |"
+
+
+def make_metadata(id: str, deck: str = "Deck", **options) -> NoteMetadata:
+    """Return the metadata of a note with the table parser and masker, and the given options."""
+    values = dict(
+        id=id,
+        name=id,
+        deck=deck,
+        parser=TableParserFast(),
+        masker=TableMaskerHiddenVectors(),
+        mask_row_header=False,
+        mask_col_header=False,
+        shuffle_rows=False,
+        shuffle_cols=False,
+    )
+    values.update(options)
+    return NoteMetadata(**values)
+
+
+def make_cards(
+    id: str, deck: str = "Deck", table: str = TABLE, **options
+) -> List[Flashcard]:
+    """Return the flashcards of a note holding table, see make_metadata."""
+    return processor.process(table, make_metadata(id, deck, **options))
+
+
+def write_note(
+    folder: str, name: str, id: str, deck: str = "Deck", table: str = TABLE, **options
+) -> str:
+    """Write a markdown note holding table, with the given frontmatter options. Returns its path."""
+    frontmatter = dict(
+        id=id,
+        deck=deck,
+        parser="table_fast",
+        masker="vectors",
+        mask_row_headers="false",
+        mask_col_headers="false",
+        shuffle_rows="false",
+        shuffle_cols="false",
+    )
+    frontmatter.update(options)
+    lines = ["---"] + [f"{key}: {value}" for key, value in frontmatter.items()]
+    path = os.path.join(folder, name)
+    with open(path, "w") as f:
+        f.write("\n".join(lines + ["---", "", table, ""]))
+    return path
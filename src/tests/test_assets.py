@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+import unittest
+import zipfile
+from deck_builder import assets, deck_builder
+from tests.helpers import make_cards
+
+
+class TestAssets(unittest.TestCase):
+    def test_minify_css(self):
+        css = '/* Base */\n.card ,\ntd > b {\n  font-family: "A  B, C";\n  margin: 0 auto; /* x */\n}\n'
+        self.assertEqual(
+            assets.minify_css(css), '.card,td>b{font-family:"A  B, C";margin:0 auto}'
+        )
+
+    def test_minify_js(self):
+        js = 'var a = "x  // y"; // comment\nvar b = a\nreturn {\n  c: a + b,\n};\n'
+        self.assertEqual(
+            assets.minify_js(js), 'var a="x  // y";var b=a\nreturn{c:a + b,};'
+        )
+
+    def test_shared_script_is_added_to_the_package(self):
+        with tempfile.TemporaryDirectory() as folder:
+            output_file = os.path.join(folder, "out.apkg")
+            asset_folder = os.path.join(folder, "assets")
+            name, content = assets.get_bundle()
+
+            def build(cards):
+                return deck_builder.build_anki_package(
+                    cards,
+                    "parent",
+                    output_file,
+                    timestamp=1700000000,
+                    assets_folder=asset_folder,
+                )
+
+            build(make_cards("a", shuffle_rows=True, shuffle_cols=True))
+            with zipfile.ZipFile(output_file) as inzip:
+                media = json.loads(inzip.read("media"))
+                self.assertEqual(list(media.values()), [name])
+                self.assertEqual(inzip.read(next(iter(media))).decode(), content)
+            self.assertEqual(os.listdir(asset_folder), [name])
+            # The script is not written again, so the package is unchanged.
+            self.assertTrue(
+                build(make_cards("a", shuffle_rows=True, shuffle_cols=True)).unchanged
+            )
+
+            build(make_cards("a", "Deck"))
+            with zipfile.ZipFile(output_file) as inzip:
+                self.assertEqual(json.loads(inzip.read("media")), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
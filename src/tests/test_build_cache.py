@@ -0,0 +1,97 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+import main
+from cache import build_cache
+from cache.build_cache import BuildCache
+from note_processor import processor
+from tests.helpers import TABLE, make_cards, make_metadata, write_note
+
+
+class TestBuildCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.cache = BuildCache(os.path.join(self.folder.name, "cache"))
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def entries(self):
+        return sorted(path.stem for path in self.cache.entries_folder.iterdir())
+
+    def test_key_depends_on_content_options_and_code(self):
+        key = self.cache.get_key(TABLE, make_metadata("a"))
+        self.assertEqual(key, self.cache.get_key(TABLE, make_metadata("a")))
+        self.assertNotEqual(key, self.cache.get_key(TABLE + " ", make_metadata("a")))
+        self.assertNotEqual(
+            key, self.cache.get_key(TABLE, make_metadata("a", shuffle_rows=True))
+        )
+        self.assertNotEqual(
+            key, self.cache.get_key(TABLE, make_metadata("a", layout="split"))
+        )
+        with mock.patch.object(build_cache, "get_code_version", return_value="new"):
+            self.assertNotEqual(key, self.cache.get_key(TABLE, make_metadata("a")))
+
+    def test_store_and_load(self):
+        cards = make_cards("a")
+        self.assertIsNone(self.cache.load("key"))
+        self.cache.store("key", cards)
+        loaded = self.cache.load("key")
+        self.assertEqual(
+            [(card.metadata.id, card.front, card.back) for card in loaded],
+            [(card.metadata.id, card.front, card.back) for card in cards],
+        )
+        self.assertEqual(str(self.cache), "1 hits, 1 misses, 0 evicted")
+
+    def test_save_evicts_the_entries_not_used(self):
+        for key in ("a", "b", "c"):
+            self.cache.store(key, [])
+        self.cache.record("a.md", "a")
+        self.cache.record("b.md", "b")
+        self.cache.save()
+        self.assertEqual(self.entries(), ["a", "b"])
+
+        # A new build only uses the entries it records.
+        cache = BuildCache(self.cache.cache_folder)
+        cache.record("a.md", "a")
+        cache.record("b.md", "b")
+        cache.forget("b.md")
+        cache.save()
+        self.assertEqual(self.entries(), ["a"])
+        self.assertEqual(cache.evicted, 1)
+
+    def test_corrupt_entry_is_a_miss(self):
+        self.cache.store("key", make_cards("a"))
+        with open(self.cache.entries_folder / "key.pickle", "wb") as f:
+            f.write(b"not a pickle")
+        with self.assertLogs(level=logging.WARNING):
+            self.assertIsNone(self.cache.load("key"))
+        self.assertEqual(self.cache.misses, 1)
+        self.cache.store("key", [])
+        self.assertEqual(self.cache.load("key"), [])
+
+    def test_warnings_are_logged_again_on_a_hit(self):
+        md_file = write_note(self.folder.name, "a.md", "a")
+        process = processor.process
+
+        def process_with_warning(content, note_metadata):
+            logging.getLogger("note").warning("Odd table")
+            logging.getLogger("note").info("Not kept")
+            return process(content, note_metadata)
+
+        def build():
+            with self.assertLogs(level=logging.INFO) as logs:
+                files = main.process_markdown_files([md_file], self.cache)
+                self.assertEqual(len(list(files)), 1)
+            return [line for line in logs.output if ":note:" in line]
+
+        with mock.patch.object(processor, "process", process_with_warning):
+            self.assertEqual(build(), ["WARNING:note:Odd table", "INFO:note:Not kept"])
+        self.assertEqual(build(), ["WARNING:note:Odd table"])
+        self.assertEqual(self.cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
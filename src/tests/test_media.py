@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from models.models import Flashcard
+from note_processor.media import embed_media
+from vault.media_library import MediaLibrary
+
+
+class TestMedia(unittest.TestCase):
+    def test_embed_media(self):
+        media = []
+        text = embed_media(
+            'a ![[diagram.png|200]] b ![alt](img/x.png "title") ![[diagram.png]]',
+            media,
+        )
+        self.assertEqual(
+            text,
+            'a <img src="diagram.png"> b <img src="img/x.png"> <img src="diagram.png">',
+        )
+        self.assertEqual(media, ["diagram.png", "img/x.png"])
+        self.assertEqual(
+            embed_media("[[link]] and ![not an image", media),
+            "[[link]] and ![not an image",
+        )
+
+    def test_attach_deduplicates_by_content(self):
+        with tempfile.TemporaryDirectory() as vault:
+            os.makedirs(os.path.join(vault, "attachments"))
+            for path in ["attachments/a.png", "b.png"]:
+                with open(os.path.join(vault, path), "wb") as f:
+                    f.write(b"same content")
+            md_file = os.path.join(vault, "note.md")
+            card = Flashcard(
+                front='<img src="a.png"><img src="b.png"><img src="c.png">',
+                back="",
+                metadata=None,
+                media=["a.png", "b.png", "c.png"],
+            )
+            library = MediaLibrary(vault)
+            with self.assertLogs(level="WARNING"):
+                (attached,) = library.attach(md_file, [card])
+
+            (name,) = library.files
+            self.assertTrue(name.endswith(".png"))
+            self.assertEqual(
+                attached.front,
+                f'<img src="{name}"><img src="{name}"><img src="c.png">',
+            )
+            self.assertEqual(attached.media, [name, name])
+            self.assertEqual(card.media, ["a.png", "b.png", "c.png"])
+
+    def test_references_stay_in_the_vault(self):
+        with tempfile.TemporaryDirectory() as root:
+            vault = os.path.join(root, "vault")
+            os.makedirs(os.path.join(vault, "notes", "img"))
+            for path in ["secret.png", "vault/notes/img/logo.png"]:
+                with open(os.path.join(root, path), "wb") as f:
+                    f.write(path.encode())
+            md_file = os.path.join(vault, "notes", "note.md")
+            library = MediaLibrary(vault)
+
+            self.assertEqual(
+                library.find(md_file, "logo.png"),
+                os.path.join(vault, "notes", "img", "logo.png"),
+            )
+            self.assertIsNone(library.find(md_file, os.path.join(root, "secret.png")))
+            self.assertIsNone(library.find(md_file, "../../secret.png"))
+            # Only bare file names are looked up anywhere in the vault.
+            self.assertIsNone(library.find(md_file, "other/logo.png"))
+
+            url = "https://example.com/logo.png"
+            card = Flashcard(
+                front=f'<img src="{url}">', back="", metadata=None, media=[url]
+            )
+            with self.assertNoLogs(level="WARNING"):
+                (attached,) = library.attach(md_file, [card])
+            self.assertEqual(attached.front, card.front)
+            self.assertEqual(library.files, {})
+
+    def test_reset_forgets_the_media_used(self):
+        with tempfile.TemporaryDirectory() as vault:
+            with open(os.path.join(vault, "a.png"), "wb") as f:
+                f.write(b"a")
+            card = Flashcard(
+                front='<img src="a.png">', back="", metadata=None, media=["a.png"]
+            )
+            library = MediaLibrary(vault)
+            list(library.attach(os.path.join(vault, "note.md"), [card]))
+            self.assertEqual(len(library.used), 1)
+            library.reset()
+            self.assertEqual(library.used, {})
+            self.assertEqual(library.files, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
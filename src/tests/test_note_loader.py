@@ -0,0 +1,103 @@
+import io
+import os
+import tempfile
+import unittest
+import yaml
+from vault.note_loader import NoteLoader, parse_simple_frontmatter, read_frontmatter
+
+NOTE = """---
+id: net
+deck: Networking
+parser: table
+masker: vectors
+mask_row_headers: false
+mask_col_headers: true
+shuffle_rows: false
+shuffle_cols: false
+hints: Protocols
+---
+
+| a | b |
+|---|---|
+| 1 | 2 |
+"""
+
+
+class TestNoteLoader(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.loader = NoteLoader()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def write(self, content: str) -> str:
+        md_file = os.path.join(self.folder.name, "note.md")
+        with open(md_file, "w") as f:
+            f.write(content)
+        return md_file
+
+    def test_load_valid_note(self):
+        raw, note_metadata, content = self.loader.load(self.write(NOTE))
+        self.assertEqual(raw, NOTE)
+        self.assertEqual(content, "| a | b |\n|---|---|\n| 1 | 2 |")
+        self.assertEqual(note_metadata.name, "note")
+        self.assertEqual(note_metadata.deck, "Networking")
+        self.assertTrue(note_metadata.mask_col_header)
+        self.assertEqual(note_metadata.hints, ["Protocols"])
+        self.assertIsNone(note_metadata.page_rows)
+
+        loader = NoteLoader(page_rows=20)
+        _, note_metadata, _ = loader.load(self.write(NOTE + "page_rows: 5\n"))
+        self.assertEqual(note_metadata.page_rows, 20)
+        _, note_metadata, _ = loader.load(
+            self.write(NOTE.replace("hints:", "page_rows: 5\nhints:"))
+        )
+        self.assertEqual(note_metadata.page_rows, 5)
+
+    def test_reject_invalid_metadata(self):
+        for old, new in [
+            ("id: net", "id: 1"),
+            ("parser: table", "parser: csv"),
+            ("shuffle_rows: false", "shuffle_rows: 'no'"),
+            ("shuffle_cols: false\n", ""),
+            ("mask_col_headers: true", "mask_col_headers: ["),
+            ("hints: Protocols", "page_rows: 0"),
+        ]:
+            with self.subTest(new=new), self.assertLogs(level="WARNING"):
+                self.assertIsNone(self.loader.load(self.write(NOTE.replace(old, new))))
+
+    def test_simple_frontmatter_matches_yaml(self):
+        for header in [
+            "id: net-1\ndeck: Computer Networks\nshuffle_rows: yes\nhints:\n",
+            "on: Off\nmasker: NULL\nhints:\n  - Layer 2\n  - no\nid: x\n",
+            "hints:\n- a.b/c\n\nid: x\n",
+        ]:
+            with self.subTest(header=header):
+                self.assertEqual(
+                    parse_simple_frontmatter(header), yaml.safe_load(header)
+                )
+        for header in [
+            "id: 1",
+            "id: 'x'",
+            "deck: a: b",
+            "# comment\nid: x",
+            "hints:\n  - a\n    - b",
+            "id: x\n  - a",
+        ]:
+            with self.subTest(header=header):
+                self.assertIsNone(parse_simple_frontmatter(header))
+
+    def test_read_frontmatter_stops_after_block(self):
+        f = io.StringIO("\n---\nid: x\n---\nbody\n")
+        header, lines = read_frontmatter(f)
+        self.assertEqual(header, "id: x\n")
+        self.assertEqual("".join(lines), "\n---\nid: x\n---\n")
+        self.assertEqual(f.read(), "body\n")
+
+        f = io.StringIO("text\n---\nid: x\n---\n")
+        self.assertEqual(read_frontmatter(f), (None, ["text\n"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import itertools
+import json
+import unittest
+from deck_builder import note_type_registry
+from models.models import Flashcard, FlashcardMetadata
+from tests.helpers import make_cards
+
+
+def render_template(template: str, fields: dict) -> str:
+    """Substitute the fields of a template, like Anki does for plain field references."""
+    for name, value in fields.items():
+        template = template.replace("{{" + name + "}}", value)
+    return template
+
+
+class TestNoteTypes(unittest.TestCase):
+    def test_split_layout_renders_like_inline(self):
+        for shuffle_rows, shuffle_cols in itertools.product([False, True], repeat=2):
+            inline = note_type_registry.get_note_type(shuffle_rows, shuffle_cols)
+            split = note_type_registry.get_note_type(
+                shuffle_rows, shuffle_cols, "split"
+            )
+            self.assertNotEqual(inline.model_id, split.model_id)
+
+            card = Flashcard(
+                front="<table>front</table>",
+                back="<table>back</table>",
+                metadata=FlashcardMetadata(
+                    id="1",
+                    deck="Deck",
+                    shuffle_rows=shuffle_rows,
+                    shuffle_cols=shuffle_cols,
+                    note_type=split,
+                ),
+                header="Note",
+                hints=["first hint", "second hint"],
+            )
+            inline_fields = dict(zip(["Front", "Back"], inline.fields_for(card)))
+            split_fields = dict(
+                zip([field["name"] for field in split.fields], split.fields_for(card))
+            )
+            for key in ("qfmt", "afmt"):
+                with self.subTest(rows=shuffle_rows, cols=shuffle_cols, side=key):
+                    self.assertEqual(
+                        render_template(split.templates[0][key], split_fields),
+                        render_template(inline.templates[0][key], inline_fields),
+                    )
+
+    def test_note_per_table_makes_a_card_per_vector(self):
+        inline_cards = make_cards("a", "Deck")
+        (card,) = make_cards("a", layout="note_per_table")
+        self.assertEqual(card.metadata.id, "a-t0")
+        self.assertEqual(card.vectors, ["r1", "r2", "c1", "c2"])
+        self.assertEqual(len(card.vectors), len(inline_cards))
+        self.assertIn(
+            '<td class="table_body r1 c1"><span class="cell">1</span>', card.front
+        )
+
+        note_type = card.metadata.note_type
+        fields = dict(
+            zip(
+                [field["name"] for field in note_type.fields],
+                note_type.fields_for(card),
+            )
+        )
+        self.assertEqual(fields["V2"], "r2")
+        self.assertEqual(fields["V5"], "")
+        # The card of an empty vector field is empty, so Anki does not make it.
+        template = note_type.templates[1]
+        self.assertTrue(template["qfmt"].startswith("{{#V2}}"))
+        self.assertTrue(template["qfmt"].endswith("{{/V2}}"))
+        question = render_template(template["qfmt"], fields)
+        self.assertIn("<style>td.r2 > .cell {", question)
+        self.assertIn(card.front, question)
+
+    def test_build_shuffle_mode(self):
+        for layout in ("inline", "note_per_table"):
+            cards = make_cards(
+                "a",
+                layout=layout,
+                shuffle_rows=True,
+                shuffle_cols=True,
+                shuffle_mode="build",
+            )
+            with self.subTest(layout=layout):
+                note_type = cards[0].metadata.note_type
+                self.assertEqual(note_type.fields[-1]["name"], "Shuffle")
+                self.assertIn(
+                    'id="shuffle">{{Shuffle}}', note_type.templates[0]["qfmt"]
+                )
+                variants = json.loads(cards[0].shuffle)
+                for rows, cols in variants:
+                    self.assertEqual(sorted(rows), [1, 2])
+                    self.assertEqual(sorted(cols), [1, 2])
+                self.assertEqual(note_type.fields_for(cards[0])[-1], cards[0].shuffle)
+                # The orders only depend on the note.
+                again = make_cards(
+                    "a",
+                    layout=layout,
+                    shuffle_rows=True,
+                    shuffle_cols=True,
+                    shuffle_mode="build",
+                )
+                self.assertEqual(again[0].shuffle, cards[0].shuffle)
+
+
+if __name__ == "__main__":
+    unittest.main()
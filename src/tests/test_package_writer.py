@@ -0,0 +1,176 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+import zipfile
+from deck_builder import deck_builder
+from deck_builder.package_writer import read_fingerprint
+from tests.helpers import TABLE, make_cards
+
+
+class TestPackageWriter(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.folder.name, "out.apkg")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def build(self, cards, **kwargs):
+        return deck_builder.build_anki_package(
+            cards, "parent", self.output_file, timestamp=1700000000, **kwargs
+        )
+
+    def read(self) -> bytes:
+        with open(self.output_file, "rb") as f:
+            return f.read()
+
+    def query(self, sql: str) -> list:
+        """Run a query on the collection of the package."""
+        db_file = os.path.join(self.folder.name, "collection.anki2")
+        with zipfile.ZipFile(self.output_file) as inzip:
+            inzip.extract("collection.anki2", self.folder.name)
+        conn = sqlite3.connect(db_file)
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+            os.remove(db_file)
+
+    def test_deterministic_and_skipped_if_unchanged(self):
+        self.assertFalse(self.build(make_cards("a", "Deck")).unchanged)
+        first = self.read()
+        os.remove(self.output_file)
+        self.build(make_cards("a", "Deck"))
+        self.assertEqual(self.read(), first)
+
+        mtime = os.stat(self.output_file).st_mtime_ns
+        self.assertTrue(self.build(make_cards("a", "Deck")).unchanged)
+        self.assertEqual(os.stat(self.output_file).st_mtime_ns, mtime)
+
+        self.assertFalse(self.build(make_cards("b", "Deck")).unchanged)
+        self.assertNotEqual(self.read(), first)
+
+    def test_compress_level(self):
+        self.build(make_cards("a", "Deck"))
+        stored = read_fingerprint(self.output_file)
+        self.assertFalse(
+            self.build(make_cards("a", "Deck"), compress_level=9).unchanged
+        )
+        self.assertNotEqual(read_fingerprint(self.output_file), stored)
+        with zipfile.ZipFile(self.output_file) as inzip:
+            info = inzip.getinfo("collection.anki2")
+            self.assertEqual(info.compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(info.date_time, (1980, 1, 1, 0, 0, 0))
+            self.assertLess(info.compress_size, info.file_size)
+
+    def test_update_adds_changes_and_removes_notes(self):
+        def guids(prefix):
+            return [f"{prefix}-{idx}" for idx in range(4)]
+
+        def note_ids():
+            return dict(self.query("SELECT guid, id FROM notes"))
+
+        def check_cards():
+            # Every note has its card, and no card is left without its note.
+            self.assertEqual(
+                self.query(
+                    "SELECT COUNT(*) FROM notes LEFT JOIN cards ON cards.nid = notes.id "
+                    "GROUP BY notes.id HAVING COUNT(cards.id) != 1"
+                ),
+                [],
+            )
+            self.assertEqual(
+                self.query(
+                    "SELECT COUNT(*) FROM cards WHERE nid NOT IN (SELECT id FROM notes)"
+                ),
+                [(0,)],
+            )
+
+        report = self.build(make_cards("a") + make_cards("b"), update=True)
+        self.assertEqual(str(report), "8 added, 0 changed, 0 removed")
+        check_cards()
+        before = note_ids()
+        self.assertTrue(
+            self.build(make_cards("a") + make_cards("b"), update=True).unchanged
+        )
+
+        changed_table = TABLE.replace("4", "5")
+        report = self.build(
+            make_cards("a", table=changed_table) + make_cards("c"), update=True
+        )
+        self.assertEqual(report.added, guids("c"))
+        self.assertEqual(report.changed, guids("a"))
+        self.assertEqual(report.removed, guids("b"))
+        check_cards()
+        after = note_ids()
+        self.assertEqual(sorted(after), guids("a") + guids("c"))
+        # The changed notes are updated in place.
+        self.assertEqual(
+            {guid: after[guid] for guid in guids("a")},
+            {guid: before[guid] for guid in guids("a")},
+        )
+        ((fields,),) = self.query("SELECT flds FROM notes WHERE guid = 'a-0'")
+        self.assertIn("5", fields)
+        self.assertNotIn("4", fields)
+
+        # Moved to another deck, the cards follow.
+        report = self.build(
+            make_cards("a", "Other", table=changed_table) + make_cards("c"),
+            update=True,
+        )
+        self.assertEqual(str(report), "0 added, 4 changed, 0 removed")
+        ((decks_json,),) = self.query("SELECT decks FROM col")
+        deck_ids = {
+            deck["name"]: deck["id"] for deck in json.loads(decks_json).values()
+        }
+        self.assertEqual(
+            self.query(
+                "SELECT guid, did FROM notes JOIN cards ON cards.nid = notes.id "
+                "ORDER BY guid"
+            ),
+            [(guid, deck_ids["parent::Other"]) for guid in guids("a")]
+            + [(guid, deck_ids["parent::Deck"]) for guid in guids("c")],
+        )
+
+        # With another model, the notes and their cards are written again.
+        cards = make_cards("a", "Other", table=changed_table, layout="split")
+        report = self.build(cards + make_cards("c"), update=True)
+        self.assertEqual(str(report), "0 added, 4 changed, 0 removed")
+        check_cards()
+        rewritten = note_ids()
+        self.assertTrue(all(rewritten[guid] != after[guid] for guid in guids("a")))
+        model_id = cards[0].metadata.note_type.create_model().model_id
+        self.assertEqual(
+            self.query("SELECT DISTINCT mid FROM notes WHERE guid LIKE 'a-%'"),
+            [(model_id,)],
+        )
+
+    def test_update_makes_the_cards_of_changed_vectors(self):
+        def build(table):
+            cards = make_cards("a", table=table, layout="note_per_table")
+            return self.build(cards, update=True)
+
+        def card_ords():
+            return [ord for (ord,) in self.query("SELECT ord FROM cards ORDER BY ord")]
+
+        build("| | A | B |\n|---|---|---|\n| x | 1 | 2 |")
+        self.assertEqual(card_ords(), [0, 1, 2])
+        ((card_id,),) = self.query("SELECT id FROM cards WHERE ord = 0")
+
+        report = build(
+            "| | A | B | C |\n|---|---|---|---|\n| x | 1 | 2 | 3 |\n| y | 4 | 5 | 6 |"
+        )
+        self.assertEqual(str(report), "0 added, 1 changed, 0 removed")
+        self.assertEqual(card_ords(), [0, 1, 2, 3, 4])
+        # The cards which still have a vector are kept.
+        self.assertEqual(self.query("SELECT id FROM cards WHERE ord = 0"), [(card_id,)])
+
+        build("| | A |\n|---|---|\n| x | 1 |")
+        self.assertEqual(card_ords(), [0, 1])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM notes"), [(1,)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import main
+from deck_builder import deck_builder
+from profiling import profiler
+from vault.index import VaultIndex
+from vault.media_library import MediaLibrary
+from cache.build_cache import BuildCache
+from tests.helpers import TABLE, write_note
+
+STAGES = {
+    "frontmatter",
+    "index",
+    "cache",
+    "parse",
+    "media",
+    "mask",
+    "build",
+    "media_files",
+    "write_notes",
+    "write_package",
+}
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.vault = os.path.join(self.folder.name, "vault")
+        os.mkdir(self.vault)
+        rows = "".join(f"\n| r{i} | {i} | {i} |" for i in range(100))
+        self.md_files = [
+            write_note(self.vault, "a.md", "a"),
+            write_note(self.vault, "b.md", "b", table=TABLE + rows),
+        ]
+        # Every test starts with profiling disabled, as a build does.
+        patcher = mock.patch.object(profiler, "_profiler", profiler.NullProfiler())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def build(self, workers=1):
+        cards = main.generate_flashcards(
+            self.vault,
+            BuildCache(os.path.join(self.folder.name, f"cache{workers}")),
+            workers,
+            MediaLibrary(self.vault),
+            index=VaultIndex(":memory:"),
+        )
+        deck_builder.build_anki_package(
+            cards, "parent", os.path.join(self.folder.name, f"{workers}.apkg")
+        )
+
+    def test_profiled_build_reports_every_stage_and_file(self):
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                profiler.enable()
+                self.build(workers)
+                report = profiler.get_profiler().to_dict()
+                self.assertEqual(set(report["stages"]), STAGES)
+                self.assertEqual(report["stages"]["frontmatter"]["calls"], 2)
+                self.assertEqual(report["stages"]["parse"]["calls"], 2)
+                self.assertEqual(set(report["files"]), set(self.md_files))
+                for timings in report["files"].values():
+                    self.assertLessEqual({"frontmatter", "parse", "mask"}, set(timings))
+                profiler.get_profiler().take()
+
+    def test_report_lists_the_slowest_files_first(self):
+        recorder = profiler.Profiler()
+        recorder.merge([("parse", 0.1, 1), ("mask", 0.1, 1)], "a.md")
+        recorder.merge([("parse", 0.3, 1)], "b.md")
+        recorder.merge([("parse", 0.05, 1)], "c.md")
+        recorder.add("write_package", 1.0)
+        report = recorder.to_dict()
+        self.assertEqual(list(report["files"]), ["b.md", "a.md", "c.md"])
+        self.assertEqual(list(report["stages"]), ["write_package", "parse", "mask"])
+        self.assertEqual(report["stages"]["parse"], {"seconds": 0.45, "calls": 3})
+
+    def test_disabled_profiler_records_nothing(self):
+        self.build()
+        recorder = profiler.get_profiler()
+        self.assertIsInstance(recorder, profiler.NullProfiler)
+        self.assertFalse(recorder.enabled)
+        self.assertEqual(recorder.take(), [])
+        # The same context is returned every time, nothing is allocated per call.
+        self.assertIs(profiler.stage("parse"), profiler.file("a.md"))
+
+
+if __name__ == "__main__":
+    unittest.main()
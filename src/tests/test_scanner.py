@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+from vault.scanner import IGNORE_FILE, IgnoreRules, scan_markdown_files
+
+FILES = [
+    "a.md",
+    "notes.txt",
+    ".obsidian/workspace.md",
+    "sub/b.md",
+    "sub/draft.md",
+    "sub/deep/c.md",
+    "templates/t.md",
+    "templates/keep.md",
+]
+
+
+class TestScanner(unittest.TestCase):
+    def test_ignore_rules(self):
+        rules = IgnoreRules(
+            ["# comment", "*.tmp", "build/", "/top.md", "docs/**/z.md", "!keep.tmp"]
+        )
+        self.assertTrue(rules.ignored("x/y.tmp", False))
+        self.assertFalse(rules.ignored("x/keep.tmp", False))
+        self.assertTrue(rules.ignored("x/build", True))
+        self.assertFalse(rules.ignored("x/build", False))
+        self.assertTrue(rules.ignored("top.md", False))
+        self.assertFalse(rules.ignored("sub/top.md", False))
+        self.assertTrue(rules.ignored("docs/z.md", False))
+        self.assertTrue(rules.ignored("docs/a/b/z.md", False))
+
+    def test_scan_matches_os_walk_and_prunes(self):
+        with tempfile.TemporaryDirectory() as vault:
+            for path in FILES:
+                path = os.path.join(vault, path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                open(path, "w").close()
+
+            walked = [
+                os.path.join(root, file)
+                for root, dirs, files in os.walk(vault)
+                if ".obsidian" not in root
+                for file in files
+                if file.endswith(".md")
+            ]
+            self.assertEqual(list(scan_markdown_files(vault)), walked)
+
+            with open(os.path.join(vault, IGNORE_FILE), "w") as f:
+                f.write("templates/\ndraft.md\n")
+            rules = IgnoreRules.load(vault, ["deep/"])
+            self.assertEqual(
+                list(scan_markdown_files(vault, rules)),
+                [os.path.join(vault, "a.md"), os.path.join(vault, "sub", "b.md")],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+from deck_builder import assets, sharding
+from tests.helpers import make_cards
+
+
+class TestSharding(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.folder.name, "out.apkg")
+        self.cards = make_cards("a", "Net::Sub") + make_cards("b", "Other")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def build(self, cards, shard_by):
+        shards = sharding.build_sharded_packages(
+            cards, "parent", self.output_file, shard_by=shard_by
+        )
+        with open(sharding.get_manifest_filename(self.output_file)) as f:
+            manifest = json.load(f)
+        self.assertEqual(
+            [shard["file"] for shard in manifest["shards"]],
+            [shard.file for shard in shards],
+        )
+        return shards
+
+    def test_shard_by_deck(self):
+        shards = self.build(self.cards, "deck")
+        self.assertEqual(
+            [shard.file for shard in shards], ["out.Net.apkg", "out.Other.apkg"]
+        )
+        self.assertEqual([shard.notes for shard in shards], [4, 4])
+        self.assertEqual(shards[0].decks, ["Net::Sub"])
+        for shard in shards:
+            self.assertTrue(os.path.exists(os.path.join(self.folder.name, shard.file)))
+
+        # Only the shard whose flashcards changed is marked as changed.
+        cards = make_cards("a", "Net::Sub") + make_cards("c", "Other")
+        shards = self.build(cards, "deck")
+        self.assertEqual([shard.changed for shard in shards], [False, True])
+
+        # Packages of shards which no longer exist are deleted.
+        self.build(make_cards("b", "Other"), "deck")
+        self.assertFalse(os.path.exists(os.path.join(self.folder.name, "out.Net.apkg")))
+
+    def test_shard_by_notes(self):
+        shards = self.build(self.cards, 3)
+        self.assertEqual([shard.notes for shard in shards], [3, 3, 2])
+        self.assertEqual(shards[1].decks, ["Net::Sub", "Other"])
+
+    def test_workers_write_the_script_to_the_assets_folder(self):
+        asset_folder = os.path.join(self.folder.name, "assets")
+        cards = make_cards("a", "Net", shuffle_rows=True) + make_cards(
+            "b", "Other", shuffle_rows=True
+        )
+        shards = sharding.build_sharded_packages(
+            cards, "parent", self.output_file, workers=2, assets_folder=asset_folder
+        )
+        self.assertEqual([shard.media for shard in shards], [0, 0])
+        name, _ = assets.get_bundle()
+        self.assertEqual(os.listdir(asset_folder), [name])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,11 @@
+import unittest
+from benchmarks.bench_startup import get_startup_modules
+
+
+class TestStartup(unittest.TestCase):
+    def test_heavy_modules_not_imported_at_startup(self):
+        self.assertEqual(get_startup_modules(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import re
+import unittest
+from deck_builder.note_type_table import TableNoteType
+from models.table import Table
+from note_processor import styler
+from note_processor.table_masker_hidden_vectors import TableMaskerHiddenVectors
+
+
+class TestCompiledTable(unittest.TestCase):
+    def setUp(self):
+        self.tables = [
+            [["", "EIGRP", "OSPF"], ["Hello", "5", "10"], ["Dead", "3", "8"]],
+            [["a"], ["1"], ["2"]],
+            [["a", "b", "c", "d"]],
+            [["", ""], ["x\ny", "multi\tline\ntext"]],
+        ]
+
+    def test_render_matches_render_table(self):
+        masker = TableMaskerHiddenVectors()
+        for table in self.tables:
+            compiled_table = styler.CompiledTable(Table(table))
+            self.assertEqual(compiled_table.render(), styler.render_table(table))
+            for views in masker.mask([table], True, True):
+                for view in views:
+                    with self.subTest(table=table, view=view):
+                        compiled_table = styler.CompiledTable(view.table)
+                        self.assertEqual(
+                            compiled_table.render(view), styler.render_table(view)
+                        )
+
+    def test_compact(self):
+        masker = TableMaskerHiddenVectors()
+        for table in self.tables:
+            unmasked_views, masked_views = masker.mask([table], True, True)
+            compiled_table = styler.CompiledTable(Table(table), compact=True)
+            for unmasked, masked in zip(unmasked_views, masked_views):
+                with self.subTest(table=table, view=masked):
+                    compact = compiled_table.render(unmasked)
+                    self.assertEqual(compact, styler.render_table(unmasked, True))
+                    self.assertNotIn("  <", compact)
+                    self.assertNotIn('class="masked"', compiled_table.render(masked))
+
+        # A mask has as many lines as the cell, and the last one is not empty, so it is shown.
+        for text, width in [("ab\tc\nd", 9), ("a", 1), ("a\n\nbc\n", 2)]:
+            with self.subTest(text=text):
+                mask = styler.get_masked_compact(text)
+                match = re.fullmatch(
+                    r'<span class="masked_compact" style="width:(\d+)ch">(.*)</span>',
+                    mask,
+                    re.S,
+                )
+                self.assertEqual(int(match.group(1)), width)
+                lines = match.group(2).split("\n")
+                self.assertEqual(len(lines), len(text.split("\n")))
+                self.assertEqual(lines[-1], "\u200b")
+        css = TableNoteType().css
+        self.assertIn(".masked_compact{display:inline-block;white-space:pre}", css)
+
+    def test_empty_table(self):
+        self.assertEqual(styler.CompiledTable(Table([])).render(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import itertools
+import unittest
+from collections import Counter
+from models.table import Table
+from note_processor import paginator, styler
+from note_processor.abstracts_factory import get_masker
+from note_processor.table_masker_budget import TableMaskerBudget
+from note_processor.table_masker_hidden_vectors import TableMaskerHiddenVectors
+
+
+class TestTableMaskerHiddenVectors(unittest.TestCase):
+    def setUp(self):
+        self.table = [
+            ["", "EIGRP", "OSPF"],
+            ["Hello", "5", "10"],
+            ["Dead", "3", "8"],
+        ]
+        self.masker = TableMaskerHiddenVectors()
+
+    def test_number_of_masked_tables(self):
+        unmasked, masked = self.masker.mask([self.table], True, True)
+        # 3 row masks + 3 column masks.
+        self.assertEqual(len(unmasked), 6)
+        self.assertEqual(len(masked), 6)
+        unmasked, masked = self.masker.mask([self.table], False, False)
+        self.assertEqual(len(unmasked), 4)
+        self.assertEqual(len(masked), 4)
+
+    def test_masked_row(self):
+        _, masked = self.masker.mask([self.table], False, False)
+        self.assertEqual(
+            list(masked[0]),
+            [
+                ["", "EIGRP", "OSPF"],
+                ["Hello", styler.get_masked("5"), styler.get_masked("10")],
+                ["Dead", "3", "8"],
+            ],
+        )
+
+    def test_masked_column(self):
+        unmasked, _ = self.masker.mask([self.table], False, False)
+        self.assertEqual(
+            list(unmasked[2]),
+            [
+                ["", "EIGRP", "OSPF"],
+                ["Hello", styler.get_unmasked("5"), "10"],
+                ["Dead", styler.get_unmasked("3"), "8"],
+            ],
+        )
+
+    def test_accepts_table_objects(self):
+        from_lists = self.masker.mask([self.table], True, True)
+        from_table = self.masker.mask([Table(self.table)], True, True)
+        for views, table_views in zip(from_lists, from_table):
+            self.assertEqual(
+                [list(view) for view in views], [list(view) for view in table_views]
+            )
+
+    def test_ragged_rows_are_padded(self):
+        table = Table([["a", "b"], ["1"]])
+        self.assertEqual(table, [["a", "b"], ["1", ""]])
+
+
+class TestTableMaskerBudget(unittest.TestCase):
+    def setUp(self):
+        self.table = [
+            ["", "A", "B", "C", "Empty"],
+            ["x", "1", "2", "3", ""],
+            ["y", "4", "5", "6", ""],
+            ["", "", "", "", ""],
+        ]
+
+    def vectors(self, masker):
+        _, masked = masker.mask([self.table], True, True)
+        return [(view.row_idx, view.col_idx) for view in masked]
+
+    def test_skips_empty_vectors(self):
+        masker = get_masker("vectors_budget", {"id": "note"})
+        # The empty last row and column are skipped.
+        self.assertEqual(
+            self.vectors(masker),
+            [(0, None), (1, None), (2, None)] + [(None, i) for i in range(4)],
+        )
+        masker = get_masker("vectors_budget", {"skip_empty_vectors": False})
+        self.assertEqual(len(self.vectors(masker)), 9)
+
+    def test_budget_is_deterministic_per_note(self):
+        masker = get_masker("vectors_budget", {"id": "note", "card_budget": 3})
+        vectors = self.vectors(masker)
+        self.assertEqual(len(vectors), 3)
+        self.assertEqual(len(set(vectors)), 3)
+        same = get_masker("vectors_budget", {"id": "note", "card_budget": 3})
+        self.assertEqual(self.vectors(same), vectors)
+        samples = {
+            tuple(
+                self.vectors(get_masker("vectors_budget", {"id": id, "card_budget": 3}))
+            )
+            for id in "abcdefgh"
+        }
+        self.assertGreater(len(samples), 1)
+
+    def test_invalid_options(self):
+        for metadata in (
+            {"card_budget": 0},
+            {"card_budget": "3"},
+            {"skip_empty_vectors": 1},
+        ):
+            with self.subTest(metadata=metadata), self.assertRaises(ValueError):
+                get_masker("vectors_budget", metadata)
+
+
+class TestPaginator(unittest.TestCase):
+    def test_windows_mask_each_vector_once(self):
+        table = Table([[f"{r}.{c}" for c in range(6)] for r in range(8)])
+        masker = TableMaskerHiddenVectors()
+
+        def masked_cells(views):
+            return Counter(
+                view.table.cells[idx] for view in views for idx in view.masked_indices()
+            )
+
+        for headers in itertools.product([False, True], repeat=2):
+            with self.subTest(headers=headers):
+                _, masked = masker.mask([table], *headers)
+                _, windows = paginator.mask_windows(masker, [table], *headers, 3, 2)
+                self.assertEqual(masked_cells(windows), masked_cells(masked))
+                for view in windows:
+                    self.assertLessEqual(view.table.num_rows, 4)
+                    self.assertLessEqual(view.table.num_cols, 3)
+                    self.assertEqual(view.table.cells[0], "0.0")
+
+    def test_windows_are_sampled_with_their_own_seed(self):
+        table = Table([[f"{r}.{c}" for c in range(4)] for r in range(41)])
+        masker = TableMaskerBudget(card_budget=3, seed="note")
+        _, masked = paginator.mask_windows(masker, [table], False, False, 5, None)
+        samples = {}
+        for view in masked:
+            samples.setdefault(id(view.table), []).append((view.row_idx, view.col_idx))
+        self.assertEqual(len(samples), 8)
+        self.assertTrue(all(len(sample) == 3 for sample in samples.values()))
+        self.assertGreater(len(set(map(tuple, samples.values()))), 1)
+
+    def test_small_tables_are_not_split(self):
+        table = Table([["", "a"], ["x", "1"]])
+        (window,) = paginator.paginate(table, 1, None)
+        self.assertIs(window.table, table)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from note_processor.table_parser import TableParser
+from note_processor.table_parser_fast import TableParserFast
+
+# Markdown snippets on which both parsers must return the same first table.
+CORPUS = [
+    "",
+    "No table in this note.",
+    "|       | EIGRP | OSPF  |\n|-------|-------|-------|\n| Hello | 5     | 10    |\n| Dead  | 3     | 8     |",
+    "a | b\n--|--\n1 | 2",
+    "| a | b |\n|:--|--:|\n| 1 | 2 |",
+    "| a | b |\n|:-:|-|\n| 1 | 2 |",
+    "| a | b | c |\n|---|---|---|\n| 1 |\n| 1 | 2 | 3 | 4 |",
+    "| a | b |\n|---|---|\n| x \\| y | `p|q` |",
+    "| a | b |\n|---|---|\n| x \\\\| y |",
+    "| a | b |\n|---|---|\n| x `c` y | ``x|`y`` |",
+    "| a | b |\n|---|---|\n| `x | y |",
+    "| a | b |\n|---|---|\n| &amp; | \\* |",
+    "| | b |\n|---|---|\n|  | |",
+    "| a | b |\n|---|---|\n| ![[diagram.png]] | [[link]] |",
+    "Intro text\n\n| a | b |\n|---|---|\n| 1 | 2 |\n\nAfter the table.",
+    "# Title\n| a | b |\n|---|---|\n| 1 | 2 |",
+    "Intro text\n| a | b |\n|---|---|\n| 1 | 2 |",
+    "    | a | b |\n    |---|---|\n    | 1 | 2 |",
+    "| a | b |\n|---|---|\n| 1 | 2 |\nplain line\n| 3 | 4 |",
+    "| a | b |\n|---|\n| 1 | 2 |",
+    "| a | b |\n| 1 | 2 |",
+    "| a | b |\n|--- x|---|\n| 1 | 2 |",
+    "| a |\n|---|\n| 1 |\n\n| b |\n|---|\n| 2 |",
+    "| a | b |\n|---|---|\n| x<br>y | x <br/> y<br> |",
+    "| a | b |\n|---|---|\n| *x* y | **x** and __y__ |",
+    "| a | b |\n|---|---|\n| ***x*** | _x_ snake_case |",
+    "| a | b |\n|---|---|\n| a*b*c | 2 * 3 * 4 |",
+    "| a | b |\n|---|---|\n| \\*x\\* | *`code` x*<br>**(y)** |",
+    "| a | b |\n|---|---|\n| <b>x</b>, <span class='c'>y</span> | x &lt;br&gt; y |",
+    "| a | b |\n|---|---|\n| [text](https://x.y) | ![alt](img.png) <https://x.y> |",
+    "| a | b |\n|---|---|\n| `` `x` `` | ``x``` `` |",
+]
+
+
+class TestTableParser(unittest.TestCase):
+    def setUp(self):
+        self.markdown_table = """
+|       | EIGRP | OSPF  |
+|-------|-------|-------|
+| Hello | 5     | 10    |
+| Dead  | 3     | 8     |
+        """.strip()
+        self.expected_table = [
+            ["", "EIGRP", "OSPF"],
+            ["Hello", "5", "10"],
+            ["Dead", "3", "8"],
+        ]
+
+    def test_parse_markdown_table(self):
+        self.assertEqual(
+            TableParser().parse(self.markdown_table), [self.expected_table]
+        )
+        self.assertEqual(
+            TableParserFast().parse(self.markdown_table), [self.expected_table]
+        )
+
+    def test_fast_parser_matches_corpus(self):
+        parser = TableParser()
+        fast_parser = TableParserFast()
+        for content in CORPUS:
+            with self.subTest(content=content):
+                self.assertEqual(fast_parser.parse(content)[:1], parser.parse(content))
+
+    def test_fast_parser_returns_all_tables(self):
+        content = "| a |\n|---|\n| 1 |\n\ntext\n\n| b | c |\n|---|---|\n| 2 | 3 |"
+        self.assertEqual(
+            TableParserFast().parse(content),
+            [[["a"], ["1"]], [["b", "c"], ["2", "3"]]],
+        )
+
+    def test_fast_parser_splits_lines_like_the_html(self):
+        content = "| a | b |\n|---|---|\n| x<br>y | **bold** *z* |"
+        self.assertEqual(
+            TableParserFast().parse(content), [[["a", "b"], ["x\ny", "bold\nz"]]]
+        )
+
+    def test_fast_parser_ignores_fenced_code(self):
+        content = "```\n| a |\n|---|\n| 1 |\n```\n\n| b |\n|---|\n| 2 |"
+        self.assertEqual(TableParserFast().parse(content), [[["b"], ["2"]]])
+
+
+if __name__ == "__main__":
+    unittest.main()
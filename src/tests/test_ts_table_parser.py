@@ -1,7 +1,10 @@
 import unittest
-from parser.parser_table import TsTableParser
-from parser.models import Flashcard, FlashcardMetadata
-from parser.masker_table_cloze_full import RowColumnMaskGenerator
+from deck_builder import note_type_registry
+from models.models import Flashcard, NoteMetadata
+from note_processor import processor, styler
+from note_processor.table_masker_hidden_vectors import TableMaskerHiddenVectors
+from note_processor.table_parser import TableParser
+
 
 class TestTsTableParser(unittest.TestCase):
     def setUp(self):
@@ -12,108 +15,83 @@ class TestTsTableParser(unittest.TestCase):
 | Hello | 5     | 10    |
 | Dead  | 3     | 8     |
         """.strip()
-        self.parser = TsTableParser()
+        self.parser = TableParser()
+        self.masker = TableMaskerHiddenVectors()
         self.expected_table = [
             ["", "EIGRP", "OSPF"],
             ["Hello", "5", "10"],
-            ["Dead", "3", "8"]
+            ["Dead", "3", "8"],
         ]
-    
+
     def test_parse_markdown_table(self):
-        table = self.parser.parse_markdown_table(self.markdown_table)
-        self.assertEqual(table, self.expected_table)
-    
+        tables = self.parser.parse(self.markdown_table)
+        self.assertEqual(tables, [self.expected_table])
+
     def test_empty_markdown_table(self):
         # When content is empty, we expect an empty list.
-        empty_content = ""
-        table = self.parser.parse_markdown_table(empty_content)
-        self.assertEqual(table, [])
-        
-        # When content contains only separator rows, it should return an empty list.
-        sep_only = """
-|---|---|
-|---|---|
-        """.strip()
-        table = self.parser.parse_markdown_table(sep_only)
-        self.assertEqual(table, [])
-    
+        self.assertEqual(self.parser.parse(""), [])
+
     def test_format_table(self):
         # Test formatting a 2D list as an HTML table.
-        html = self.parser.format_table(self.expected_table)
+        html = styler.render_table(self.expected_table)
         self.assertIn("<table>", html)
         self.assertIn("table_body", html)
         self.assertIn("table_header_top", html)
         self.assertIn("table_header_left", html)
-    
+
     def test_generate_masks_dimensions(self):
-        # Using the default RowColumnMaskGenerator from the parser.
-        masks = self.parser.mask_generator.generate_masks(self.expected_table)
+        unmasked_tables, masked_tables = self.masker.mask(
+            [self.expected_table], True, True
+        )
         # For a 3x3 table, we expect 3 row masks + 3 column masks = 6 masks.
-        self.assertEqual(len(masks), 6)
-        for mask in masks:
-            self.assertEqual(len(mask), len(self.expected_table))
-            for i, row in enumerate(mask):
+        self.assertEqual(len(unmasked_tables), 6)
+        self.assertEqual(len(masked_tables), 6)
+        for table in unmasked_tables + masked_tables:
+            self.assertEqual(len(table), len(self.expected_table))
+            for i, row in enumerate(table):
                 self.assertEqual(len(row), len(self.expected_table[i]))
-                for mask_info in row:
-                    self.assertTrue(hasattr(mask_info, "cell_format"))
-    
+
     def test_apply_mask_default(self):
-        # Test that applying a mask cloaks only the targeted row.
-        masks = self.parser.mask_generator.generate_masks(self.expected_table)
-        first_mask = masks[0]  # Assume this mask cloaks the first row.
-        masked_table = self.parser.apply_mask(self.expected_table, first_mask)
-        # The first row should contain cloze syntax.
+        # Test that the first mask hides only the targeted row.
+        _, masked_tables = self.masker.mask([self.expected_table], True, True)
+        masked_table = list(masked_tables[0])
+        # The first row should be masked, except its header cell.
         for j, cell in enumerate(masked_table[0]):
             if j == 0:
                 self.assertEqual("", cell)
                 continue
-            self.assertEqual("[...]", cell)
+            self.assertEqual(styler.get_masked(self.expected_table[0][j]), cell)
         # The remaining rows should remain unchanged.
-        for row in masked_table[1:]:
-            for cell in row:
-                self.assertNotIn("[...]", cell)
-    
-    def test_custom_cloze_formatter(self):
-        # Test using a custom cloze formatter.
-        def custom_formatter():
-            return f"<cloze></cloze>"
-        parser_custom = TsTableParser(cloze_formatter=custom_formatter)
-        masks = parser_custom.mask_generator.generate_masks(self.expected_table)
-        first_mask = masks[0]
-        masked_table = parser_custom.apply_mask(self.expected_table, first_mask)
-        # Verify that the custom formatter's pattern is present.
-        for j, cell in enumerate(masked_table[0]):
-            if j == 0:
-                self.assertEqual("", cell)
-                continue
-            self.assertEqual("<cloze></cloze>", cell)
-    
+        self.assertEqual(masked_table[1:], self.expected_table[1:])
+
     def test_parse_method_output(self):
-        # Test the overall parse method.
-        metadata = FlashcardMetadata(unique_id="1-195322b0c4c-a1bc2", name="Test", parser="ts_table", deck="TestDeck")
-        flashcards = self.parser.parse(self.markdown_table, metadata)
+        # Test the overall processing of a note.
+        metadata = NoteMetadata(
+            id="1-195322b0c4c-a1bc2",
+            name="Test",
+            deck="TestDeck",
+            parser=self.parser,
+            masker=self.masker,
+            mask_row_header=True,
+            mask_col_header=True,
+            shuffle_rows=False,
+            shuffle_cols=False,
+        )
+        flashcards = processor.process(self.markdown_table, metadata)
         # For our table (3x3), expect 3 row masks + 3 column masks = 6 flashcards.
         self.assertEqual(len(flashcards), 6)
         for card in flashcards:
             self.assertIsInstance(card, Flashcard)
             self.assertTrue(card.front)
             self.assertTrue(card.back)
-            self.assertTrue(card.metadata.name)
-            self.assertTrue(card.metadata.parser)
-            self.assertTrue(card.metadata.deck)
-        # All flashcards should have the same full table as the answer.
-        backs = {card.back for card in flashcards}
-        self.assertEqual(len(backs), 1)
-    
-    def test_row_column_mask_generator(self):
-        # Directly test the default mask generator.
-        generator = RowColumnMaskGenerator()
-        masks = generator.generate_masks(self.expected_table)
-        self.assertEqual(len(masks), 6)
-        for mask in masks:
-            for row in mask:
-                for mask_info in row:
-                    self.assertTrue(hasattr(mask_info, "cell_format"))
+            self.assertEqual(card.metadata.deck, "TestDeck")
+            self.assertIs(
+                card.metadata.note_type, note_type_registry.get_note_type(False, False)
+            )
+        # Every flashcard gets its own ID.
+        ids = {card.metadata.id for card in flashcards}
+        self.assertEqual(len(ids), 6)
+
 
-if __name__ == '__main__':
+if __name__ == "__main__":
     unittest.main()
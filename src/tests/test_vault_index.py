@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from note_processor import processor
+from tests.helpers import make_metadata
+from vault.index import VaultIndex
+
+TABLE = "| | A |\n|---|---|\n| x | 1 |"
+
+
+class TestVaultIndex(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "vault.sqlite")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_duplicate_ids_and_queries(self):
+        index = VaultIndex(self.path)
+        metadata = make_metadata("a")
+        self.assertTrue(index.add_note("a.md", "raw", metadata))
+        index.add_cards("a.md", processor.process(TABLE, metadata))
+        with self.assertLogs(level="WARNING"):
+            self.assertFalse(index.add_note("copy.md", "raw", metadata))
+        self.assertTrue(index.add_note("b.md", "raw", make_metadata("b")))
+        index.save()
+        index.close()
+
+        index = VaultIndex(self.path, readonly=True)
+        self.assertEqual(index.cards_of("a.md"), ["a-0", "a-1"])
+        self.assertEqual(index.file_of("a-1"), os.path.abspath("a.md"))
+        self.assertEqual(index.files_of("a"), [os.path.abspath("a.md")])
+        index.close()
+
+    def test_next_build_drops_unseen_notes(self):
+        index = VaultIndex(self.path)
+        index.add_note("a.md", "raw", make_metadata("a"))
+        index.save()
+        index.close()
+
+        # The file of the previous build no longer holds the id.
+        index = VaultIndex(self.path)
+        self.assertTrue(index.add_note("b.md", "raw", make_metadata("a")))
+        index.save()
+        self.assertEqual(index.files_of("a"), [os.path.abspath("b.md")])
+        index.close()
+
+    def test_duplicates_are_requeued_when_the_id_is_released(self):
+        index = VaultIndex()
+        index.add_note("a.md", "raw", make_metadata("x"))
+        with self.assertLogs(level="WARNING"):
+            self.assertFalse(index.add_note("b.md", "raw", make_metadata("x")))
+        self.assertEqual(index.take_requeued(), [])
+
+        # The file holding the id is removed: the duplicate can take it.
+        index.forget("a.md")
+        self.assertEqual(index.take_requeued(), ["b.md"])
+        self.assertTrue(index.add_note("b.md", "raw", make_metadata("x")))
+
+        # The file holding the id gets another one.
+        with self.assertLogs(level="WARNING"):
+            self.assertFalse(index.add_note("c.md", "raw", make_metadata("x")))
+        index.add_note("b.md", "raw", make_metadata("y"))
+        self.assertEqual(index.take_requeued(), ["c.md"])
+        self.assertEqual(index.take_requeued(), [])
+        index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import logging
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+import main
+from vault.watcher import VaultWatcher
+from tests.helpers import write_note
+
+
+class _FakeVault:
+    """Files with fake modification times, and a clock which runs when the watcher sleeps."""
+
+    def __init__(self):
+        self.files = {}
+        self.now = 0.0
+        # Changes made at a given time: (time, path, mtime or None to delete).
+        self.changes = []
+
+    def list_files(self):
+        return list(self.files)
+
+    def stat(self, path):
+        if path not in self.files:
+            raise FileNotFoundError(path)
+        return SimpleNamespace(st_mtime_ns=self.files[path], st_size=1)
+
+    def sleep(self, seconds):
+        self.now += seconds
+        while self.changes and self.changes[0][0] <= self.now:
+            _, path, mtime = self.changes.pop(0)
+            if mtime is None:
+                del self.files[path]
+            else:
+                self.files[path] = mtime
+
+
+class TestVaultWatcher(unittest.TestCase):
+    def setUp(self):
+        self.vault = _FakeVault()
+        self.vault.files = {"a.md": 1, "b.md": 1}
+        self.watcher = VaultWatcher(
+            self.vault.list_files,
+            interval=1.0,
+            debounce=0.5,
+            stat=self.vault.stat,
+            sleep=self.vault.sleep,
+        )
+
+    def test_poll(self):
+        self.assertEqual(self.watcher.poll(), (["a.md", "b.md"], []))
+        self.assertEqual(self.watcher.poll(), ([], []))
+        self.vault.files.update({"a.md": 2, "c.md": 1})
+        del self.vault.files["b.md"]
+        self.assertEqual(self.watcher.poll(), (["a.md", "c.md"], ["b.md"]))
+        self.assertEqual(list(self.watcher.files), ["a.md", "c.md"])
+
+    def test_wait_for_changes_debounces_a_burst(self):
+        self.watcher.poll()
+        self.vault.changes = [(3.0, "a.md", 2), (3.5, "a.md", 3), (4.0, "c.md", 1)]
+        self.assertEqual(self.watcher.wait_for_changes(), (["a.md", "c.md"], []))
+        # Changes are polled every second, then every half second until none is seen.
+        self.assertEqual(self.vault.now, 4.5)
+
+    def test_wait_for_changes_with_deletions(self):
+        self.watcher.poll()
+        self.vault.changes = [
+            (1.0, "a.md", None),
+            (1.0, "b.md", 2),
+            (1.5, "a.md", 2),
+            (1.5, "b.md", None),
+        ]
+        # A file deleted and written again is changed, one changed and deleted is removed.
+        self.assertEqual(self.watcher.wait_for_changes(), (["a.md"], ["b.md"]))
+
+    def test_file_deleted_while_listed_is_removed(self):
+        self.watcher.poll()
+        self.vault.files["c.md"] = 1
+        with mock.patch.object(
+            self.watcher, "list_files", lambda: ["a.md", "c.md", "b.md"]
+        ):
+            del self.vault.files["b.md"]
+            self.assertEqual(self.watcher.poll(), (["c.md"], ["b.md"]))
+
+
+class _StopWatching(Exception):
+    pass
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.vault = os.path.join(self.folder.name, "vault")
+        os.mkdir(self.vault)
+        self.output_file = os.path.join(self.folder.name, "out.apkg")
+        write_note(self.vault, "a.md", "a")
+        self.deleted = write_note(self.vault, "b.md", "b")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_file_deleted_before_loading_is_skipped(self):
+        polls = []
+        poll = VaultWatcher.poll
+
+        def poll_and_delete(watcher):
+            result = poll(watcher)
+            if not polls:
+                # Deleted after it was seen, before it is loaded.
+                os.remove(self.deleted)
+            polls.append(result)
+            return result
+
+        waits = [([], [])]
+
+        def wait_for_changes(watcher):
+            if not waits:
+                raise _StopWatching
+            return waits.pop()
+
+        with mock.patch.object(
+            VaultWatcher, "poll", poll_and_delete
+        ), mock.patch.object(
+            VaultWatcher, "wait_for_changes", wait_for_changes
+        ), self.assertLogs(
+            level=logging.INFO
+        ) as logs:
+            with self.assertRaises(_StopWatching):
+                main.watch(self.vault, "parent", self.output_file)
+
+        messages = [record.getMessage() for record in logs.records]
+        self.assertIn(f"Cannot read file '{self.deleted}'", messages[0])
+        states = [m.split(":")[0] for m in messages if m.startswith("Package ")]
+        # Nothing changed in the second round, so the package is not written again.
+        self.assertEqual(states, ["Package rebuilt", "Package unchanged"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import logging
+import os
+import tempfile
+import unittest
+import main
+from deck_builder import deck_builder
+from note_processor import processor
+from note_processor.table_parser_fast import TableParserFast
+from tests.helpers import TABLE, make_metadata, write_note
+
+# A fixed SOURCE_DATE_EPOCH, so the packages are reproducible.
+SOURCE_DATE_EPOCH = 1700000000
+
+
+class _WarningParser(TableParserFast):
+    """Parser which logs a warning, to check that the records of the workers are kept."""
+
+    def parse(self, content):
+        logging.getLogger("note").warning("Odd table")
+        return super().parse(content)
+
+
+class TestWorkers(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.vault = os.path.join(self.folder.name, "vault")
+        os.makedirs(os.path.join(self.vault, "sub"))
+        for i, deck in enumerate(["B", "A::X", "B", "C", "A", "A::X"]):
+            write_note(
+                self.vault if i % 2 else os.path.join(self.vault, "sub"),
+                f"{i}.md",
+                f"note{i}",
+                deck,
+                shuffle_rows="true" if i % 3 == 0 else "false",
+            )
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def build(self, workers):
+        cards = list(main.generate_flashcards(self.vault, workers=workers))
+        output_file = os.path.join(self.folder.name, f"{workers}.apkg")
+        deck_builder.build_anki_package(
+            cards,
+            "parent",
+            output_file,
+            timestamp=SOURCE_DATE_EPOCH,
+            assets_folder=os.path.join(self.folder.name, "assets"),
+        )
+        with open(output_file, "rb") as f:
+            return cards, f.read()
+
+    def test_workers_give_the_same_package(self):
+        serial_cards, serial_package = self.build(1)
+        cards, package = self.build(2)
+        self.assertEqual(len(serial_cards), 24)
+        self.assertEqual(
+            [
+                (card.metadata.id, card.metadata.deck, card.front, card.back)
+                for card in cards
+            ],
+            [
+                (card.metadata.id, card.metadata.deck, card.front, card.back)
+                for card in serial_cards
+            ],
+        )
+        self.assertEqual(package, serial_package)
+
+    def test_worker_records_reach_the_parent(self):
+        executor = main.create_executor(2)
+        try:
+            future = executor.submit(
+                processor.process_in_worker,
+                TABLE,
+                make_metadata("a", parser=_WarningParser()),
+            )
+            with self.assertLogs("note", level=logging.WARNING) as logs:
+                _, cards = main.collect_flashcards(("a.md", None, future), None)
+        finally:
+            executor.shutdown()
+        self.assertEqual(len(cards), 4)
+        self.assertEqual(logs.output, ["WARNING:note:Odd table"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,235 @@
+"""
+Index of the notes of the vault and of the flashcards they produce, kept next to the build cache.
+
+Query it from the src folder:
+    python -m vault.index .my_ankigen_cache/vault.sqlite --guid my-note-3
+    python -m vault.index .my_ankigen_cache/vault.sqlite --file notes/my-note.md
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from cache.build_cache import get_note_options
+from models.models import Flashcard, NoteMetadata
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    file TEXT PRIMARY KEY,
+    id TEXT NOT NULL,
+    deck TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    options TEXT NOT NULL,
+    build INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notes_id ON notes (id, build);
+CREATE TABLE IF NOT EXISTS cards (
+    guid TEXT PRIMARY KEY,
+    file TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cards_file ON cards (file, position);
+CREATE TABLE IF NOT EXISTS builds (
+    build INTEGER PRIMARY KEY
+);
+"""
+
+
+def get_options(note_metadata: NoteMetadata) -> str:
+    """Return the effective options of a note as JSON."""
+    return json.dumps(get_note_options(note_metadata), sort_keys=True)
+
+
+class VaultIndex:
+    """
+    Persistent SQLite index of the notes of the vault: the file, id, deck, content hash and
+    options of each note, and the GUIDs of the flashcards it produces.
+
+    Every build starts a new build number. A note is indexed when it is loaded, and rejected if
+    another file already indexed in the same build has the same id, since both would produce
+    the same GUIDs. Notes which were not seen by the build are dropped when the index is saved.
+    When the file holding an id is forgotten or gets another id, the files rejected for that id
+    are returned by take_requeued, to be loaded again.
+    """
+
+    def __init__(self, path: str = ":memory:", readonly: bool = False):
+        self.path = path
+        self.duplicates = 0
+        # The ids of the files rejected as duplicates, by file as given to add_note.
+        self.rejected: Dict[str, str] = {}
+        # The ids no longer held by the file which caused the rejections.
+        self.released: Set[str] = set()
+        if readonly:
+            self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            return
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        (last,) = self.connection.execute("SELECT MAX(build) FROM builds").fetchone()
+        self.build = (last or 0) + 1
+        self.connection.execute("INSERT INTO builds VALUES (?)", (self.build,))
+
+    def add_note(self, md_file: str, raw: str, note_metadata: NoteMetadata) -> bool:
+        """
+        Index a loaded note. Returns False, without indexing it, if another file of the current
+        build has the same id.
+        """
+        given_file = md_file
+        md_file = os.path.abspath(md_file)
+        row = self.connection.execute(
+            "SELECT file FROM notes WHERE id = ? AND build = ? AND file != ? LIMIT 1",
+            (note_metadata.id, self.build, md_file),
+        ).fetchone()
+        if row is not None:
+            logging.warning(
+                f"File '{md_file}' has the same id '{note_metadata.id}' as '{row[0]}'. Skipping file."
+            )
+            self.duplicates += 1
+            self.forget(given_file)
+            self.rejected[given_file] = note_metadata.id
+            return False
+        self.rejected.pop(given_file, None)
+        self._release(md_file, note_metadata.id)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                md_file,
+                note_metadata.id,
+                note_metadata.deck,
+                hashlib.sha256(raw.encode("utf-8")).hexdigest(),
+                get_options(note_metadata),
+                self.build,
+            ),
+        )
+        return True
+
+    def add_cards(self, md_file: str, cards: Iterable[Flashcard]) -> None:
+        """Record the GUIDs of the flashcards produced by a file, if they changed."""
+        md_file = os.path.abspath(md_file)
+        guids = [card.metadata.id for card in cards]
+        if guids == self.cards_of(md_file):
+            return
+        self.connection.execute("DELETE FROM cards WHERE file = ?", (md_file,))
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO cards VALUES (?, ?, ?)",
+            [(guid, md_file, position) for position, guid in enumerate(guids)],
+        )
+
+    def _release(self, md_file: str, new_id: Optional[str] = None) -> None:
+        """Record that the indexed file md_file no longer holds its id, if it is not new_id."""
+        row = self.connection.execute(
+            "SELECT id FROM notes WHERE file = ?", (md_file,)
+        ).fetchone()
+        if row is not None and row[0] != new_id:
+            self.released.add(row[0])
+
+    def take_requeued(self) -> List[str]:
+        """
+        Return the files rejected for an id which is no longer held by the file they were
+        rejected for, so they can be loaded again, and forget about them.
+        """
+        requeued = sorted(
+            file for file, id in self.rejected.items() if id in self.released
+        )
+        for file in requeued:
+            del self.rejected[file]
+        self.released.clear()
+        return requeued
+
+    def forget(self, md_file: str) -> None:
+        """Remove a file and its flashcards from the index, e.g. because it was deleted."""
+        self.rejected.pop(md_file, None)
+        md_file = os.path.abspath(md_file)
+        self._release(md_file)
+        self.connection.execute("DELETE FROM notes WHERE file = ?", (md_file,))
+        self.connection.execute("DELETE FROM cards WHERE file = ?", (md_file,))
+
+    def cards_of(self, md_file: str) -> List[str]:
+        """Return the GUIDs of the flashcards of a file, in order."""
+        return [
+            guid
+            for (guid,) in self.connection.execute(
+                "SELECT guid FROM cards WHERE file = ? ORDER BY position",
+                (os.path.abspath(md_file),),
+            )
+        ]
+
+    def file_of(self, guid: str) -> Optional[str]:
+        """Return the file which produces the flashcard with the GUID, if any."""
+        row = self.connection.execute(
+            "SELECT file FROM cards WHERE guid = ?", (guid,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def files_of(self, id: str) -> List[str]:
+        """Return the files of the notes with the id."""
+        return [
+            file
+            for (file,) in self.connection.execute(
+                "SELECT file FROM notes WHERE id = ? ORDER BY file", (id,)
+            )
+        ]
+
+    def notes(self) -> List[Tuple[str, str, str]]:
+        """Return the file, id and deck of every indexed note."""
+        return self.connection.execute(
+            "SELECT file, id, deck FROM notes ORDER BY file"
+        ).fetchall()
+
+    def save(self) -> None:
+        """Drop the notes not seen by the current build and commit the index."""
+        stale = [
+            file
+            for (file,) in self.connection.execute(
+                "SELECT file FROM notes WHERE build != ?", (self.build,)
+            )
+        ]
+        for file in stale:
+            self.forget(file)
+        self.connection.execute(
+            "DELETE FROM cards WHERE file NOT IN (SELECT file FROM notes)"
+        )
+        self.connection.execute("DELETE FROM builds WHERE build != ?", (self.build,))
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __str__(self) -> str:
+        (notes,) = self.connection.execute("SELECT COUNT(*) FROM notes").fetchone()
+        (cards,) = self.connection.execute("SELECT COUNT(*) FROM cards").fetchone()
+        return f"{notes} notes, {cards} cards, {self.duplicates} duplicate ids"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the vault index of a build.")
+    parser.add_argument(
+        "index", help="Path to the index, e.g. .my_ankigen_cache/vault.sqlite"
+    )
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument("--guid", help="Print the file which produces this flashcard.")
+    query.add_argument("--file", help="Print the GUIDs of the flashcards of this file.")
+    query.add_argument("--id", help="Print the files of the notes with this id.")
+    query.add_argument("--list", action="store_true", help="Print every indexed note.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.index):
+        parser.error(f"no index at '{args.index}'")
+    index = VaultIndex(args.index, readonly=True)
+    if args.guid:
+        print(index.file_of(args.guid) or "")
+    elif args.file:
+        print("\n".join(index.cards_of(args.file)))
+    elif args.id:
+        print("\n".join(index.files_of(args.id)))
+    else:
+        for row in index.notes():
+            print("\t".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import dataclasses
+import hashlib
+import html
+import json
+import logging
+import os
+import tempfile
+from urllib.parse import urlsplit
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from models.models import Flashcard
+
+# Size of the chunks in which media files are hashed.
+CHUNK_SIZE = 1 << 20
+
+
+class MediaLibrary:
+    """
+    Resolves the media referenced by flashcards against the vault.
+
+    Every media file is named by the hash of its content, so a file used by many cards or
+    notes is stored once in the package. The hashes are kept by (path, mtime, size): with a
+    digest file, unchanged media are not hashed again by the next build.
+    """
+
+    def __init__(self, vault_folder: str, digest_file: Optional[str] = None):
+        self.vault_folder = os.path.abspath(vault_folder)
+        self._real_vault_folder = os.path.realpath(vault_folder)
+        self.digest_file = digest_file
+        # Media files to write to the package, by name, and their names by path.
+        self.files: Dict[str, str] = {}
+        self.names: Dict[str, str] = {}
+        # (mtime_ns, size, digest) by path.
+        self.digests: Dict[str, Tuple[int, int, str]] = {}
+        self.used: Dict[str, Tuple[int, int, str]] = {}
+        self.missing = set()
+        self._by_filename: Optional[Dict[str, str]] = None
+        if digest_file is not None:
+            try:
+                with open(digest_file, "r") as f:
+                    self.digests = {
+                        path: tuple(entry) for path, entry in json.load(f).items()
+                    }
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                logging.warning(
+                    f"Ignoring unreadable media digests '{digest_file}': {e}"
+                )
+
+    def reset(self) -> None:
+        """Start a new build: forget the media of the previous one and look at the vault again."""
+        self.files = {}
+        self.names = {}
+        self.used = {}
+        self.missing = set()
+        self._by_filename = None
+
+    def _index_vault(self) -> Dict[str, str]:
+        """Return the paths of the vault files by file name. The first path in sorted order wins."""
+        if self._by_filename is None:
+            self._by_filename = {}
+            for root, dirs, files in os.walk(self.vault_folder):
+                dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+                for file in sorted(files):
+                    self._by_filename.setdefault(file, os.path.join(root, file))
+        return self._by_filename
+
+    def in_vault(self, path: str) -> bool:
+        """Return True if a path, with its symbolic links resolved, is inside the vault."""
+        real_path = os.path.realpath(path)
+        return os.path.commonpath([real_path, self._real_vault_folder]) == (
+            self._real_vault_folder
+        )
+
+    def find(self, md_file: str, reference: str) -> Optional[str]:
+        """
+        Return the path of a media reference of a markdown file, or None if it does not exist.
+        References are relative to the file, to the vault, or, like Obsidian links, a bare file
+        name anywhere in the vault. Files outside of the vault are never returned.
+        """
+        for folder in (os.path.dirname(os.path.abspath(md_file)), self.vault_folder):
+            path = os.path.normpath(os.path.join(folder, reference))
+            if os.path.isfile(path) and self.in_vault(path):
+                return path
+        if "/" in reference or os.sep in reference:
+            return None
+        path = self._index_vault().get(reference)
+        if path is None or not self.in_vault(path):
+            return None
+        return path
+
+    def get_digest(self, path: str) -> str:
+        """Return the SHA-256 of a file, hashed in chunks and only if it changed."""
+        stat = os.stat(path)
+        entry = self.digests.get(path)
+        if entry is None or entry[:2] != (stat.st_mtime_ns, stat.st_size):
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    digest.update(chunk)
+            entry = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+            self.digests[path] = entry
+        self.used[path] = entry
+        return entry[2]
+
+    def add(self, path: str) -> str:
+        """Add a media file to the package and return its name."""
+        name = self.names.get(path)
+        if name is None:
+            extension = os.path.splitext(path)[1].lower()
+            name = self.get_digest(path)[:32] + extension
+            self.names[path] = name
+            self.files.setdefault(name, path)
+        return name
+
+    def _resolve(self, md_file: str, reference: str) -> Optional[str]:
+        # Remote images (https:, data:, ...) are left to the card, a single letter is a drive.
+        if len(urlsplit(reference).scheme) > 1:
+            return None
+        path = self.find(md_file, reference)
+        if path is None:
+            if (md_file, reference) not in self.missing:
+                self.missing.add((md_file, reference))
+                logging.warning(f"Media '{reference}' in file '{md_file}' not found.")
+            return None
+        return self.add(path)
+
+    def attach(self, md_file: str, cards: Iterable[Flashcard]) -> Iterator[Flashcard]:
+        """
+        Yield the flashcards of a markdown file with their media references replaced by the
+        names of the media files. Cards with media are copied, the given cards are not changed.
+        """
+        # The cards of a file usually share their media and hints, which are resolved once.
+        resolved: Dict[str, Optional[str]] = {}
+        resolved_hints: Dict[int, List[str]] = {}
+        for card in cards:
+            if not card.media:
+                yield card
+                continue
+            front, back = card.front, card.back
+            names: List[str] = []
+            sources: Dict[str, str] = {}
+            for reference in card.media:
+                if reference not in resolved:
+                    resolved[reference] = self._resolve(md_file, reference)
+                name = resolved[reference]
+                if name is None:
+                    continue
+                names.append(name)
+                src = f'src="{html.escape(reference)}"'
+                sources[src] = f'src="{name}"'
+                front = front.replace(src, sources[src])
+                back = back.replace(src, sources[src])
+
+            hints = resolved_hints.get(id(card.hints))
+            if hints is None:
+                hints = []
+                for hint in card.hints:
+                    if isinstance(hint, str):
+                        for src, replacement in sources.items():
+                            hint = hint.replace(src, replacement)
+                    hints.append(hint)
+                resolved_hints[id(card.hints)] = hints
+            yield dataclasses.replace(
+                card, front=front, back=back, hints=hints, media=names
+            )
+
+    def save(self) -> None:
+        """Write the digests of the media used by this run to the digest file."""
+        if self.digest_file is None:
+            return
+        folder = os.path.dirname(os.path.abspath(self.digest_file))
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.used, f)
+        os.replace(tmp_path, self.digest_file)
+
+    def __str__(self) -> str:
+        return f"{len(self.files)} media files"
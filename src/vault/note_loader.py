@@ -0,0 +1,267 @@
+import logging
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from deck_builder.note_type_registry import LAYOUTS, SHUFFLE_MODES
+from models.models import NoteMetadata
+from note_processor.abstracts_factory import get_masker_class, get_parser
+from note_processor.styler import HTML_MODES
+
+# A frontmatter delimiter line, as recognized by python-frontmatter.
+DELIMITER_RE = re.compile(r"-{3,}\s*")
+
+# Frontmatter lines which can be read without YAML: a key or a list item with a plain value which
+# starts with a letter. YAML resolves such a value to a string, unless it is one of the scalars below.
+SIMPLE_LINE_RE = re.compile(r"([A-Za-z_][\w-]*):(?: +([A-Za-z_][\w ./-]*?))? *")
+ITEM_RE = re.compile(r"( *)- +([A-Za-z_][\w ./-]*?) *")
+SCALARS = {
+    **dict.fromkeys(["yes", "Yes", "YES", "true", "True", "TRUE"], True),
+    **dict.fromkeys(["on", "On", "ON"], True),
+    **dict.fromkeys(["no", "No", "NO", "false", "False", "FALSE"], False),
+    **dict.fromkeys(["off", "Off", "OFF"], False),
+    **dict.fromkeys(["null", "Null", "NULL"], None),
+}
+
+# Converts the value of a frontmatter field, or raises ValueError with the reason it is invalid.
+Converter = Callable[[Any], Any]
+
+
+def read_frontmatter(f) -> Tuple[Optional[str], List[str]]:
+    """
+    Read the leading frontmatter block of an open markdown file, and nothing more.
+    Returns the YAML text of the block, or None if the file has none, and the lines read.
+    """
+    lines: List[str] = []
+    for line in f:
+        lines.append(line)
+        if line.strip():
+            break
+    if not lines or not DELIMITER_RE.fullmatch(lines[-1].strip()):
+        return None, lines
+
+    start = len(lines)
+    for line in f:
+        if DELIMITER_RE.fullmatch(line):
+            lines.append(line)
+            return "".join(lines[start:-1]), lines
+        lines.append(line)
+    return None, lines
+
+
+def parse_simple_frontmatter(header: str) -> Optional[Dict]:
+    """
+    Parse a frontmatter block made only of `key: value` lines and lists of `- value` items,
+    with plain values, as YAML would. Returns None if the block needs a YAML parser.
+    """
+    if "\r" in header:
+        return None
+    metadata = {}
+    key = items = indent = None
+    for line in header.split("\n"):
+        if not line.strip(" "):
+            continue
+        match = SIMPLE_LINE_RE.fullmatch(line)
+        if match is not None:
+            key, value = match.groups()
+            key = SCALARS.get(key, key)
+            metadata[key] = SCALARS.get(value, value)
+            # Only a key without a value can be followed by list items.
+            items = [] if value is None else None
+            indent = None
+            continue
+        match = ITEM_RE.fullmatch(line)
+        if match is None or items is None:
+            return None
+        if indent is None:
+            indent = match.group(1)
+            metadata[key] = items
+        elif match.group(1) != indent:
+            return None
+        items.append(SCALARS.get(match.group(2), match.group(2)))
+    return metadata
+
+
+def parse_frontmatter(header: str) -> object:
+    """
+    Parse a frontmatter block, without YAML if it is simple enough.
+    Raises ValueError if the block is not valid YAML.
+    """
+    metadata = parse_simple_frontmatter(header)
+    if metadata is None:
+        # Imported here: PyYAML is only needed for frontmatter the simple reader cannot parse.
+        import yaml
+
+        try:
+            from yaml import CSafeLoader as SafeLoader
+        except ImportError:
+            from yaml import SafeLoader
+
+        try:
+            metadata = yaml.load(header, Loader=SafeLoader)
+        except yaml.YAMLError as e:
+            raise ValueError(str(e)) from e
+    return metadata
+
+
+def require(key: str, type_: type) -> Converter:
+    def convert(value: Any) -> Any:
+        if not isinstance(value, type_):
+            raise ValueError(f"must have a '{key}' field of type {type_.__name__}")
+        return value
+
+    return convert
+
+
+def lookup(key: str, factory: Callable[[str], Any]) -> Converter:
+    """Convert a name to the instance returned by the factory, looked up once per name."""
+    instances: Dict[Any, Any] = {}
+
+    def convert(value: Any) -> Any:
+        try:
+            instance = instances[value]
+        except KeyError:
+            instance = instances[value] = factory(value)
+        except TypeError:
+            instance = None
+        if not instance:
+            raise ValueError(f"has an unknown {key} '{value}'")
+        return instance
+
+    return convert
+
+
+def choice(key: str, choices: List[str], default: str) -> Converter:
+    """Convert an optional field which must be one of the choices."""
+
+    def convert(value: Any) -> Any:
+        if value is None:
+            return default
+        if value not in choices:
+            raise ValueError(
+                f"has an invalid {key} '{value}', expected one of {', '.join(choices)}"
+            )
+        return value
+
+    return convert
+
+
+def positive_int(key: str, default: Optional[int]) -> Converter:
+    """Convert an optional field which must be a positive integer."""
+
+    def convert(value: Any) -> Any:
+        if value is None:
+            return default
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(
+                f"has an invalid {key} '{value}', expected a positive integer"
+            )
+        return value
+
+    return convert
+
+
+def to_hints(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        return [value]
+    return []
+
+
+class NoteLoader:
+    """
+    Loads markdown notes and validates their frontmatter.
+
+    The metadata schema is compiled once into a converter per field, so a loader should be
+    created once per run and reused for every file. Only the frontmatter block of a file is
+    read until it is validated.
+
+    Optional fields missing from the frontmatter take the given defaults.
+    """
+
+    def __init__(
+        self,
+        layout: str = "inline",
+        shuffle_mode: str = "review",
+        html: str = "pretty",
+        page_rows: Optional[int] = None,
+        page_cols: Optional[int] = None,
+    ):
+        if layout not in LAYOUTS:
+            raise ValueError(
+                f"Invalid layout '{layout}', expected one of {', '.join(LAYOUTS)}."
+            )
+        if shuffle_mode not in SHUFFLE_MODES:
+            raise ValueError(
+                f"Invalid shuffle mode '{shuffle_mode}', expected one of {', '.join(SHUFFLE_MODES)}."
+            )
+        if html not in HTML_MODES:
+            raise ValueError(
+                f"Invalid HTML mode '{html}', expected one of {', '.join(HTML_MODES)}."
+            )
+        for name, size in (("rows", page_rows), ("columns", page_cols)):
+            if size is not None and size < 1:
+                raise ValueError(
+                    f"Invalid number of {name} per page '{size}', expected a positive integer."
+                )
+        # (frontmatter key, NoteMetadata field, converter)
+        self.fields: List[Tuple[str, str, Converter]] = [
+            ("id", "id", require("id", str)),
+            ("deck", "deck", require("deck", str)),
+            ("parser", "parser", lookup("parser", get_parser)),
+            ("masker", "masker", lookup("masker", get_masker_class)),
+            ("mask_row_headers", "mask_row_header", require("mask_row_headers", bool)),
+            ("mask_col_headers", "mask_col_header", require("mask_col_headers", bool)),
+            ("shuffle_rows", "shuffle_rows", require("shuffle_rows", bool)),
+            ("shuffle_cols", "shuffle_cols", require("shuffle_cols", bool)),
+            ("hints", "hints", to_hints),
+            ("layout", "layout", choice("layout", LAYOUTS, layout)),
+            (
+                "shuffle_mode",
+                "shuffle_mode",
+                choice("shuffle_mode", SHUFFLE_MODES, shuffle_mode),
+            ),
+            ("html", "html", choice("html", HTML_MODES, html)),
+            ("page_rows", "page_rows", positive_int("page_rows", page_rows)),
+            ("page_cols", "page_cols", positive_int("page_cols", page_cols)),
+        ]
+
+    def validate(self, md_file: str, metadata: Dict) -> Optional[NoteMetadata]:
+        """Return the note metadata of a file, or None if its frontmatter is invalid."""
+        values = {"name": Path(md_file).stem}
+        try:
+            for key, field, convert in self.fields:
+                values[field] = convert(metadata.get(key))
+            # The masker class reads its own options from the frontmatter.
+            values["masker"] = values["masker"].from_metadata(metadata)
+        except ValueError as e:
+            logging.warning(f"File '{md_file}' {e}. Skipping file.")
+            return None
+        return NoteMetadata(**values)
+
+    def load(self, md_file: str) -> Optional[Tuple[str, NoteMetadata, str]]:
+        """
+        Read a markdown file and validate its frontmatter.
+        Returns the raw file content, the note metadata and the note content, or None if the file must be skipped.
+        """
+        with open(md_file, "r") as f:
+            header, lines = read_frontmatter(f)
+            metadata = None
+            if header is not None:
+                try:
+                    metadata = parse_frontmatter(header)
+                except ValueError as e:
+                    logging.warning(
+                        f"File '{md_file}' has invalid frontmatter: {e}. Skipping file."
+                    )
+                    return None
+            if not isinstance(metadata, dict):
+                metadata = {}
+
+            note_metadata = self.validate(md_file, metadata)
+            if note_metadata is None:
+                return None
+            body = f.read()
+
+        raw = "".join(lines) + body
+        return raw, note_metadata, body.strip()
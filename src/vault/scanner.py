@@ -0,0 +1,164 @@
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Pattern
+
+# File of the vault root listing ignore patterns, one per line like a .gitignore file.
+IGNORE_FILE = ".ankigenignore"
+
+
+@dataclass(slots=True, frozen=True)
+class IgnoreRule:
+    regex: Pattern[str]
+    # A negated rule ("!pattern") includes again what a previous rule ignored.
+    negate: bool
+    # A rule ending with "/" only matches directories.
+    dir_only: bool
+
+
+def translate_glob(glob: str) -> str:
+    """Translate a .gitignore glob to a regular expression matching relative POSIX paths."""
+    parts = []
+    i = 0
+    while i < len(glob):
+        c = glob[i]
+        if glob.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif glob.startswith("**", i) and i + 2 == len(glob):
+            parts.append(".*")
+            i += 2
+        elif c == "*":
+            parts.append("[^/]*")
+            i += 2 if glob.startswith("**", i) else 1
+        elif c == "?":
+            parts.append("[^/]")
+            i += 1
+        elif c == "[" and "]" in glob[i + 2 :]:
+            end = glob.index("]", i + 2)
+            chars = glob[i + 1 : end].replace("\\", "\\\\")
+            if chars.startswith("!"):
+                chars = "^" + chars[1:]
+            parts.append(f"[{chars}]")
+            i = end + 1
+        elif c == "\\" and i + 1 < len(glob):
+            parts.append(re.escape(glob[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(c))
+            i += 1
+    return "".join(parts)
+
+
+def compile_pattern(pattern: str) -> Optional[IgnoreRule]:
+    """Compile a line of an ignore file, or return None for blank lines and comments."""
+    pattern = pattern.rstrip()
+    if not pattern or pattern.startswith("#"):
+        return None
+    negate = pattern.startswith("!")
+    if negate or pattern.startswith("\\"):
+        pattern = pattern[1:]
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+    # Like git, a pattern with a slash is relative to the root, otherwise it matches at any depth.
+    if "/" in pattern:
+        prefix = "^"
+        pattern = pattern.lstrip("/")
+    else:
+        prefix = "^(?:.*/)?"
+    regex = re.compile(prefix + translate_glob(pattern) + "$")
+    return IgnoreRule(regex, negate, dir_only)
+
+
+class IgnoreRules:
+    """
+    .gitignore style rules deciding which paths of the vault are not scanned.
+    The last rule matching a path decides whether it is ignored.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        self.rules: List[IgnoreRule] = [
+            rule for rule in map(compile_pattern, patterns) if rule is not None
+        ]
+        # Without negated rules, any match ignores the path: use a single regex per kind.
+        self.dir_regex: Optional[Pattern[str]] = None
+        self.file_regex: Optional[Pattern[str]] = None
+        if not any(rule.negate for rule in self.rules):
+            self.dir_regex = self._combine(self.rules)
+            self.file_regex = self._combine(
+                [rule for rule in self.rules if not rule.dir_only]
+            )
+
+    @staticmethod
+    def _combine(rules: List[IgnoreRule]) -> Pattern[str]:
+        if not rules:
+            return re.compile("(?!)")
+        return re.compile("|".join(f"(?:{rule.regex.pattern})" for rule in rules))
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        """Return whether a path relative to the vault, with "/" separators, is ignored."""
+        if self.dir_regex is not None:
+            regex = self.dir_regex if is_dir else self.file_regex
+            return regex.match(path) is not None
+        for rule in reversed(self.rules):
+            if (is_dir or not rule.dir_only) and rule.regex.match(path):
+                return not rule.negate
+        return False
+
+    @classmethod
+    def load(cls, root_folder: str, patterns: Iterable[str] = ()) -> "IgnoreRules":
+        """Return the rules of the ignore file of the vault, if any, followed by the given patterns."""
+        lines: List[str] = []
+        try:
+            with open(os.path.join(root_folder, IGNORE_FILE), "r") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            pass
+        return cls([*lines, *patterns])
+
+
+def scan_markdown_files(
+    root_folder: str,
+    rules: Optional[IgnoreRules] = None,
+    include_hidden: bool = False,
+) -> Iterator[str]:
+    """
+    Lazily yield the paths of the markdown files of a folder, in the same order as os.walk.
+
+    Hidden directories (.obsidian, .git, .trash, ...) and ignored directories are pruned
+    before they are listed, so their content is never read.
+    """
+    if rules is None:
+        rules = IgnoreRules()
+    # Directories left to scan, as (path, path relative to the root with a trailing "/").
+    stack = [(root_folder, "")]
+    while stack:
+        folder, relative = stack.pop()
+        subfolders = []
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    name = entry.name
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        # Like os.walk, symbolic links to directories are not followed.
+                        if (
+                            (include_hidden or not name.startswith("."))
+                            and not entry.is_symlink()
+                            and not rules.ignored(relative + name, True)
+                        ):
+                            subfolders.append((entry.path, relative + name + "/"))
+                    elif name.endswith(".md") and not rules.ignored(
+                        relative + name, False
+                    ):
+                        yield entry.path
+        except OSError as e:
+            logging.warning(f"Cannot scan folder '{folder}': {e}")
+            continue
+        stack.extend(reversed(subfolders))
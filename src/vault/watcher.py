@@ -0,0 +1,83 @@
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Modification time and size of a file.
+FileState = Tuple[int, int]
+
+
+class VaultWatcher:
+    """
+    Polls the markdown files of a vault for changes.
+
+    A file is considered changed when its modification time or size changed. No platform
+    specific notification API is used, the files are listed and stat'ed on every poll.
+    The files are stat'ed with stat and the intervals waited with sleep, which tests replace.
+    """
+
+    def __init__(
+        self,
+        list_files: Callable[[], Iterable[str]],
+        interval: float = 1.0,
+        debounce: float = 0.5,
+        stat: Callable[[str], os.stat_result] = os.stat,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.list_files = list_files
+        self.interval = interval
+        self.debounce = debounce
+        self.stat = stat
+        self.sleep = sleep
+        self.files: Dict[str, FileState] = {}
+
+    def snapshot(self) -> Dict[str, FileState]:
+        """Return the state of all files, in the order they are listed."""
+        files: Dict[str, FileState] = {}
+        for path in self.list_files():
+            try:
+                stat = self.stat(path)
+            except OSError:
+                continue
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def poll(self) -> Tuple[List[str], List[str]]:
+        """Return the files changed (or added) and removed since the last poll."""
+        files = self.snapshot()
+        changed = [
+            path for path, state in files.items() if self.files.get(path) != state
+        ]
+        removed = [path for path in self.files if path not in files]
+        self.files = files
+        return changed, removed
+
+    def wait_for_changes(self) -> Tuple[List[str], List[str]]:
+        """
+        Block until files change and return the files changed and removed.
+        After the first change is seen, polling goes on until no file changed for the
+        debounce interval, so a burst of saves results in a single rebuild.
+        """
+        while True:
+            self.sleep(self.interval)
+            changed, removed = self.poll()
+            if changed or removed:
+                break
+
+        changed_files = dict.fromkeys(changed)
+        removed_files = dict.fromkeys(removed)
+        while True:
+            self.sleep(self.debounce)
+            changed, removed = self.poll()
+            if not changed and not removed:
+                break
+            for path in changed:
+                changed_files[path] = None
+                removed_files.pop(path, None)
+            for path in removed:
+                removed_files[path] = None
+                changed_files.pop(path, None)
+        logging.debug(
+            f"Detected {len(changed_files)} changed and {len(removed_files)} removed files."
+        )
+        return list(changed_files), list(removed_files)